@@ -28,10 +28,14 @@ from .matrixgroup import *
 """ Ray matrices for geometrical optics """
 from .ray import *
 from .rays import *
+from .raybatch import *
+from .compiledpath import *
+from .densitymap import *
 from .imagingpath import *
 
 """ ABCD matrices for gaussian beams """
 from .gaussianbeam import *
+from .beambatch import *
 from .laserpath import *
 from .lasercavity import *
 
@@ -27,13 +27,34 @@ class Axicon(Matrix):
 
     """
 
+    _cachedAttributes = Matrix._cachedAttributes + ('_deviationAngle',)
+
     def __init__(self, alpha, n, diameter=float('+Inf'), label=''):
 
+        self._deviationAngle = None
         self.n = n
         self.alpha = alpha
         super(Axicon, self).__init__(A=1, B=0, C=0, D=1, physicalLength=0, apertureDiameter=diameter, label=label,
                                      frontIndex=1.0, backIndex=1.0)
 
+    @property
+    def n(self):
+        return self._n
+
+    @n.setter
+    def n(self, value):
+        self._n = value
+        self._deviationAngle = None
+
+    @property
+    def alpha(self):
+        return self._alpha
+
+    @alpha.setter
+    def alpha(self, value):
+        self._alpha = value
+        self._deviationAngle = None
+
     def deviationAngle(self):
         """ This function provides deviation angle delta assuming that
         the axicon is in air and that the incidence is near normal,
@@ -50,7 +71,9 @@ class Axicon(Matrix):
 
         """
 
-        return (self.n - 1.0) * self.alpha
+        if self._deviationAngle is None:
+            self._deviationAngle = (self.n - 1.0) * self.alpha
+        return self._deviationAngle
 
     def focalLineLength(self, yMax=None):
         """ Provides the line length, assuming a ray at height yMax
@@ -98,6 +121,8 @@ class Axicon(Matrix):
         """
 
         outputRay = super(Axicon, self).mul_ray(rightSideRay)
+        if rightSideRay.isBlocked:
+            return outputRay
 
         if rightSideRay.y > 0:
             outputRay.theta += -self.deviationAngle()
@@ -107,6 +132,41 @@ class Axicon(Matrix):
 
         return outputRay
 
+    def mul_rayBatch(self, rightSideBatch):
+        """ The vectorized equivalent of mul_ray(): all the rays of the batch are
+        deviated at once, towards the axis, by the deviation angle.
+
+        Parameters
+        ----------
+        rightSideBatch : object of RayBatch class
+            The rays to transform
+
+        Returns
+        -------
+        outputBatch : object of RayBatch class
+            A new batch with the rays after the axicon.
+
+        Examples
+        --------
+        >>> from raytracing import *
+        >>> axicon = Axicon(alpha=0.1, n=1.5)
+        >>> outputBatch = axicon.mul_rayBatch(RayBatch(y=[1, 0, -1], theta=[0, 0, 0]))
+        >>> print(outputBatch.theta)
+        [-0.05  0.    0.05]
+
+        See Also
+        --------
+        raytracing.Axicon.mul_ray
+        raytracing.Matrix.mul_rayBatch
+        """
+
+        outputBatch = self._mul_rayBatchABCD(rightSideBatch)
+        notBlocked = rightSideBatch.isNotBlocked
+        # Rays at y == 0 are not deviated
+        outputBatch.theta[notBlocked] -= np.sign(rightSideBatch.y[notBlocked]) * self.deviationAngle()
+
+        return outputBatch
+
     def mul_beam(self, rightSideBeam):
         """This function calculates the multiplication of a coherent beam with complex radius
         of curvature q by an ABCD matrix. However it will raise an error in case the input is an axicon
@@ -131,6 +191,18 @@ class Axicon(Matrix):
 
         raise TypeError("Cannot use Axicon with GaussianBeam, only with Ray")
 
+    def mul_beamBatch(self, rightSideBatch):
+        """ The vectorized equivalent of mul_beam(): gaussian beams cannot go through
+        an axicon, and this raises an error for the whole batch.
+
+        See Also
+        --------
+        raytracing.Axicon.mul_beam
+        raytracing.Matrix.mul_beamBatch
+        """
+
+        raise TypeError("Cannot use Axicon with BeamBatch, only with Ray or RayBatch")
+
     @property
     def forwardSurfaces(self):
         """ A list of surfaces that represents the element for drawing purposes
@@ -0,0 +1,155 @@
+from .gaussianbeam import *
+import numpy as np
+
+
+class BeamBatch:
+    """A group of gaussian beams stored as NumPy arrays, for vectorized propagation.
+
+    A `GaussianBeam` is convenient to follow a single beam, but propagating
+    thousands of them (for instance to find the input beam that best matches
+    a cavity) one at a time is slow. A BeamBatch keeps the same properties as
+    `GaussianBeam` (q, wavelength, n, z and isClipped), but each property is
+    an array with one value per beam. Every element of a path is then applied
+    to the whole batch at once with `Matrix.traceBeamBatchThrough()`.
+
+    Parameters
+    ----------
+    q : array_like of complex
+        The complex beam parameters (default=None)
+    w : array_like
+        The 1/e beam sizes in electric field, used to obtain q if q is not provided. (default=None)
+    R : array_like or float
+        The radii of curvature (positive means diverging), used with w. (default=+Inf)
+    n : array_like or float
+        The index of refraction in which each beam is. (default=1.0)
+    wavelength : array_like or float
+        The wavelength of each beam (default=632.8e-6)
+    z : array_like or float
+        The position of each beam along the optical axis (default=0)
+    isClipped : array_like or bool
+        Whether or not each beam was clipped by an aperture (default=False)
+
+    Examples
+    --------
+    >>> from raytracing import *
+    >>> batch = BeamBatch(w=[1, 2], wavelength=0.001)
+    >>> outputBatch = Space(d=100).traceBeamBatchThrough(batch)
+    >>> print(outputBatch.z)
+    [100. 100.]
+
+    See Also
+    --------
+    raytracing.GaussianBeam
+    raytracing.Matrix.traceBeamBatchThrough
+
+    Notes
+    -----
+    wavelength and z must be in the same units.
+    """
+
+    def __init__(self, q=None, w=None, R=float("+Inf"), n=1.0, wavelength=632.8e-6, z=0.0, isClipped=False):
+        relTol = 0.5 / 100
+        if q is None and w is None:
+            raise ValueError("Please specify 'q' or 'w'.")
+
+        if w is not None:
+            w, R, n, wavelength = np.broadcast_arrays(*[np.array(value, dtype=float, ndmin=1)
+                                                        for value in (w, R, n, wavelength)])
+            with np.errstate(divide='ignore'):
+                qFromW = 1 / (1.0 / R - 1j * wavelength / n / (np.pi * w * w))
+
+        if q is not None:
+            self.q = np.array(q, dtype=complex, ndmin=1)
+            if w is not None and not np.allclose(self.q, qFromW, rtol=relTol, atol=0):
+                raise ValueError("Mismatch between the given q and the q computed from w "
+                                 "({0}% tolerance).".format(relTol * 100))
+        else:
+            self.q = qFromW
+
+        if self.q.ndim != 1:
+            raise ValueError("'q' (or 'w') must be one-dimensional.")
+
+        count = len(self.q)
+        self.wavelength = self._column(wavelength, count, float)
+        self.n = self._column(n, count, float)
+        self.z = self._column(z, count, float)
+        self.isClipped = self._column(isClipped, count, bool)
+
+    @staticmethod
+    def _column(values, count, dtype):
+        column = np.empty(count, dtype=dtype)
+        column[:] = values
+        return column
+
+    @classmethod
+    def fromBeams(cls, beams):
+        """Create a batch from any iterable of `GaussianBeam`."""
+        beams = list(beams)
+        for beam in beams:
+            if not isinstance(beam, GaussianBeam):
+                raise TypeError("'beams' elements must be of type GaussianBeam.")
+
+        return cls(q=[beam.q for beam in beams], n=[beam.n for beam in beams],
+                   wavelength=[beam.wavelength for beam in beams], z=[beam.z for beam in beams],
+                   isClipped=[beam.isClipped for beam in beams])
+
+    def __len__(self) -> int:
+        return len(self.q)
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            beam = GaussianBeam(q=complex(self.q[item]), n=float(self.n[item]),
+                                wavelength=float(self.wavelength[item]), z=float(self.z[item]))
+            beam.isClipped = bool(self.isClipped[item])
+            return beam
+
+        return BeamBatch(q=self.q[item], n=self.n[item], wavelength=self.wavelength[item], z=self.z[item],
+                         isClipped=self.isClipped[item])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def copy(self):
+        return BeamBatch(q=self.q, n=self.n, wavelength=self.wavelength, z=self.z, isClipped=self.isClipped)
+
+    @property
+    def isFinite(self):
+        """ For every beam, whether the imaginary part of -1/q is positive (see `GaussianBeam.isFinite`). """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (self.q != 0) & ((-1 / self.q).imag > 0)
+
+    @property
+    def w(self):
+        """ The 1/e beam sizes in electric field extracted from q, +Inf when the beam is not finite. """
+        isFinite = self.isFinite
+        w = np.full(len(self), float("+Inf"))
+        w[isFinite] = np.sqrt(self.wavelength[isFinite] / self.n[isFinite] /
+                              (np.pi * (-1 / self.q[isFinite]).imag))
+        return w
+
+    @property
+    def R(self):
+        """ The radii of curvature (positive means diverging) extracted from q. """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            invQReal = (1 / self.q).real
+            return np.where((self.q == 0) | (invQReal == 0), float("+Inf"), 1 / invQReal)
+
+    @property
+    def zo(self):
+        """ The rayleigh ranges of the beams. """
+        return self.q.imag
+
+    @property
+    def wo(self):
+        """ The 1/e beam sizes in electric field at the waist of the beams, NaN when zo is not positive. """
+        with np.errstate(invalid='ignore'):
+            return np.where(self.zo > 0, np.sqrt(self.zo * self.wavelength / np.pi), float("nan"))
+
+    @property
+    def waistPosition(self):
+        """ The positions of the waists of the beams. """
+        return -self.q.real
+
+    def __str__(self):
+        return "BeamBatch of {0} beams ({1} clipped)".format(len(self), int(np.count_nonzero(self.isClipped)))
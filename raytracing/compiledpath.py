@@ -0,0 +1,359 @@
+from .raybatch import *
+from .beambatch import *
+from multiprocessing import shared_memory
+import multiprocessing
+import sys
+import numpy as np
+from typing import NamedTuple
+
+
+class Transmission(NamedTuple):
+    """ Which rays made it through a path, and their final height and angle (NaN if blocked) """
+    isTransmitted: np.ndarray = None
+    y: np.ndarray = None
+    theta: np.ndarray = None
+
+
+class CompiledPath:
+    """A flat table of the elements of an optical path, for fast tracing of RayBatch.
+
+    A `MatrixGroup` can contain other groups (System4f, CompoundLens, Objective,
+    vendor lenses...), and tracing through it means walking down the hierarchy
+    and dispatching every multiplication through `Matrix.__mul__`. A CompiledPath
+    is the same path flattened to its individual elements, with the A, B, C, D,
+    L, apertureDiameter and apertureNA of each element stored in contiguous arrays.
+    It is obtained with `MatrixGroup.compile()`, and is rebuilt only when the group
+    changes.
+
+    Parameters
+    ----------
+    elements : list of Matrix
+        The individual elements of the path, in order. They must not be groups.
+
+    Attributes
+    ----------
+    isTracedOneByOne : array of bool
+        True for special elements (e.g. Axicon) that cannot be described by their ABCD
+        values only. Those elements are traced with their own methods.
+    isBeamTracedOneByOne : array of bool
+        The same, for gaussian beams.
+
+    See Also
+    --------
+    raytracing.MatrixGroup.compile
+    raytracing.RayBatch
+
+    """
+
+    def __init__(self, elements):
+        self.elements = list(elements)
+
+        self.A = np.array([element.A for element in self.elements], dtype=float)
+        self.B = np.array([element.B for element in self.elements], dtype=float)
+        self.C = np.array([element.C for element in self.elements], dtype=float)
+        self.D = np.array([element.D for element in self.elements], dtype=float)
+        self.L = np.array([element.L for element in self.elements], dtype=float)
+        self.apertureDiameter = np.array([element.apertureDiameter for element in self.elements], dtype=float)
+        self.apertureNA = np.array([element.apertureNA for element in self.elements], dtype=float)
+        self.frontIndex = np.array([element.frontIndex for element in self.elements], dtype=float)
+        self.backIndex = np.array([element.backIndex for element in self.elements], dtype=float)
+        self.isTracedOneByOne = np.array([element._tracesRaysOneByOne for element in self.elements], dtype=bool)
+        self.isBeamTracedOneByOne = np.array([element._transformsBeamsOneByOne for element in self.elements],
+                                             dtype=bool)
+
+    def __len__(self):
+        return len(self.elements)
+
+    def traceBatchThrough(self, inputBatch):
+        """Trace all the rays of the batch through every element of the table.
+
+        Only the rays that are not blocked are propagated: when rays get blocked,
+        their state is frozen in the output batch and they are removed from the
+        rays that continue, exactly like `Matrix.trace()` would leave them.
+
+        Parameters
+        ----------
+        inputBatch : object of RayBatch class
+            The rays to trace
+
+        Returns
+        -------
+        outputBatch : object of RayBatch class
+            A new batch with the rays after the last element.
+        """
+        outputBatch = inputBatch.copy()
+
+        # The rays that are still propagating are kept in separate arrays, with their
+        # indices in the output batch. All of them went through the same aperture
+        # after the first element, so their aperture diameter is a single value.
+        indices = np.flatnonzero(outputBatch.isNotBlocked)
+        y = outputBatch.y[indices]
+        theta = outputBatch.theta[indices]
+        z = outputBatch.z[indices]
+        apertureDiameter = outputBatch.apertureDiameter[indices]
+
+        table = zip(self.A.tolist(), self.B.tolist(), self.C.tolist(), self.D.tolist(), self.L.tolist(),
+                    self.apertureDiameter.tolist(), self.apertureNA.tolist(), self.isTracedOneByOne.tolist())
+
+        with np.errstate(invalid='ignore', over='ignore'):
+            for i, (A, B, C, D, L, diameter, NA, isTracedOneByOne) in enumerate(table):
+                if isTracedOneByOne:
+                    self._freeze(outputBatch, indices, y, theta, z, apertureDiameter)
+                    outputBatch = self.elements[i]._traceBatchThroughOneElement(outputBatch)
+
+                    indices = np.flatnonzero(outputBatch.isNotBlocked)
+                    y = outputBatch.y[indices]
+                    theta = outputBatch.theta[indices]
+                    z = outputBatch.z[indices]
+                    apertureDiameter = outputBatch.apertureDiameter[indices]
+                    continue
+
+                halfDiameter = diameter / 2
+                if L > 0 and halfDiameter != float("+inf"):
+                    isBlocked = np.abs(y) > halfDiameter
+                    if isBlocked.any():
+                        blocked = indices[isBlocked]
+                        self._freeze(outputBatch, blocked, y[isBlocked], theta[isBlocked], z[isBlocked],
+                                     apertureDiameter if np.isscalar(apertureDiameter) else apertureDiameter[isBlocked])
+                        outputBatch.isBlocked[blocked] = True
+
+                        isNotBlocked = ~isBlocked
+                        indices = indices[isNotBlocked]
+                        y = y[isNotBlocked]
+                        theta = theta[isNotBlocked]
+                        z = z[isNotBlocked]
+                        if not np.isscalar(apertureDiameter):
+                            apertureDiameter = apertureDiameter[isNotBlocked]
+
+                if halfDiameter != float("+inf") or NA != float("+inf"):
+                    isBlocked = (np.abs(y) > halfDiameter) | (np.abs(theta) > NA)
+                else:
+                    isBlocked = None
+
+                y, theta = A * y + B * theta, C * y + D * theta
+                z = L + z
+                apertureDiameter = diameter
+
+                if isBlocked is not None and isBlocked.any():
+                    blocked = indices[isBlocked]
+                    self._freeze(outputBatch, blocked, y[isBlocked], theta[isBlocked], z[isBlocked], apertureDiameter)
+                    outputBatch.isBlocked[blocked] = True
+
+                    isNotBlocked = ~isBlocked
+                    indices = indices[isNotBlocked]
+                    y = y[isNotBlocked]
+                    theta = theta[isNotBlocked]
+                    z = z[isNotBlocked]
+
+        self._freeze(outputBatch, indices, y, theta, z, apertureDiameter)
+        return outputBatch
+
+    def transmission(self, inputBatch):
+        """Find which rays of the batch make it through the path, and their final
+        height and angle. This gives the same rays as traceBatchThrough(), but
+        nothing is kept for the blocked rays: they are dropped as soon as they
+        are blocked, and the rays that remain are the only ones propagated.
+
+        Parameters
+        ----------
+        inputBatch : object of RayBatch class
+            The rays to trace
+
+        Returns
+        -------
+        transmission : Transmission
+            A boolean array, True for rays that are not blocked, and the final
+            y and theta of each ray (NaN for blocked rays).
+        """
+        isTransmitted = np.zeros(len(inputBatch), dtype=bool)
+        yOut = np.full(len(inputBatch), np.nan)
+        thetaOut = np.full(len(inputBatch), np.nan)
+
+        if self.isTracedOneByOne.any():
+            outputBatch = self.traceBatchThrough(inputBatch)
+            isTransmitted = outputBatch.isNotBlocked
+            yOut[isTransmitted] = outputBatch.y[isTransmitted]
+            thetaOut[isTransmitted] = outputBatch.theta[isTransmitted]
+            return Transmission(isTransmitted, yOut, thetaOut)
+
+        indices = np.flatnonzero(inputBatch.isNotBlocked)
+        y = inputBatch.y[indices]
+        theta = inputBatch.theta[indices]
+
+        table = zip(self.A.tolist(), self.B.tolist(), self.C.tolist(), self.D.tolist(),
+                    self.apertureDiameter.tolist(), self.apertureNA.tolist())
+
+        with np.errstate(invalid='ignore', over='ignore'):
+            for A, B, C, D, diameter, NA in table:
+                # Blocked at the entrance (for elements with a length) and blocked
+                # after propagation are both decided by the height and angle at
+                # the entrance of the element.
+                if diameter != float("+inf") or NA != float("+inf"):
+                    isNotBlocked = ~((np.abs(y) > diameter / 2) | (np.abs(theta) > NA))
+                    if not isNotBlocked.all():
+                        indices = indices[isNotBlocked]
+                        y = y[isNotBlocked]
+                        theta = theta[isNotBlocked]
+                        if len(indices) == 0:
+                            break
+
+                y, theta = A * y + B * theta, C * y + D * theta
+
+        isTransmitted[indices] = True
+        yOut[indices] = y
+        thetaOut[indices] = theta
+        return Transmission(isTransmitted, yOut, thetaOut)
+
+    def traceBeamBatchThrough(self, inputBatch):
+        """Propagate all the gaussian beams of the batch through every element of the table,
+        exactly like `Matrix.mul_beam()` would for each beam and each element.
+
+        Parameters
+        ----------
+        inputBatch : object of BeamBatch class
+            The beams to propagate
+
+        Returns
+        -------
+        outputBatch : object of BeamBatch class
+            A new batch with the beams after the last element.
+        """
+        q = inputBatch.q.copy()
+        n = inputBatch.n.copy()
+        z = inputBatch.z.copy()
+        isClipped = inputBatch.isClipped.copy()
+        wavelength = inputBatch.wavelength
+
+        table = zip(self.A.tolist(), self.B.tolist(), self.C.tolist(), self.D.tolist(), self.L.tolist(),
+                    self.apertureDiameter.tolist(), self.frontIndex.tolist(), self.backIndex.tolist(),
+                    self.isBeamTracedOneByOne.tolist())
+
+        with np.errstate(invalid='ignore', over='ignore', divide='ignore'):
+            for i, (A, B, C, D, L, diameter, frontIndex, backIndex, isTracedOneByOne) in enumerate(table):
+                if isTracedOneByOne:
+                    batch = BeamBatch(q=q, n=n, wavelength=wavelength, z=z, isClipped=isClipped)
+                    batch = self.elements[i].mul_beamBatch(batch)
+                    q, n, z, isClipped = batch.q, batch.n, batch.z, batch.isClipped
+                    continue
+
+                # After the first element, all beams are in the same index
+                isNotTracked = n != frontIndex
+                if np.any(isNotTracked):
+                    msg = "The gaussian beam is not tracking the index of refraction properly {0} {1}".format(
+                        np.broadcast_to(n, isNotTracked.shape)[isNotTracked][0], frontIndex)
+                    raise RuntimeError(msg)
+
+                q = (A * q + B) / (C * q + D)
+                z = L + z
+                n = backIndex
+
+                if diameter != float("+inf"):
+                    qInvImag = (-1 / q).imag
+                    w = np.where((q != 0) & (qInvImag > 0), np.sqrt(wavelength / n / (np.pi * qInvImag)),
+                                 float("+inf"))
+                    isClipped = isClipped | (w > diameter / 2)
+
+        return BeamBatch(q=q, n=n, wavelength=wavelength, z=z, isClipped=isClipped)
+
+    def traceBatchThroughInParallel(self, inputBatch, processes=None, progress=False):
+        """Trace all the rays of the batch like traceBatchThrough(), but split the work
+        across several processes.
+
+        The coordinates of the rays are placed in a block of shared memory
+        (`multiprocessing.shared_memory`) that all processes read and write directly:
+        each process receives only the table of elements and the range of rays
+        it must trace. Hence, nothing proportional to the number of rays is ever
+        serialized between processes.
+
+        Parameters
+        ----------
+        inputBatch : object of RayBatch class
+            The rays to trace
+        processes : int (Optional)
+            The number of processes. (default = the number of CPU cores)
+        progress : bool (Optional)
+            If True, each process shows the progress in its range of rays. (default = False)
+
+        Returns
+        -------
+        outputBatch : object of RayBatch class
+            A new batch with the rays after the last element, in the same order.
+        """
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+
+        count = len(inputBatch)
+        if count == 0:
+            return inputBatch.copy()
+
+        sharedMemory = shared_memory.SharedMemory(create=True, size=len(RayBatch._columnNames) * count * 8)
+        try:
+            columns = np.ndarray((len(RayBatch._columnNames), count), dtype=float, buffer=sharedMemory.buf)
+            columns[:] = inputBatch.columns()
+
+            bounds = np.linspace(0, count, processes + 1).astype(int).tolist()
+            ranges = [(self, sharedMemory.name, count, start, stop, progress)
+                      for start, stop in zip(bounds[:-1], bounds[1:])]
+            with multiprocessing.Pool(processes=processes) as pool:
+                pool.starmap(_traceSharedMemoryRange, ranges)
+
+            outputBatch = RayBatch(*columns)
+            del columns
+        finally:
+            sharedMemory.close()
+            sharedMemory.unlink()
+
+        return outputBatch
+
+    @staticmethod
+    def _freeze(batch, indices, y, theta, z, apertureDiameter):
+        batch.y[indices] = y
+        batch.theta[indices] = theta
+        batch.z[indices] = z
+        batch.apertureDiameter[indices] = apertureDiameter
+
+
+def _progressCheckpoints(count):
+    """ The iterations at which Rays.displayProgress() shows the progress
+    when iterating over count rays. """
+    checkpoints = []
+    progressLog = 10000
+    iteration = progressLog
+    while iteration <= count:
+        checkpoints.append(iteration)
+        progressLog = min(progressLog * 3, count)
+        iteration = (iteration // progressLog + 1) * progressLog
+
+    return checkpoints
+
+
+def _traceSharedMemoryRange(compiledPath, name, count, start, stop, progress):
+    """ Executed by each process of CompiledPath.traceBatchThroughInParallel(): the rays
+    from start to stop are traced in place in the shared memory block. """
+    sharedMemory = shared_memory.SharedMemory(name=name)
+    try:
+        columns = np.ndarray((len(RayBatch._columnNames), count), dtype=float, buffer=sharedMemory.buf)
+
+        _traceColumnsInPlace(compiledPath, columns[:, start:stop], progress)
+        del columns
+    finally:
+        sharedMemory.close()
+
+
+def _traceColumnsInPlace(compiledPath, columns, progress):
+    """ Trace the rays of columns (see RayBatch.columns()) in place. With progress,
+    the rays are traced in chunks that end where Rays.displayProgress() would show
+    the progress, and the progress is shown after each chunk. """
+    rayCount = columns.shape[1]
+    checkpoints = _progressCheckpoints(rayCount) if progress else []
+    ends = checkpoints if checkpoints and checkpoints[-1] == rayCount else checkpoints + [rayCount]
+
+    first = 0
+    for last in ends:
+        rays = slice(first, last)
+        columns[:, rays] = compiledPath.traceBatchThrough(RayBatch(*columns[:, rays])).columns()
+        if last in checkpoints:
+            # A single write: parallel processes show their progress at the same time
+            sys.stdout.write("Progress {0}/{1} ({2:.0f}%) \n".format(last, rayCount, last / rayCount * 100))
+            sys.stdout.flush()
+        first = last
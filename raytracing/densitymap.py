@@ -0,0 +1,278 @@
+from .compiledpath import *
+import multiprocessing
+import numpy as np
+
+
+class DensityMap:
+    """An image of the density of rays in the y-z plane, accumulated from ray traces.
+
+    Drawing every ray trace as a line (as `Figure` does) is useful for a few
+    rays, but caustics and vignetting only appear with millions of rays. A
+    DensityMap is a fixed-size image, where the segments of every ray between
+    the elements of a path are rasterized with the anti-aliased line algorithm
+    of Xiaolin Wu. The rays are traced in batches (see `RayBatch`), and the
+    images of separate batches (or separate processes) are simply added.
+
+    Parameters
+    ----------
+    zMin : float
+        The position of the left edge of the image
+    zMax : float
+        The position of the right edge of the image
+    yMin : float
+        The height of the bottom edge of the image
+    yMax : float
+        The height of the top edge of the image
+    zCount : int
+        The number of pixels along z (default=800)
+    yCount : int
+        The number of pixels along y (default=400)
+
+    Examples
+    --------
+    >>> from raytracing import *
+    >>> path = ImagingPath([Space(d=10), Lens(f=5), Space(d=10)])
+    >>> densityMap = DensityMap(zMin=0, zMax=20, yMin=-1, yMax=1, zCount=20, yCount=2)
+    >>> densityMap.addRayBatch(path, RayBatch(y=[0.5, -0.5], theta=[0, 0]))
+    >>> print(densityMap.image[:, :10])
+    [[1. 1. 1. 1. 1. 1. 1. 1. 1. 1.]
+     [1. 1. 1. 1. 1. 1. 1. 1. 1. 1.]]
+
+    See Also
+    --------
+    raytracing.RayBatch
+    raytracing.CompiledPath
+
+    Notes
+    -----
+    The image has one row for each height (from yMin to yMax) and one column for each
+    position z (from zMin to zMax). Each segment adds a total of one per pixel along its
+    major axis (the axis along which it covers the most pixels), split between the two
+    pixels closest to the line.
+    """
+
+    # The largest number of points along the segments that are rasterized at once
+    maxSampleCount = 4000000
+
+    def __init__(self, zMin, zMax, yMin, yMax, zCount=800, yCount=400):
+        if zMax <= zMin or yMax <= yMin:
+            raise ValueError("The image must have zMin < zMax and yMin < yMax.")
+        if zCount <= 0 or yCount <= 0:
+            raise ValueError("The image must have at least one pixel along y and z.")
+
+        self.zMin = zMin
+        self.zMax = zMax
+        self.yMin = yMin
+        self.yMax = yMax
+        self.zCount = int(zCount)
+        self.yCount = int(yCount)
+        self.image = np.zeros((self.yCount, self.zCount))
+
+    @property
+    def extent(self):
+        """ The edges of the image, as expected by matplotlib's imshow() """
+        return (self.zMin, self.zMax, self.yMin, self.yMax)
+
+    def emptyCopy(self):
+        """ A density map with the same edges and pixels, and no rays. """
+        return DensityMap(self.zMin, self.zMax, self.yMin, self.yMax, self.zCount, self.yCount)
+
+    def _hasSameGeometry(self, other):
+        return (self.zMin, self.zMax, self.yMin, self.yMax, self.zCount, self.yCount) == \
+               (other.zMin, other.zMax, other.yMin, other.yMax, other.zCount, other.yCount)
+
+    def __iadd__(self, other):
+        if not isinstance(other, DensityMap):
+            return NotImplemented
+        if not self._hasSameGeometry(other):
+            raise ValueError("Only density maps with the same edges and pixels can be added.")
+        self.image += other.image
+        return self
+
+    def __add__(self, other):
+        if not isinstance(other, DensityMap):
+            return NotImplemented
+        densityMap = self.emptyCopy()
+        densityMap += self
+        densityMap += other
+        return densityMap
+
+    def addSegments(self, z1, y1, z2, y2):
+        """Rasterize the segments from (z1, y1) to (z2, y2) in the image.
+
+        Parameters
+        ----------
+        z1, y1, z2, y2 : array_like
+            The positions and heights of the two ends of every segment
+        """
+        z1, y1, z2, y2 = np.broadcast_arrays(*[np.array(value, dtype=float, ndmin=1) for value in (z1, y1, z2, y2)])
+
+        # In pixels, with the center of the pixels at integer values
+        u1 = (z1 - self.zMin) / (self.zMax - self.zMin) * self.zCount - 0.5
+        u2 = (z2 - self.zMin) / (self.zMax - self.zMin) * self.zCount - 0.5
+        v1 = (y1 - self.yMin) / (self.yMax - self.yMin) * self.yCount - 0.5
+        v2 = (y2 - self.yMin) / (self.yMax - self.yMin) * self.yCount - 0.5
+
+        isFinite = np.isfinite(u1) & np.isfinite(u2) & np.isfinite(v1) & np.isfinite(v2)
+        isSteep = np.abs(v2 - v1) > np.abs(u2 - u1)
+
+        flatImage = self.image.reshape(-1)
+        # Segments mostly along z are sampled at every column, the others at every row
+        isAlongZ = isFinite & ~isSteep
+        u1AlongZ, u2AlongZ = u1[isAlongZ], u2[isAlongZ]
+        if len(u1AlongZ) > 0 and (u1AlongZ == u1AlongZ[0]).all() and (u2AlongZ == u2AlongZ[0]).all():
+            # The usual case of rays through the same element: the same columns for all segments
+            self._addColumns(u1AlongZ[0], v1[isAlongZ], u2AlongZ[0], v2[isAlongZ])
+        else:
+            flatImage += self._rasterizedLines(u1AlongZ, v1[isAlongZ], u2AlongZ, v2[isAlongZ],
+                                               self.zCount, self.yCount, isTransposed=False)
+        isAlongY = isFinite & isSteep
+        flatImage += self._rasterizedLines(v1[isAlongY], u1[isAlongY], v2[isAlongY], u2[isAlongY],
+                                           self.yCount, self.zCount, isTransposed=True)
+
+    def _addColumns(self, u1, v1, u2, v2):
+        """ Add segments that all go from column u1 to column u2 (in pixels), one column at a
+        time. This is the same as _rasterizedLines(), without finding the columns of each
+        segment. """
+        if u2 < u1:
+            u1, v1, u2, v2 = u2, v2, u1, v1
+        gradients = (v2 - v1) / (u2 - u1) if u2 > u1 else np.zeros(len(v1))
+
+        for column in range(max(int(np.round(u1)), 0), min(int(np.round(u2)), self.zCount - 1) + 1):
+            weight = min(column + 0.5, u2) - max(column - 0.5, u1)
+            if weight <= 0:
+                continue
+
+            v = v1 + gradients * (column - u1)
+            lower = np.floor(v)
+            fraction = v - lower
+            lower = lower.astype(int)
+            # Rows -1 to yCount-1 for lower, their fraction goes to the row above
+            isInside = (lower >= -1) & (lower < self.yCount)
+            lower = lower[isInside] + 1
+            fraction = fraction[isInside]
+            profile = np.bincount(lower, weights=1 - fraction, minlength=self.yCount + 2)[1:self.yCount + 1]
+            profile += np.bincount(lower + 1, weights=fraction, minlength=self.yCount + 2)[1:self.yCount + 1]
+            self.image[:, column] += weight * profile
+
+    def _rasterizedLines(self, major1, minor1, major2, minor2, majorCount, minorCount, isTransposed):
+        """ The flattened image of the lines, sampled at every pixel along their major axis
+        (Xiaolin Wu). The weight of a sample is the length of the line in that pixel along
+        the major axis, and it is split between the two closest pixels along the minor axis. """
+        flatImage = np.zeros(majorCount * minorCount)
+
+        isReversed = major2 < major1
+        major1, major2 = np.where(isReversed, major2, major1), np.where(isReversed, major1, major2)
+        minor1, minor2 = np.where(isReversed, minor2, minor1), np.where(isReversed, minor1, minor2)
+
+        # Only the pixels inside the image are sampled
+        first = np.maximum(np.round(major1), 0).astype(int)
+        last = np.minimum(np.round(major2), majorCount - 1).astype(int)
+        counts = np.maximum(last - first + 1, 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            gradients = np.where(major2 > major1, (minor2 - minor1) / (major2 - major1), 0)
+
+        ends = np.cumsum(counts)
+        start = 0
+        while start < len(counts):
+            # Enough lines for at most maxSampleCount points (or a single line)
+            stop = max(int(np.searchsorted(ends, ends[start] - counts[start] + self.maxSampleCount, side='right')),
+                       start + 1)
+            lines = slice(start, stop)
+            lineCounts = counts[lines]
+            line = np.repeat(np.arange(stop - start), lineCounts)
+            offsets = np.cumsum(lineCounts) - lineCounts
+            major = first[lines][line] + np.arange(len(line)) - offsets[line]
+
+            weights = np.minimum(major + 0.5, major2[lines][line]) - np.maximum(major - 0.5, major1[lines][line])
+            minor = minor1[lines][line] + gradients[lines][line] * (major - major1[lines][line])
+            lower = np.floor(minor)
+            fraction = minor - lower
+            lower = lower.astype(int)
+
+            for pixels, pixelWeights in ((lower, weights * (1 - fraction)), (lower + 1, weights * fraction)):
+                isInside = (pixels >= 0) & (pixels < minorCount) & (pixelWeights > 0)
+                if isTransposed:
+                    indices = major[isInside] * minorCount + pixels[isInside]
+                else:
+                    indices = pixels[isInside] * majorCount + major[isInside]
+                flatImage += np.bincount(indices, weights=pixelWeights[isInside], minlength=len(flatImage))
+            start = stop
+
+        return flatImage
+
+    def addRayBatch(self, path, inputBatch):
+        """Trace the rays of the batch through the path, and add the segments of every ray
+        between the elements to the image. As in the figures, a ray is drawn until it is blocked.
+
+        Parameters
+        ----------
+        path : object of Matrix, MatrixGroup or CompiledPath class
+            The path of the rays
+        inputBatch : object of RayBatch class
+            The rays at the front edge of the path
+        """
+        if not isinstance(inputBatch, RayBatch):
+            raise TypeError("'inputBatch' must be a RayBatch {0}".format(inputBatch))
+
+        if not isinstance(path, CompiledPath):
+            path = path.compile()
+
+        batch = inputBatch
+        for element in path.elements:
+            outputBatch = CompiledPath([element]).traceBatchThrough(batch)
+            if element.L != 0:
+                isDrawn = outputBatch.isNotBlocked
+                self.addSegments(batch.z[isDrawn], batch.y[isDrawn], outputBatch.z[isDrawn], outputBatch.y[isDrawn])
+            batch = outputBatch
+
+    def addRays(self, path, rays, chunkSize=100000, processes=1):
+        """Trace any number of rays through the path in chunks of rays, and add them to
+        the image (see addRayBatch()).
+
+        Parameters
+        ----------
+        path : object of Matrix, MatrixGroup or CompiledPath class
+            The path of the rays
+        rays : RayBatch, Rays, list of Ray or iterable of RayBatch
+            The rays at the front edge of the path (see RayBatch.chunksOf())
+        chunkSize : int
+            The number of rays traced at once (default=100000)
+        processes : int
+            The number of processes that trace the chunks. Each process returns the
+            image of its chunks, and the images are added. (default=1)
+        """
+        if not isinstance(path, CompiledPath):
+            path = path.compile()
+
+        chunks = RayBatch.chunksOf(rays, chunkSize)
+        if processes == 1:
+            for chunk in chunks:
+                self.addRayBatch(path, chunk)
+            return
+
+        emptyMap = self.emptyCopy()
+        with multiprocessing.Pool(processes=processes) as pool:
+            tasks = ((emptyMap, path, chunk.columns()) for chunk in chunks)
+            for densityMap in pool.imap_unordered(_densityMapOfColumns, tasks):
+                self += densityMap
+
+    def display(self, title="Ray density", logScale=False):  # pragma: no cover
+        """ Display the image with matplotlib """
+        import matplotlib.pyplot as plt
+        from matplotlib.colors import LogNorm
+
+        fig, axis = plt.subplots(figsize=(10, 5))
+        norm = LogNorm() if logScale else None
+        axis.imshow(self.image, origin='lower', extent=self.extent, aspect='auto', cmap='inferno', norm=norm)
+        axis.set_title(title)
+        axis.set_xlabel("Distance z")
+        axis.set_ylabel("Height y")
+        plt.show()
+
+
+def _densityMapOfColumns(task):
+    """ Executed by each process of DensityMap.addRays(): the image of a chunk of rays. """
+    densityMap, path, columns = task
+    densityMap.addRayBatch(path, RayBatch(*columns))
+    return densityMap
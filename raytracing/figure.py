@@ -434,27 +434,32 @@ class Figure:
         """ Draw beam trace corresponding to input beam
         Because the laser beam diffracts through space, we cannot
         simply propagate the beam over large distances and trace it
-        (as opposed to rays, where we can). We must split Space()
-        elements into sub elements to watch the beam size expand.
+        (as opposed to rays, where we can). We must sample the beam
+        size inside Space() elements to watch the beam expand.
 
-        We arbitrarily split Space() elements into N sub elements
-        before plotting.
+        We arbitrarily sample Space() elements at N positions
+        before plotting. In a Space(), q(z) = q + z: the beam size at
+        all positions is obtained at once from q with a `BeamBatch`.
         """
-        from .imagingpath import ImagingPath  # Fixme: circular import fix
-        from .matrix import Space
+        from .matrix import Space  # Fixme: circular import fix
+        from .beambatch import BeamBatch
 
         N = 100
-        highResolution = ImagingPath()
+        x = [beam.z]
+        y = [beam.w]
+        fractions = np.arange(1, N + 1) / N
         for element in self.path.elements:
             if isinstance(element, Space):
-                for i in range(N):
-                    highResolution.append(Space(d=element.L / N,
-                                                n=element.frontIndex))
+                samples = BeamBatch(q=beam.q + element.B * fractions, n=element.backIndex,
+                                    wavelength=beam.wavelength)
+                x.extend((beam.z + element.L * fractions).tolist())
+                y.extend(samples.w.tolist())
+                beam = element * beam
             else:
-                highResolution.append(element)
-
-        beamTrace = highResolution.trace(beam)
-        x, y = self.rearrangeBeamTraceForPlotting(beamTrace)
+                beamTrace = element.trace(beam)
+                x.extend([beamInElement.z for beamInElement in beamTrace])
+                y.extend([beamInElement.w for beamInElement in beamTrace])
+                beam = beamTrace[-1]
 
         lines = [Line(x, y, 'r'),
                  Line(x, [-v for v in y], 'r')]
@@ -2,6 +2,7 @@ from typing import Any, Union, List
 from .figure import Figure
 from .matrixgroup import *
 from .ray import *
+import functools
 import numpy as np
 
 """ We start with general, useful namedtuples to simplify management of values """
@@ -16,6 +17,34 @@ class Stop(NamedTuple):
     diameter: float = None
 
 
+def _memoizedUntilPathChanges(method):
+    """ Keep the value returned by a method of ImagingPath, for each set of arguments,
+    until the path or any of its elements changes (see MatrixGroup._currentVersion()),
+    or its precision or maxHeight change. Rays are returned as copies since they can be
+    modified. """
+
+    @functools.wraps(method)
+    def memoizedMethod(self, *args, **kwargs):
+        self._currentVersion()  # Forgets the values if the path or an element changed
+        key = (method.__name__, self.precision, self.maxHeight, args, tuple(sorted(kwargs.items())))
+        if key not in self._memoizedValues:
+            self._memoizedValues[key] = method(self, *args, **kwargs)
+
+        return _copiedRays(self._memoizedValues[key])
+
+    return memoizedMethod
+
+
+def _copiedRays(value):
+    if isinstance(value, Ray):
+        return Ray._fromValues(value.y, value.theta, value.z, value.isBlocked, value.apertureDiameter,
+                               value.wavelength)
+    elif isinstance(value, MarginalRays):
+        return MarginalRays(*[_copiedRays(ray) for ray in value])
+
+    return value
+
+
 class ImagingPath(MatrixGroup):
     """ImagingPath: the main class of the module, allowing
     the combination of Matrix() or MatrixGroup() to be used 
@@ -104,8 +133,17 @@ class ImagingPath(MatrixGroup):
         self.showImages = True
         self.showElementLabels = True
         self.showPointsOfInterestLabels = True
+
+        # Stops, pupils and principal rays, kept until the path changes
+        self._memoizedValues = {}
         super(ImagingPath, self).__init__(elements=elements, label=label)
 
+    _cachedAttributes = MatrixGroup._cachedAttributes + ('_memoizedValues',)
+
+    def _newVersion(self):
+        super(ImagingPath, self)._newVersion()
+        self._memoizedValues.clear()
+
     @property
     def objectHeight(self):
         """Get or set the object height, at the starting edge of the ImagingPath.
@@ -148,6 +186,7 @@ class ImagingPath(MatrixGroup):
         warnDeprecatedObjectReferences()
         self._rayNumber = value
 
+    @_memoizedUntilPathChanges
     def chiefRay(self, y=None):
         r"""This function returns the chief ray for a height y at object.
         The chief ray for height y is the ray that goes
@@ -214,6 +253,7 @@ class ImagingPath(MatrixGroup):
 
         return Ray(y=y, theta=-A * y / B)
 
+    @_memoizedUntilPathChanges
     def principalRay(self):
         """This function returns the principal ray, which is the chief ray 
         for the height y at the edge of the field of view. The chief ray
@@ -244,6 +284,7 @@ class ImagingPath(MatrixGroup):
         
         return self.chiefRay(y=objectEdge)
 
+    @_memoizedUntilPathChanges
     def marginalRays(self, y=0):
         r"""This function calculates the marginal rays for a height y at object.
         The marginal rays for height y are the rays that hit the upper and lower
@@ -325,6 +366,7 @@ class ImagingPath(MatrixGroup):
 
         return MarginalRays(up=Ray(y=y, theta=thetaUp), down=Ray(y=y, theta=thetaDown))
 
+    @_memoizedUntilPathChanges
     def axialRay(self):
         """This function returns the axial ray of the system, also known as
         the marginal ray for a point on axis (y=0) at the object.
@@ -344,6 +386,7 @@ class ImagingPath(MatrixGroup):
         rayUp, rayDown = self.marginalRays()
         return rayUp
 
+    @_memoizedUntilPathChanges
     def fNumber(self):
         """This function returns the f-number of the component or system
         by dividing the diameter of the entrance pupil by the effective
@@ -377,6 +420,7 @@ class ImagingPath(MatrixGroup):
 
         return focalFront/pupilDiameter
 
+    @_memoizedUntilPathChanges
     def NA(self):
         """This function returns the numerical aperture of the component
         or imaging system, which is the sin of the axial ray angle, times 
@@ -406,6 +450,7 @@ class ImagingPath(MatrixGroup):
         axialRay = self.axialRay()
         return self.frontIndex * np.sin(axialRay.theta)
 
+    @_memoizedUntilPathChanges
     def apertureStop(self):
         """The "aperture stop" is an aperture in the system that limits
         the cone of angles originating from zero height at the object plane.
@@ -491,6 +536,7 @@ class ImagingPath(MatrixGroup):
             return True
         return False
     
+    @_memoizedUntilPathChanges
     def entrancePupil(self):
         """The entrance pupil is the image of the aperture stop
         as seen from the object. To obtain this image, we simply
@@ -538,6 +584,7 @@ class ImagingPath(MatrixGroup):
         else:
             return Stop(None, None)
 
+    @_memoizedUntilPathChanges
     def fieldStop(self):
         """ The field stop is the aperture that limits the image size (or field of view)
         It is possible to have finite diameter elements but
@@ -635,6 +682,133 @@ class ImagingPath(MatrixGroup):
 
         return Stop(z=fieldStopPosition, diameter=fieldStopDiameter)
 
+    @_memoizedUntilPathChanges
+    def exactFieldStop(self):
+        """The field stop, like fieldStop(), but calculated directly from the transfer
+        matrices instead of searching for the height at which the chief ray is blocked.
+        The result is exact (it does not depend on `precision`) and is obtained much faster.
+
+        Returns
+        -------
+        fieldStop : (float,float)
+            the output is the (position, diameter) of the field stop.
+            If there is no field stop, the position is None and the diameter is infinite.
+
+        Examples
+        --------
+        >>> from raytracing import *
+        >>> path = ImagingPath() # define an imaging path
+        >>> path.append(Space(d=20))
+        >>> path.append(Lens(f=20,diameter=5,label="f=20"))
+        >>> path.append(Space(d=30))
+        >>> path.append(Lens(f=10,diameter=10,label="f=10"))
+        >>> path.append(Space(d=10))
+        >>> print(path.exactFieldStop())
+        Stop(z=50.0, diameter=10.0)
+
+        See Also
+        --------
+        raytracing.ImagingPath.fieldStop
+        raytracing.ImagingPath.exactHalfFieldOfView
+
+        Notes
+        -----
+        The chief ray from height y is (y, -A*y/B), where A and B are those of the
+        transfer matrix to the aperture stop. Because propagation is linear, its height
+        and angle at the entrance of every element are y times those of the chief ray
+        from y=1, which is propagated once through all the elements. The height at which
+        each element blocks the chief ray follows directly, and the field stop is the
+        element with the smallest one.
+
+        Elements that are not described by their ABCD matrix only (e.g. Axicon)
+        are not linear: for paths that include them, fieldStop() is used.
+        """
+        blockingHeight = self._chiefRayBlockingHeight()
+        if blockingHeight is None:
+            return self.fieldStop()
+
+        (height, z, diameter) = blockingHeight
+        if height > self.maxHeight:
+            return Stop(z=None, diameter=float('+Inf'))
+
+        return Stop(z=z, diameter=diameter)
+
+    @_memoizedUntilPathChanges
+    def exactHalfFieldOfView(self):
+        """The half field of view, like halfFieldOfView(), but calculated directly from
+        the transfer matrices (see exactFieldStop()). The result is exact and is
+        obtained much faster.
+
+        Returns
+        -------
+        halfFieldOfView : float
+            maximum ray height that can still be visible at the image plane.
+            It can be infinity if there is no field stop.
+
+        Examples
+        --------
+        >>> from raytracing import *
+        >>> path = ImagingPath() # define an imaging path
+        >>> path.append(Space(d=20))
+        >>> path.append(Lens(f=20,diameter=5,label="f=20"))
+        >>> path.append(Space(d=30))
+        >>> path.append(Lens(f=10,diameter=10,label="f=10"))
+        >>> path.append(Space(d=10))
+        >>> print('half field of view :', path.exactHalfFieldOfView())
+        half field of view : 3.3333333333333335
+
+        See Also
+        --------
+        raytracing.ImagingPath.halfFieldOfView
+        raytracing.ImagingPath.exactFieldStop
+        """
+        blockingHeight = self._chiefRayBlockingHeight()
+        if blockingHeight is None:
+            return self.halfFieldOfView()
+
+        (height, z, diameter) = blockingHeight
+        if height > self.maxHeight:
+            return float('+Inf')
+
+        return height
+
+    def _chiefRayBlockingHeight(self):
+        """The smallest object height above which the chief ray is blocked, with the position
+        and diameter of the element that blocks it, as (height, z, diameter). It is infinite when
+        there is no field stop, and None when the path is not linear. """
+        noFieldStop = (float('+Inf'), None, float('+Inf'))
+
+        if not self.hasFiniteApertureDiameter():
+            return noFieldStop
+
+        compiledPath = self.compile()
+        if compiledPath.isTracedOneByOne.any():
+            return None
+
+        (apertureStopPosition, dummy) = self.apertureStop()
+        if apertureStopPosition == 0:
+            return noFieldStop
+
+        transferMatrixToApertureStop = self.transferMatrix(upTo=apertureStopPosition)
+        if transferMatrixToApertureStop.isImaging:
+            return noFieldStop
+
+        # The chief ray from y=1, at the entrance of each element
+        y, theta, z = 1.0, -transferMatrixToApertureStop.A / transferMatrixToApertureStop.B, 0.0
+        blockingHeight = noFieldStop
+        for element, diameter, NA in zip(compiledPath.elements, compiledPath.apertureDiameter.tolist(),
+                                         compiledPath.apertureNA.tolist()):
+            if y != 0 and diameter / 2 / abs(y) < blockingHeight[0]:
+                blockingHeight = (diameter / 2 / abs(y), z, diameter)
+            if theta != 0 and NA / abs(theta) < blockingHeight[0]:
+                # A ray beyond the numerical aperture is blocked after the element
+                blockingHeight = (NA / abs(theta), z + element.L, diameter)
+
+            y, theta = element.A * y + element.B * theta, element.C * y + element.D * theta
+            z += element.L
+
+        return blockingHeight
+
     def hasFieldStop(self):
         """ Returns True if this ImagingPath has a field stop.
         
@@ -685,6 +859,7 @@ class ImagingPath(MatrixGroup):
 
         return 2*self.halfFieldOfView() 
 
+    @_memoizedUntilPathChanges
     def halfFieldOfView(self):
         """The half field of view is the maximum height
         visible before its chief ray is blocked by the field stop.
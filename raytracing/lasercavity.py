@@ -2,6 +2,20 @@ from .matrixgroup import *
 from .imagingpath import *
 from .laserpath import *
 import warnings
+import numpy as np
+from typing import NamedTuple
+
+
+class CavityModes(NamedTuple):
+    """ The laser modes of many cavities at once (see LaserCavity.stabilityMap()), one value per cavity:
+    whether it is stable, and the complex radius, beam size, waist and waist position of its mode
+    at the front of the first element (NaN for unstable cavities). """
+    isStable: np.ndarray = None
+    q: np.ndarray = None
+    w: np.ndarray = None
+    waist: np.ndarray = None
+    waistPosition: np.ndarray = None
+
 
 class LaserCavity(LaserPath):
     """A laser cavity (i.e. a resonator).  The beam is considered to go 
@@ -108,6 +122,82 @@ class LaserCavity(LaserPath):
 
         return False
     
+    @staticmethod
+    def stabilityMap(elements, wavelength=632.8e-6):
+        """ The laser modes of many cavities at once, for instance to find which mirror
+        radii and spacings give a stable cavity. The elements of the cavity are given
+        as for LaserCavity() (a round trip, from first to last), but any of them can
+        also be a tuple (A, B, C, D) of arrays, with the ABCD values of that element for
+        every cavity. All arrays are broadcast together: with arrays from np.meshgrid(),
+        the result is a 2D map.
+
+        The round trip matrices are computed with the arrays, and the eigenmodes are
+        obtained as in eigenModes(): a cavity is stable if one of its eigenmodes is
+        finite (see laserModes()).
+
+        Parameters
+        ----------
+        elements : list of Matrix or of (A, B, C, D)
+            The elements of the round trip, from first to last.
+        wavelength : float
+            The wavelength of the laser, to obtain the beam sizes (default=632.8e-6)
+
+        Returns
+        -------
+        modes : CavityModes
+            The arrays isStable, q, w, waist and waistPosition (relative to the front
+            of the first element), with NaN for unstable cavities.
+
+        Examples
+        --------
+        A map of the stability of a cavity with a flat mirror and a curved
+        mirror, for several radii and lengths:
+
+        >>> from raytracing import *
+        >>> import numpy as np
+        >>> R, d = np.meshgrid([-100, -200, -400], [50, 150, 250])
+        >>> space = (1, d, 0, 1)
+        >>> mirror = (1, 0, 2 / R, 1)
+        >>> modes = LaserCavity.stabilityMap([space, mirror, space])
+        >>> print(modes.isStable)
+        [[ True  True  True]
+         [False  True  True]
+         [False False  True]]
+
+        See Also
+        --------
+        raytracing.LaserCavity.eigenModes
+        raytracing.LaserCavity.laserModes
+        """
+        A, B, C, D = 1.0, 0.0, 0.0, 1.0
+        for element in elements:
+            if isinstance(element, Matrix):
+                a, b, c, d = element.A, element.B, element.C, element.D
+            else:
+                a, b, c, d = [np.asarray(value, dtype=float) for value in element]
+
+            A, B, C, D = a * A + b * C, a * B + b * D, c * A + d * C, c * B + d * D
+
+        A, B, C, D = np.broadcast_arrays(*[np.asarray(value, dtype=float) for value in (A, B, C, D)])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            b = D - A
+            sqrtDelta = np.sqrt((b * b - 4.0 * C * (-B)).astype(complex))
+            hasPower = C != 0
+
+            q = np.full(A.shape, complex("nan+nanj"))
+            isStable = np.zeros(A.shape, dtype=bool)
+            for sign in (1, -1):
+                qRoot = (- b + sign * sqrtDelta) / (2.0 * C)
+                isFinite = hasPower & (qRoot != 0) & ((-1 / qRoot).imag > 0) & ~isStable
+                q[isFinite] = qRoot[isFinite]
+                isStable |= isFinite
+
+            w = np.sqrt(wavelength / (np.pi * (-1 / q).imag))
+            waist = np.sqrt(q.imag * wavelength / np.pi)
+
+        return CavityModes(isStable=isStable, q=q, w=w, waist=waist, waistPosition=-q.real)
+
     def display(self, comments=None):  # pragma: no cover
         """ Display the optical cavity and trace the laser beam. 
         If comments are included they will be displayed on a
@@ -1,6 +1,10 @@
 from .ray import *
 from .gaussianbeam import *
 from .rays import *
+from .raybatch import *
+from .beambatch import *
+from .compiledpath import *
+from .compiledpath import _traceColumnsInPlace
 from .interface import *
 from .utils import *
 
@@ -8,7 +12,9 @@ from typing import List
 import multiprocessing
 import sys
 import math
+import numpy as np
 import warnings
+import weakref
 from numpy import isfinite
 
 """ We start with general, useful namedtuples to simplify management of values """
@@ -34,6 +40,51 @@ class Conjugate(NamedTuple):
     d: float = None
     transferMatrix:'Matrix' = None
 
+class Profiles(NamedTuple):
+    """ The number of rays in each bin of height (y), at each position z """
+    z: np.ndarray = None
+    y: np.ndarray = None
+    counts: np.ndarray = None
+
+
+def _heightsAlongRayTraces(rayTraces, z):
+    """ The heights of the rays of every ray trace at every position z, and whether they
+    are blocked, as 2D arrays (z × ray traces). This is Ray.along() for all the ray traces
+    and all the positions at once: the rays of the traces are placed in arrays, and the
+    position of each z in the traces is found with searchsorted. """
+    if len(rayTraces) == 0:
+        return np.empty((len(z), 0)), np.empty((len(z), 0), dtype=bool)
+
+    count = max([len(rayTrace) for rayTrace in rayTraces])
+    values = np.empty((len(rayTraces), count, 4))
+    for i, rayTrace in enumerate(rayTraces):
+        values[i, :len(rayTrace)] = [(ray.z, ray.y, ray.theta, ray.isBlocked) for ray in rayTrace]
+        # Shorter traces end with their last ray, which is what Ray.along() gives after the trace
+        values[i, len(rayTrace):] = values[i, len(rayTrace) - 1]
+    zTraces, yTraces, thetaTraces, isBlockedTraces = np.moveaxis(values, 2, 0)
+
+    # The first ray at or after each z (most often, all traces have rays at the same z)
+    if (zTraces == zTraces[0]).all():
+        after = np.repeat(np.searchsorted(zTraces[0], z)[:, np.newaxis], len(rayTraces), axis=1)
+    else:
+        after = np.array([np.searchsorted(zTrace, z) for zTrace in zTraces]).reshape(len(rayTraces), len(z)).T
+
+    traces = np.arange(len(rayTraces))
+    isAfterTrace = after == count
+    after = np.minimum(after, count - 1)
+    isExact = zTraces[traces, after] == z[:, np.newaxis]
+
+    # Rays at z are used as they are, the others come from the ray before
+    # (or the first ray), unless z is after the trace
+    closest = np.where(isExact | isAfterTrace, after, np.maximum(after - 1, 0))
+    y = yTraces[traces, closest]
+    with np.errstate(invalid='ignore'):
+        isMoved = ~(isExact | isAfterTrace)
+        y[isMoved] += ((z[:, np.newaxis] - zTraces[traces, closest]) * thetaTraces[traces, closest])[isMoved]
+
+    return y, isBlockedTraces[traces, closest].astype(bool)
+
+
 # todo: fix docstrings since draw-related methods were removed
 
 class Matrix(object):
@@ -115,6 +166,11 @@ class Matrix(object):
 
     __epsilon__ = 1e-5  # Anything smaller is zero
 
+    # Products of matrices are built without the checks of the constructor, since their
+    # values come from matrices that were already checked. Set to True to debug a
+    # matrix with inconsistent values.
+    checksProducts = False
+
     def __init__(
             self,
             A: float = 1,
@@ -130,38 +186,80 @@ class Matrix(object):
             apertureNA=float('+Inf'),
             label=''
     ):
-        # Ray matrix formalism
-        self.A = float(A)
-        self.B = float(B)
-        self.C = float(C)
-        self.D = float(D)
-
-        # Length of this element
-        self.L = float(physicalLength)
-        # Aperture
         if apertureDiameter <= 0:
             raise ValueError("The aperture diameter must be strictly positive.")
-        self.apertureDiameter = apertureDiameter
         if apertureNA <= 0:
             raise ValueError("The aperture NA must be strictly positive.")
-        self.apertureNA = apertureNA
-
-        # First and last interfaces. Used for BFL and FFL
-        self.frontVertex = frontVertex
-        self.backVertex = backVertex
-
-        # Index of refraction at entrance and exit.
-        self.frontIndex = frontIndex
-        self.backIndex = backIndex
 
-        self.label = label
-        self.isFlipped = False
+        # Set directly, without __setattr__: a new element is not in any group yet
+        self.__dict__.update(
+            # Ray matrix formalism
+            A=float(A), B=float(B), C=float(C), D=float(D),
+            # Length of this element
+            L=float(physicalLength),
+            # Aperture
+            apertureDiameter=apertureDiameter, apertureNA=apertureNA,
+            # First and last interfaces. Used for BFL and FFL
+            frontVertex=frontVertex, backVertex=backVertex,
+            # Index of refraction at entrance and exit.
+            frontIndex=frontIndex, backIndex=backIndex,
+            label=label, isFlipped=False)
         super(Matrix, self).__init__()
 
         if areAbsolutelyNotEqual(self.determinant, frontIndex / backIndex, self.__epsilon__):
             raise ValueError("The matrix has inconsistent values: \
                 determinant is incorrect considering front and back indices.")
 
+    @classmethod
+    def _fromValues(cls, A, B, C, D, physicalLength, frontVertex, backVertex, frontIndex, backIndex):
+        """ Fast constructor for products of matrices: the values are set directly, without
+        the conversions and the checks of the constructor (see checksProducts). """
+        if cls.checksProducts:
+            return cls(A, B, C, D, physicalLength=physicalLength, frontVertex=frontVertex, backVertex=backVertex,
+                       frontIndex=frontIndex, backIndex=backIndex)
+
+        matrix = object.__new__(cls)
+        matrix.__dict__.update(A=A, B=B, C=C, D=D, L=physicalLength, apertureDiameter=float('+Inf'),
+                               apertureNA=float('+Inf'), frontVertex=frontVertex, backVertex=backVertex,
+                               frontIndex=frontIndex, backIndex=backIndex, label='', isFlipped=False)
+        return matrix
+
+    # What is not a property of the element itself (the groups that contain it, or what is
+    # only kept to avoid computing it again): it is not compared, and changing it does not
+    # change the groups that contain the element.
+    _cachedAttributes = ('_parentGroups',)
+
+    # Set by the groups that contain the element (see _addParentGroup())
+    _parentGroups = None
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if self._parentGroups is not None and name not in self._cachedAttributes:
+            self._notifyParentGroups()
+
+    def _addParentGroup(self, group):
+        """ The group contains this element: it is told when the element changes. """
+        if self._parentGroups is None:
+            self.__dict__['_parentGroups'] = {}
+        self._parentGroups[id(group)] = weakref.ref(group)
+
+    def _notifyParentGroups(self):
+        if self._parentGroups is None:
+            return
+        for reference in list(self._parentGroups.values()):
+            group = reference()
+            if group is not None:
+                group._elementChanged(self)
+
+    def _uncachedAttributes(self):
+        return {name: value for name, value in self.__dict__.items() if name not in self._cachedAttributes}
+
+    def __getstate__(self):
+        # The groups are not pickled with their elements: they register again when needed
+        state = self.__dict__.copy()
+        state.pop('_parentGroups', None)
+        return state
+
     @property
     def isIdentity(self):
         return self.A == 1 and self.D == 1 and self.B == 0 and self.C == 0
@@ -241,6 +339,10 @@ class Matrix(object):
             return self.mul_ray(rightSide)
         elif isinstance(rightSide, GaussianBeam):
             return self.mul_beam(rightSide)
+        elif isinstance(rightSide, RayBatch):
+            return self.mul_rayBatch(rightSide)
+        elif isinstance(rightSide, BeamBatch):
+            return self.mul_beamBatch(rightSide)
         else:
             raise TypeError(
                 "Unrecognized right side element in multiply: '{0}'\
@@ -341,7 +443,7 @@ class Matrix(object):
             fIndex = rightSideMatrix.frontIndex
             bIndex = self.backIndex
 
-        return Matrix(a, b, c, d, frontVertex=fv, backVertex=bv, physicalLength=L, frontIndex=fIndex, backIndex=bIndex)
+        return Matrix._fromValues(a, b, c, d, L, fv, bv, fIndex, bIndex)
 
     def mul_ray(self, rightSideRay):
         r"""This function does the multiplication of a ray by a matrix.
@@ -397,22 +499,104 @@ class Matrix(object):
         as "isBlocked = True" but the propagation can still be calculated.
         """
 
-        outputRay = Ray()
-
         if rightSideRay.isBlocked:
-            outputRay = rightSideRay
-        else:
-            outputRay.y = self.A * rightSideRay.y + self.B * rightSideRay.theta
-            outputRay.theta = self.C * rightSideRay.y + self.D * rightSideRay.theta
-            outputRay.z = self.L + rightSideRay.z
-            outputRay.apertureDiameter = self.apertureDiameter
+            return rightSideRay
 
-            if abs(rightSideRay.y) > self.apertureDiameter/2 or abs(rightSideRay.theta) > self.apertureNA:
-                outputRay.isBlocked = True
-            else:
-                outputRay.isBlocked = rightSideRay.isBlocked
+        y = rightSideRay.y
+        theta = rightSideRay.theta
+        isBlocked = abs(y) > self.apertureDiameter/2 or abs(theta) > self.apertureNA
+
+        return Ray._fromValues(self.A * y + self.B * theta, self.C * y + self.D * theta, self.L + rightSideRay.z,
+                               isBlocked, self.apertureDiameter)
 
-        return outputRay
+    def mul_rayBatch(self, rightSideBatch):
+        r"""This function does the multiplication of a batch of rays by a matrix.
+        It is the vectorized equivalent of `mul_ray()`: every ray of the batch
+        is transformed at once, with the exact same rules (blocked rays are left
+        untouched, and a ray is blocked if it was beyond the aperture diameter or
+        the numerical aperture of the element).
+
+        Parameters
+        ----------
+        rightSideBatch : object from RayBatch class
+            The rays to transform
+
+        Returns
+        -------
+        outputBatch : object from RayBatch class
+            A new batch with the rays after passing through the element.
+
+        Examples
+        --------
+        >>> from raytracing import *
+        >>> M1= Matrix(A=1,B=0,C=-1/10,D=1,physicalLength=5,label='Lens')
+        >>> batch = RayBatch(y=[10, 5], theta=[10, 0])
+        >>> outputBatch = M1.mul_rayBatch(batch)
+        >>> print(outputBatch.theta)
+        [ 9.  -0.5]
+
+        See Also
+        --------
+        raytracing.Matrix.mul_ray
+        raytracing.Matrix.traceBatchThrough
+        raytracing.RayBatch
+        """
+
+        if self._transformsRaysOneByOne:
+            return self._traceBatchOneByOne(rightSideBatch, self.mul_ray)
+
+        return self._mul_rayBatchABCD(rightSideBatch)
+
+    def _mul_rayBatchABCD(self, rightSideBatch):
+        """ The rays of the batch transformed by the ABCD values of the element only, with
+        the blocking rules of mul_ray(). Elements that redefine mul_ray() can start from
+        it to transform batches without going through the rays one at a time. """
+        outputBatch = rightSideBatch.copy()
+        notBlocked = rightSideBatch.isNotBlocked
+        y = rightSideBatch.y[notBlocked]
+        theta = rightSideBatch.theta[notBlocked]
+
+        with np.errstate(invalid='ignore', over='ignore'):
+            outputBatch.y[notBlocked] = self.A * y + self.B * theta
+            outputBatch.theta[notBlocked] = self.C * y + self.D * theta
+            outputBatch.z[notBlocked] = self.L + rightSideBatch.z[notBlocked]
+        outputBatch.apertureDiameter[notBlocked] = self.apertureDiameter
+        outputBatch.isBlocked[notBlocked] = (np.abs(y) > self.apertureDiameter / 2) | (np.abs(theta) > self.apertureNA)
+
+        return outputBatch
+
+    @property
+    def _transformsRaysOneByOne(self):
+        """ Elements that redefine how a single ray is transformed (e.g. Axicon) cannot be
+        described by ABCD values only: batches are then traced one ray at a time with
+        their own methods. """
+        return type(self).mul_ray is not Matrix.mul_ray
+
+    @property
+    def _tracesRaysOneByOne(self):
+        return self._transformsRaysOneByOne or type(self).trace is not Matrix.trace
+
+    def _traceBatchThroughOneElement(self, inputBatch):
+        """ Trace the batch through this element alone, for elements that cannot be described
+        by ABCD values only (see CompiledPath). Without a length and with the usual trace(),
+        tracing is the same as mul_ray(): mul_rayBatch() is used, which elements like Axicon
+        vectorize. Otherwise, the rays are traced one at a time. """
+        if self.L == 0 and type(self).trace is Matrix.trace:
+            return self.mul_rayBatch(inputBatch)
+
+        return self._traceBatchOneByOne(inputBatch, self.traceThrough)
+
+    def _traceBatchOneByOne(self, inputBatch, transform):
+        outputBatch = inputBatch.copy()
+        for i in range(len(inputBatch)):
+            outputRay = transform(inputBatch[i])
+            outputBatch.y[i] = outputRay.y
+            outputBatch.theta[i] = outputRay.theta
+            outputBatch.z[i] = outputRay.z
+            outputBatch.isBlocked[i] = outputRay.isBlocked
+            outputBatch.apertureDiameter[i] = outputRay.apertureDiameter
+
+        return outputBatch
 
     def mul_beam(self, rightSideBeam):
         """This function calculates the multiplication of a coherent beam with complex radius
@@ -466,6 +650,69 @@ class Matrix(object):
 
         return outputBeam
 
+    def mul_beamBatch(self, rightSideBatch):
+        r"""This function does the multiplication of a batch of gaussian beams by a matrix.
+        It is the vectorized equivalent of `mul_beam()`: every beam of the batch is
+        transformed at once, with the exact same rules (the index of refraction of the
+        beams must be the front index of the element, and a beam is clipped if its
+        size after the element is larger than the aperture diameter).
+
+        Parameters
+        ----------
+        rightSideBatch : object from BeamBatch class
+            The beams to transform
+
+        Returns
+        -------
+        outputBatch : object from BeamBatch class
+            A new batch with the beams after passing through the element.
+
+        Examples
+        --------
+        >>> from raytracing import *
+        >>> M1= Matrix(A=1,B=0,C=-1/10,D=1,physicalLength=5,label='Lens')
+        >>> batch = BeamBatch(q=[complex(5, 0.005), complex(0, 1)])
+        >>> outputBatch = M1.mul_beamBatch(batch)
+        >>> print(outputBatch.z)
+        [5. 5.]
+
+        See Also
+        --------
+        raytracing.Matrix.mul_beam
+        raytracing.Matrix.traceBeamBatchThrough
+        raytracing.BeamBatch
+        """
+
+        if self._transformsBeamsOneByOne:
+            return self._traceBeamBatchOneByOne(rightSideBatch, self.mul_beam)
+
+        isNotTracked = rightSideBatch.n != self.frontIndex
+        if isNotTracked.any():
+            msg = "The gaussian beam is not tracking the index of refraction properly {0} {1}".format(
+                rightSideBatch.n[isNotTracked][0], self.frontIndex)
+            raise RuntimeError(msg)
+
+        outputBatch = rightSideBatch.copy()
+        with np.errstate(invalid='ignore', over='ignore', divide='ignore'):
+            q = rightSideBatch.q
+            outputBatch.q = (self.A * q + self.B) / (self.C * q + self.D)
+        outputBatch.z = self.L + rightSideBatch.z
+        outputBatch.n[:] = self.backIndex
+
+        if self.apertureDiameter != float("+Inf"):
+            outputBatch.isClipped |= outputBatch.w > self.apertureDiameter / 2
+
+        return outputBatch
+
+    @property
+    def _transformsBeamsOneByOne(self):
+        """ Elements that redefine how a single beam is transformed (e.g. Axicon, which does
+        not accept gaussian beams) transform batches one beam at a time with their own methods. """
+        return type(self).mul_beam is not Matrix.mul_beam
+
+    def _traceBeamBatchOneByOne(self, inputBatch, transform):
+        return BeamBatch.fromBeams([transform(beam) for beam in inputBatch])
+
     @property
     def largestDiameter(self):
         """ Largest diameter for a group of elements
@@ -654,16 +901,14 @@ class Matrix(object):
         `traceThrough()`
         """
 
-        rayTrace = []
         if isinstance(ray, Ray):
             if self.L > 0:
                 if abs(ray.y) > self.apertureDiameter/2:
                     ray.isBlocked = True
-                rayTrace.append(ray)
-
-        rayTrace.append(self * ray)
+                return [ray, self.mul_ray(ray)]
+            return [self.mul_ray(ray)]
 
-        return rayTrace
+        return [self * ray]
 
     def traceThrough(self, inputRay):
         """Contrary to trace(), this only returns the last ray.
@@ -706,6 +951,139 @@ class Matrix(object):
         rayTrace = self.trace(inputRay)
         return rayTrace[-1]
 
+    def traceBatchThrough(self, inputBatch, polychromatic=False):
+        """The vectorized equivalent of traceThrough(): all the rays of a `RayBatch`
+        are traced at once from the front edge to the back edge of the element,
+        considering all apertures in the system. The results are identical to
+        those obtained with traceThrough() on each ray, but much faster for large
+        numbers of rays.
+
+        Parameters
+        ----------
+        inputBatch : object of RayBatch class
+            The rays to trace
+        polychromatic : bool (Optional)
+            If True, the rays are grouped by wavelength, and each group is traced through
+            the elements at that wavelength (see compileAtWavelength()). Rays without a
+            wavelength are traced through the elements as they are. (default=False)
+
+        Returns
+        -------
+        outputBatch : object of RayBatch class
+            A new batch with the rays after propagating through the system, including
+            the blocked rays (see `RayBatch.isBlocked`).
+
+        Examples
+        --------
+        >>> from raytracing import *
+        >>> M= Matrix(A=1,B=0,C=-1/10,D=1,physicalLength=2,apertureDiameter=4,label='Lens')
+        >>> batch = RayBatch(y=[1, 5], theta=[0, 0])
+        >>> outputBatch = M.traceBatchThrough(batch)
+        >>> print(outputBatch.isBlocked)
+        [False  True]
+
+        See Also
+        --------
+        raytracing.Matrix.traceThrough
+        raytracing.Matrix.traceManyThrough
+        raytracing.RayBatch
+        """
+
+        if not isinstance(inputBatch, RayBatch):
+            raise TypeError("'inputBatch' must be a RayBatch {0}".format(inputBatch))
+
+        if polychromatic:
+            columns = inputBatch.columns()
+            self._traceColumnsByWavelength(columns)
+            return RayBatch(*columns)
+
+        return self.compile().traceBatchThrough(inputBatch)
+
+    def _traceColumnsByWavelength(self, columns):
+        """ Trace the rays of columns (see RayBatch.columns()) in place, each wavelength
+        through the path compiled for that wavelength. """
+        wavelengths = columns[RayBatch._columnNames.index("wavelength")]
+        values, inverse = np.unique(wavelengths, return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        groups = np.split(order, np.cumsum(np.bincount(inverse.ravel(), minlength=len(values)))[:-1])
+
+        for wavelength, rays in zip(values.tolist(), groups):
+            if np.isnan(wavelength):
+                compiledPath = self.compile()
+            else:
+                compiledPath = self.compileAtWavelength(wavelength)
+            columns[:, rays] = compiledPath.traceBatchThrough(RayBatch(*columns[:, rays])).columns()
+
+    def traceBeamBatchThrough(self, inputBatch):
+        """The vectorized equivalent of tracing a `GaussianBeam` through the element: all the
+        gaussian beams of a `BeamBatch` are propagated at once from the front edge to the back
+        edge of the element, tracking the index of refraction and the clipping by apertures.
+        The results are identical to those obtained with `traceThrough()` on each beam.
+
+        Parameters
+        ----------
+        inputBatch : object of BeamBatch class
+            The beams to propagate
+
+        Returns
+        -------
+        outputBatch : object of BeamBatch class
+            A new batch with the beams after propagating through the system.
+
+        Examples
+        --------
+        >>> from raytracing import *
+        >>> path = LaserPath([Space(d=10), Lens(f=10, diameter=0.5), Space(d=10)])
+        >>> batch = BeamBatch(w=[0.1, 1], wavelength=0.001)
+        >>> outputBatch = path.traceBeamBatchThrough(batch)
+        >>> print(outputBatch.isClipped)
+        [False  True]
+
+        See Also
+        --------
+        raytracing.Matrix.mul_beamBatch
+        raytracing.BeamBatch
+        raytracing.GaussianBeam
+        """
+
+        if not isinstance(inputBatch, BeamBatch):
+            raise TypeError("'inputBatch' must be a BeamBatch {0}".format(inputBatch))
+
+        return self.compile().traceBeamBatchThrough(inputBatch)
+
+    def compile(self):
+        """The element as a `CompiledPath`, the flat table of elements used to
+        trace a `RayBatch`. For a single element, the table has a single entry.
+
+        See Also
+        --------
+        raytracing.MatrixGroup.compile
+        raytracing.CompiledPath
+        """
+        return CompiledPath([self])
+
+    def compileAtWavelength(self, wavelength):
+        """The element as a `CompiledPath` for rays of a given wavelength. Elements made
+        of known materials (e.g. AchromatDoubletLens and SingletLens) use the indices of
+        their materials at that wavelength. The other elements are the same at all
+        wavelengths.
+
+        Parameters
+        ----------
+        wavelength : float
+            The wavelength in microns, as for Material.n()
+
+        See Also
+        --------
+        raytracing.Matrix.compile
+        raytracing.Matrix.traceBatchThrough
+        """
+        return CompiledPath(self._elementsAtWavelength(wavelength))
+
+    def _elementsAtWavelength(self, wavelength):
+        """ The individual elements for rays of that wavelength. """
+        return [self]
+
     def traceMany(self, inputRays):
         r"""This function trace each ray from a group of rays from front edge of element to
         the back edge. It can be either a list of Ray(), or a Rays() object:
@@ -762,7 +1140,7 @@ class Matrix(object):
 
         return manyRayTraces
 
-    def traceManyThrough(self, inputRays, progress=True):
+    def traceManyThrough(self, inputRays, progress=True, polychromatic=False):
         """This function trace each ray from a list or a Rays() distribution from
         front edge of element to the back edge.
         Input can be either a list of Ray(), or a Rays() object:
@@ -775,7 +1153,9 @@ class Matrix(object):
             A group of rays
         progress : bool
             if True, the progress of the raceTrough is shown (default=Trye)
-
+        polychromatic : bool
+            If True, each ray is traced through the elements at its wavelength, and
+            the progress is not shown (see traceBatchThrough()). (default=False)
 
         Returns
         -------
@@ -794,10 +1174,10 @@ class Matrix(object):
         >>> inputRays = RandomUniformRays(yMax=5, yMin=0, maxCount=nRays)
         >>> Tr=M.traceManyThrough(inputRays)
         >>> print('heights of the output rays:', Tr.yValues)
-        heights of the output rays: [4.323870378874155, 2.794064779525441, 0.7087442942835853]
+        heights of the output rays: [4.32387038 2.79406478 0.70874429]
 
         >>> print('angles of the output rays:', Tr.thetaValues)
-        angles of the output rays: [-1.499826089814585, 0.7506850963379516, -0.44348989046728904]
+        angles of the output rays: [-1.49982609  0.7506851  -0.44348989]
 
         See Also
         --------
@@ -808,6 +1188,9 @@ class Matrix(object):
         -----
         We assume that if the user will be happy to receive
         Rays() as an output even if they passed a list of rays as inputs.
+
+        The rays are traced all at once with traceBatchThrough(), which gives the
+        same rays as calling traceThrough() on each ray, only faster.
         """
 
         try:
@@ -815,20 +1198,118 @@ class Matrix(object):
         except TypeError:
             raise TypeError("'inputRays' argument is not iterable.")
 
+        if isinstance(inputRays, RayBatch):
+            return self.traceBatchThrough(inputRays, polychromatic=polychromatic).toRays()
+
         if not isinstance(inputRays, Rays):
             inputRays = Rays(inputRays)
 
-        outputRays = Rays()
+        # The rays are stored as arrays in Rays: they are traced without creating any Ray
+        columns = inputRays.toRayBatch().columns()
+        if polychromatic:
+            self._traceColumnsByWavelength(columns)
+        else:
+            _traceColumnsInPlace(self.compile(), columns, progress)
+        return RayBatch(*columns).toRays()
 
-        for ray in inputRays:
-            lastRay = self.traceThrough(ray)
-            if lastRay.isNotBlocked:
-                outputRays.append(lastRay)
+    def transmission(self, inputRays):
+        """Find which rays make it through the element (or the path), and their final
+        height and angle. This is faster than traceManyThrough() when only the
+        transmitted rays matter (for instance, for efficiency calculations): blocked
+        rays are dropped as soon as they are blocked, and no ray trace is kept.
 
-            if progress:
-                inputRays.displayProgress()
+        Parameters
+        ----------
+        inputRays : RayBatch or iterable of Ray
+            The input rays
 
-        return outputRays
+        Returns
+        -------
+        transmission : Transmission
+            A boolean array `isTransmitted`, True for the rays that are not blocked,
+            and arrays with the final `y` and `theta` of each ray (NaN if blocked),
+            all in the same order as the input rays.
+
+        Examples
+        --------
+        >>> from raytracing import *
+        >>> path = MatrixGroup([Space(d=10), Lens(f=10, diameter=10), Space(d=10)])
+        >>> transmission = path.transmission([Ray(y=0, theta=0.1), Ray(y=0, theta=0.6)])
+        >>> print(transmission.isTransmitted)
+        [ True False]
+        >>> print(transmission.y)
+        [ 1. nan]
+
+        See Also
+        --------
+        raytracing.Matrix.survivalMask
+        raytracing.Matrix.traceManyThrough
+        """
+        if not isinstance(inputRays, RayBatch):
+            try:
+                iter(inputRays)
+            except TypeError:
+                raise TypeError("'inputRays' argument is not iterable.")
+            inputRays = RayBatch.fromRays(inputRays)
+
+        return self.compile().transmission(inputRays)
+
+    def survivalMask(self, inputRays):
+        """A boolean array, True for each input ray that makes it through the element
+        (or the path) without being blocked. See `transmission()`.
+
+        Examples
+        --------
+        >>> from raytracing import *
+        >>> path = MatrixGroup([Space(d=10), Lens(f=10, diameter=10), Space(d=10)])
+        >>> print(path.survivalMask(RayBatch(y=[0, 0, 6], theta=[0.1, 0.6, 0])))
+        [ True False False]
+        """
+        return self.transmission(inputRays).isTransmitted
+
+    def traceStream(self, source, chunkSize=100000):
+        """Trace the rays from the source in chunks, and provide the output rays
+        chunk by chunk. Contrary to traceManyThrough(), the rays are never all kept in
+        memory: the results can be reduced on the fly (counted, histogrammed, etc...)
+        for any number of rays.
+
+        Parameters
+        ----------
+        source : RayBatch, RandomRays, or iterable of Ray or of RayBatch
+            The input rays. Rays from a RandomRays source are generated as needed,
+            and are not kept (see `RandomRays.raysBetween()`).
+        chunkSize : int
+            The maximum number of rays traced at once (default=100000)
+
+        Returns
+        -------
+        outputBatches : generator of RayBatch
+            The rays after the last element, one RayBatch per chunk. All rays are
+            included: use `RayBatch.isNotBlocked` to keep the rays that made it through.
+
+        Examples
+        --------
+        >>> from raytracing import *
+        >>> path = MatrixGroup([Space(d=10), Lens(f=10, diameter=10), Space(d=10)])
+        >>> inputRays = RandomUniformRays(yMax=10, thetaMax=0.1, maxCount=1000000)
+        >>> transmitted = 0
+        >>> for outputBatch in path.traceStream(inputRays, chunkSize=100000):
+        ...     transmitted += outputBatch.isNotBlocked.sum()
+        >>> print(transmitted > 0)
+        True
+
+        See Also
+        --------
+        raytracing.Matrix.traceManyThrough
+        raytracing.RayBatch.chunksOf
+        """
+        try:
+            iter(source)
+        except TypeError:
+            raise TypeError("'source' argument is not iterable.")
+
+        compiledPath = self.compile()
+        return (compiledPath.traceBatchThrough(inputBatch) for inputBatch in RayBatch.chunksOf(source, chunkSize))
 
     def traceManyThroughInParallel(self, inputRays, progress=True, processes=None):
         """ This is an advanced technique to gain from parallel computation:
@@ -836,9 +1317,8 @@ class Matrix(object):
         several other parallel processes using the `multiprocessing` module,
         which is os-independent.
 
-        Everything hinges on a simple pool.map() command that will apply 
-        the provided function to every element of the array, but across several
-        processors. It is trivial to implement and the benefits are simple:
+        Everything hinges on a simple pool.starmap() command that will trace
+        a range of rays in each process, across several processors. It is trivial to implement and the benefits are simple:
         if you create 8 processes on 8 CPU cores, you gain a factor of 
         approximately 8 in speed. We are not talking GPU acceleration, but
         still: 1 minute is shorter than 8 minutes.
@@ -849,6 +1329,8 @@ class Matrix(object):
             A group of rays
         progress : bool
             If True, the progress in percentage of the traceTrough is shown (default=True)
+        processes : int
+            The number of processes (default=the number of CPU cores)
 
         Returns
         -------
@@ -859,30 +1341,25 @@ class Matrix(object):
         --------
         raytracing.Matrix.traceManyThrough
         raytracing.Matrix.traceMany
+        raytracing.CompiledPath.traceBatchThroughInParallel
 
         Notes
         -----
-        One important technical issue: Pool accesses the array in multiple processes
-        and cannot be dynamically generated (because it is not thread-safe).
-        We explicitly generate the list before the computation, then we split
-        the array in #processes different lists.
+        The rays are not pickled to be sent to each process: their coordinates are
+        placed in shared memory, and each process only receives the compiled path
+        (see `compile()`) and the range of rays it must trace. The order of the rays
+        is kept. If anything fails, the rays are traced with traceManyThrough().
         """
 
         try:
-            if processes is None:
-                processes = multiprocessing.cpu_count()
-
-            theExplicitList = list(inputRays)
-            manyInputRays = [(theExplicitList[i::processes], progress) for i in range(processes)]
-
-            with multiprocessing.Pool(processes=processes) as pool:
-                outputRays = pool.starmap(self.traceManyThrough, manyInputRays)
-
-            outputRaysList = []
-            for rays in outputRays:
-                outputRaysList += rays.rays
+            if isinstance(inputRays, RayBatch):
+                inputBatch = inputRays
+            else:
+                inputBatch = RayBatch.fromRays(inputRays)
 
-            return Rays(rays=outputRaysList)
+            outputBatch = self.compile().traceBatchThroughInParallel(inputBatch, processes=processes,
+                                                                     progress=progress)
+            return outputBatch.toRays()
         except Exception as err:
             warnings.warn("Multiprocessing failed with: '{0}'. Falling back to slower code.".format(err), ExpertNote)
             return self.traceManyThrough(inputRays=inputRays, progress=progress)
@@ -896,6 +1373,63 @@ class Matrix(object):
 
         return outputRays
 
+    def profilesFromRayTraces(self, rayTraces, z, binCount=40, minValue=None, maxValue=None):
+        """ The intensity profiles (histograms of the heights of the rays that are not blocked)
+        at many positions z along the ray traces, all computed at once. Each profile is the
+        histogram of profileFromRayTraces(rayTraces, z) for that z (see Rays.rayCountHistogram()).
+
+        Parameters
+        ----------
+        rayTraces : list of ray traces
+            The ray traces, for instance obtained with traceMany()
+        z : array_like
+            The positions of the profiles
+        binCount : int
+            The number of bins of each histogram (default=40)
+        minValue : float
+            The smallest height of the histograms. If None, the smallest height of all the
+            rays that are not blocked is used. (default=None)
+        maxValue : float
+            The largest height of the histograms. If None, the largest height of all the
+            rays that are not blocked is used. (default=None)
+
+        Returns
+        -------
+        profiles : Profiles
+            The positions z, the heights at the center of the bins and the number of rays in
+            each bin, as a 2D array (one row for each z).
+
+        Examples
+        --------
+        >>> from raytracing import *
+        >>> path = ImagingPath([Space(d=10), Lens(f=10), Space(d=10)])
+        >>> rayTraces = path.traceMany([Ray(y=y) for y in [-1, 0, 1]])
+        >>> profiles = path.profilesFromRayTraces(rayTraces, z=[0, 20], binCount=3)
+        >>> print(profiles.counts)
+        [[1 1 1]
+         [0 3 0]]
+
+        See Also
+        --------
+        raytracing.Matrix.profileFromRayTraces
+        raytracing.Ray.along
+        """
+        z = np.array(z, dtype=float, ndmin=1)
+        y, isBlocked = _heightsAlongRayTraces(rayTraces, z)
+
+        isNotBlocked = ~isBlocked
+        yNotBlocked = y[isNotBlocked]
+        if minValue is None:
+            minValue = yNotBlocked.min() if len(yNotBlocked) > 0 else 0
+        if maxValue is None:
+            maxValue = yNotBlocked.max() if len(yNotBlocked) > 0 else 1
+
+        planes = np.broadcast_to(np.arange(len(z))[:, np.newaxis], y.shape)[isNotBlocked]
+        counts, _, binEdges = np.histogram2d(planes, yNotBlocked, bins=[len(z), binCount],
+                                             range=[[-0.5, len(z) - 0.5], [minValue, maxValue]])
+
+        return Profiles(z=z, y=(binEdges[:-1] + binEdges[1:]) / 2, counts=counts.astype(int))
+
     @property
     def isImaging(self):
         """If B=0, then the matrix represents that transfer from a conjugate
@@ -1438,7 +1972,7 @@ class Matrix(object):
 
     def __eq__(self, other):
         if isinstance(other, Matrix):
-            return self.__dict__ == other.__dict__
+            return self._uncachedAttributes() == other._uncachedAttributes()
         return False
 
 
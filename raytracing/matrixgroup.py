@@ -1,6 +1,63 @@
 from .matrix import *
 
 import collections.abc as collections
+from collections import OrderedDict
+import functools
+import itertools
+import operator
+import weakref
+from bisect import bisect_left, bisect_right, insort
+from typing import NamedTuple
+
+# Versions of all groups come from the same counter: a new version is always
+# larger than any version given before, in any group.
+_versions = itertools.count(1)
+
+
+class TraceCacheInfo(NamedTuple):
+    """ Statistics of the cache of MatrixGroup.trace() """
+    hits: int = 0
+    misses: int = 0
+    maxSize: int = 0
+    size: int = 0
+
+
+class _ElementList(list):
+    """ The list of elements of a MatrixGroup: the group is told when the list is modified
+    directly (e.g. group.elements.append(element)) instead of with the methods of the group. """
+
+    def __init__(self, elements, group):
+        super(_ElementList, self).__init__(elements)
+        self._group = weakref.ref(group)
+
+    def _changed(self):
+        group = self._group()
+        if group is not None:
+            group._changed()
+
+    def __reduce_ex__(self, protocol):
+        # Pickled (and copied) as a simple list, the group wraps it again
+        return list, (list(self),)
+
+
+def _changingList(method):
+    @functools.wraps(method)
+    def changingMethod(self, *args, **kwargs):
+        value = method(self, *args, **kwargs)
+        self._changed()
+        return value
+
+    return changingMethod
+
+
+for _name in ('__setitem__', '__delitem__', '__iadd__', '__imul__', 'append', 'extend', 'insert', 'pop',
+              'remove', 'clear', 'sort', 'reverse'):
+    setattr(_ElementList, _name, _changingList(getattr(list, _name)))
+
+
+def _copiedRayTrace(rayTrace):
+    return [Ray._fromValues(ray.y, ray.theta, ray.z, ray.isBlocked, ray.apertureDiameter, ray.wavelength)
+            for ray in rayTrace]
 
 
 class MatrixGroup(Matrix):
@@ -16,11 +73,36 @@ class MatrixGroup(Matrix):
         the label for the imaging path (Optional)
     """
 
+    # The maximum number of ray traces kept by trace()
+    traceCacheSize = 128
+
     def __init__(self, elements=None, label=""):
         self.iteration = 0
         super(MatrixGroup, self).__init__(1, 0, 0, 1, label=label)
 
         self.elements = []
+        self._compiledPath = None
+        self._compiledVersion = None
+        self._compiledPathsAtWavelengths = {}
+
+        # The products of the first k elements (k = 0...N), their lengths, and the elements they
+        # were computed with: only what follows a change needs to be multiplied again.
+        # The nested groups are kept with their index and their version at that time.
+        self._prefixTransferMatrices = [Matrix(A=1, B=0, C=0, D=1)]
+        self._prefixLengths = [0]
+        self._prefixElements = []
+        self._prefixGroups = []
+        self._version = next(_versions)
+        # Set when the group or one of its elements changes (the elements tell the groups that
+        # contain them), so that an unchanged group is known to be unchanged at once.
+        self._hasChanged = False
+
+        # Solely for performance reason: it is common to raytrace
+        # groups of rays that are similar (to mimick intensities)
+        # We keep the last ray traces, for the current version of the group
+        self._traceCache = OrderedDict()
+        self._traceCacheHits = 0
+        self._traceCacheMisses = 0
 
         if elements is not None:
             if not isinstance(elements, collections.Iterable):
@@ -29,12 +111,6 @@ class MatrixGroup(Matrix):
             for element in elements:
                 self.append(element)
 
-        # Solely for performance reason: it is common to raytrace
-        # groups of rays that are similar (to mimick intensities)
-        # We keep the last ray and the last ray trace for optimization
-        self._lastRayToBeTraced = None
-        self._lastRayTrace = None
-
     def append(self, matrix):
         r"""This function adds an element at the end of the path.
 
@@ -63,33 +139,156 @@ class MatrixGroup(Matrix):
          f=10.000
 
          """
-        lastElement = None
         if not isinstance(matrix, Matrix):
             raise TypeError("'matrix' must be a Matrix instance.")
 
         if len(self.elements) != 0:
-            lastElement = self.elements[-1]
-            if lastElement.backIndex != matrix.frontIndex:
-                if isinstance(matrix, Space):  
-                    # For Space(), we fix it
-                    matrix.frontIndex = lastElement.backIndex
-                    matrix.backIndex = matrix.frontIndex
-                else:
-                    msg = "Mismatch of indices between last element and appended element"
-                    raise ValueError(msg)
+            self._matchIndices(self.elements[-1], matrix)
 
+        wasChanged = self._hasChanged
         self.elements.append(matrix)
-        transferMatrix = self.transferMatrix()
-        self.A = transferMatrix.A
-        self.B = transferMatrix.B
-        self.C = transferMatrix.C
-        self.D = transferMatrix.D
-        self.L = transferMatrix.L
-        self.frontVertex = transferMatrix.frontVertex
-        self.backVertex = transferMatrix.backVertex
-        self.frontIndex = transferMatrix.frontIndex
-        self.backIndex = transferMatrix.backIndex
 
+        if not wasChanged and len(self._prefixElements) == len(self.elements) - 1:
+            # The usual case: only the new element is multiplied with the previous product
+            self._appendPrefix(matrix)
+            self._newVersion()
+            self._setTransferMatrix(self._prefixTransferMatrices[-1])
+            self._hasChanged = False
+        else:
+            self._updatedPrefixTransferMatrices()
+
+    @staticmethod
+    def _matchIndices(previousElement, element):
+        if previousElement.backIndex != element.frontIndex:
+            if isinstance(element, Space):
+                # For Space(), we fix it
+                element.frontIndex = previousElement.backIndex
+                element.backIndex = element.frontIndex
+            else:
+                msg = "Mismatch of indices between last element and appended element"
+                raise ValueError(msg)
+
+    def _elementsChangedFrom(self, index):
+        """ The elements from index on were changed (inserted, removed or replaced): their
+        indices are matched again and the transfer matrix of the group is updated. """
+        for i in range(max(index, 1), len(self.elements)):
+            self._matchIndices(self.elements[i - 1], self.elements[i])
+
+        self._updatedPrefixTransferMatrices()
+
+    def _updatedPrefixTransferMatrices(self):
+        """ The transfer matrices of the first k elements, for k = 0 to N. Only the products
+        after the first element that is not the one they were computed with (or a nested
+        group that changed since) are computed again, and the group gets a new version. """
+        self._hasChanged = False
+        first = self._firstChangedElement()
+        if first == len(self.elements) == len(self._prefixElements):
+            return self._prefixTransferMatrices
+
+        self._forgetPrefixesFrom(first)
+        for element in self.elements[first:]:
+            self._appendPrefix(element)
+
+        self._newVersion()
+        self._setTransferMatrix(self._prefixTransferMatrices[-1])
+        return self._prefixTransferMatrices
+
+    def _firstChangedElement(self):
+        if len(self.elements) == len(self._prefixElements) and all(map(operator.is_, self.elements,
+                                                                           self._prefixElements)):
+            first = len(self.elements)
+        else:
+            first = 0
+            for element, prefixElement in zip(self.elements, self._prefixElements):
+                if element is not prefixElement:
+                    break
+                first += 1
+
+        for index, group, version in self._prefixGroups:
+            if index >= first:
+                break
+            if group._currentVersion() != version:
+                return index
+
+        return first
+
+    def _forgetPrefixesFrom(self, first):
+        del self._prefixTransferMatrices[first + 1:]
+        del self._prefixLengths[first + 1:]
+        del self._prefixElements[first:]
+        self._prefixGroups = [prefixGroup for prefixGroup in self._prefixGroups if prefixGroup[0] < first]
+
+    def _appendPrefix(self, element):
+        element._addParentGroup(self)
+        if isinstance(element, MatrixGroup):
+            self._prefixGroups.append((len(self._prefixElements), element, element._currentVersion()))
+
+        self._prefixTransferMatrices.append(element * self._prefixTransferMatrices[-1])
+        self._prefixLengths.append(self._prefixLengths[-1] + element.L)
+        self._prefixElements.append(element)
+
+    def _newVersion(self):
+        self._version = next(_versions)
+        # The ray traces of the previous versions cannot be used anymore
+        self._traceCache.clear()
+        self._compiledPathsAtWavelengths.clear()
+
+    # What is only kept to avoid computing it again, or to go through the elements
+    _cachedAttributes = Matrix._cachedAttributes + ('_compiledPath', '_compiledVersion', '_compiledPathsAtWavelengths',
+                                                    '_prefixTransferMatrices', '_prefixLengths', '_prefixElements',
+                                                    '_prefixGroups', '_version', '_hasChanged', '_traceCache',
+                                                    '_traceCacheHits', '_traceCacheMisses', 'iteration')
+
+    def __setattr__(self, name, value):
+        if name == 'elements' and value is not None:
+            value = _ElementList(value, self)
+            self.__dict__['_hasChanged'] = True
+        # As in Matrix.__setattr__(), called for every attribute
+        object.__setattr__(self, name, value)
+        if self._parentGroups is not None and name not in self._cachedAttributes:
+            self._notifyParentGroups()
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Versions only come from the counter of this process: the products
+        # are computed again, and the group gets a version from this process.
+        self._prefixTransferMatrices = self._prefixTransferMatrices[:1]
+        self._prefixLengths = [0]
+        self._prefixElements = []
+        self._prefixGroups = []
+        self._compiledPath = None
+        self._compiledPathsAtWavelengths = {}
+        self.elements = self.elements
+
+    def _changed(self):
+        """ The list of elements changed: the group and the groups that contain it are updated
+        the next time they are used. """
+        self._hasChanged = True
+        self._notifyParentGroups()
+
+    def _elementChanged(self, element):
+        """ An element (or a group) of this group changed: the products are computed again
+        from that element on. """
+        for index, prefixElement in enumerate(self._prefixElements):
+            if prefixElement is element:
+                self._forgetPrefixesFrom(index)
+                self._changed()
+                return
+
+    def _currentVersion(self):
+        """ A number that changes every time the group, or an element it contains, is changed:
+        with append(), insert(), pop(), etc..., when its list of elements is modified
+        directly, or when a property of an element is modified (e.g. apertureDiameter). """
+        if self._hasChanged:
+            self._updatedPrefixTransferMatrices()
+        return self._version
+
+    def _setTransferMatrix(self, transferMatrix):
+        # Set directly: the groups that contain this group were told when it changed
+        self.__dict__.update(A=transferMatrix.A, B=transferMatrix.B, C=transferMatrix.C, D=transferMatrix.D,
+                             L=transferMatrix.L, frontVertex=transferMatrix.frontVertex,
+                             backVertex=transferMatrix.backVertex, frontIndex=transferMatrix.frontIndex,
+                             backIndex=transferMatrix.backIndex)
 
     def __len__(self):
         """
@@ -170,10 +369,9 @@ class MatrixGroup(Matrix):
         Has finite diameter? False
         """
         poppedElement = self.elements.pop(index)  # We pop the matrix in the list
-        tempElements = self.elements[:]  # We "copy" the list
-        self.elements.clear()  # We clear the attribute
-        for element in tempElements:
-            self.append(element)  # We rebuild the attribute (check indices, compute ABCD, etc)
+        if index < 0:
+            index += len(self.elements) + 1
+        self._elementsChangedFrom(index)  # Check indices, compute ABCD, etc, after the popped element
         return poppedElement
 
     def insert(self, index: int, element: Matrix):
@@ -218,10 +416,9 @@ class MatrixGroup(Matrix):
         else:
             element = MatrixGroup(element)
         self.elements = self.elements[:index] + element.elements + self.elements[index:]
-        tempElements = self.elements[:]
-        self.elements.clear()
-        for matrix in tempElements:
-            self.append(matrix)
+        if index < 0:
+            index = max(index + len(self.elements) - len(element.elements), 0)
+        self._elementsChangedFrom(min(index, len(self.elements)))
 
     def __setitem__(self, key, element: Matrix):
         """ This function is used to substitute a single matrix 
@@ -311,17 +508,20 @@ class MatrixGroup(Matrix):
         ray formalism.  To find out if a ray has been blocked, you must
         use trace().
         """
-        transferMatrix = Matrix(A=1, B=0, C=0, D=1)
-        distance = upTo
-        for element in self.elements:
-            if element.L <= distance:
-                transferMatrix = element * transferMatrix
-                distance -= element.L
-            else:
-                transferMatrix = element.transferMatrix(upTo=distance) * transferMatrix
-                break
+        self._currentVersion()
+        prefixTransferMatrices = self._prefixTransferMatrices
 
-        return transferMatrix
+        # The number of elements entirely before upTo is found in the lengths of the
+        # first k elements, and their product was already computed.
+        count = max(bisect_right(self._prefixLengths, upTo) - 1, 0)
+        product = prefixTransferMatrices[count]
+        if count < len(self.elements):
+            element = self.elements[count]
+            return element.transferMatrix(upTo=upTo - self._prefixLengths[count]) * product
+
+        # A copy: the product is kept for later changes to the group
+        return Matrix._fromValues(product.A, product.B, product.C, product.D, product.L,
+                                  product.frontVertex, product.backVertex, product.frontIndex, product.backIndex)
 
     def transferMatrices(self):
         r""" The list of Matrix() that corresponds to the propagation through
@@ -385,20 +585,39 @@ class MatrixGroup(Matrix):
         [[90.0, -2.0]]
 
         """
-        transferMatrix = Matrix(A=1, B=0, C=0, D=1)
-        matrices = self.transferMatrices()
+        # The product of the transfer matrices is kept in A, B, C, D and L, and the conjugate
+        # of each product is obtained directly from them: the conjugate plane is at -B/D after
+        # the product, with a magnification of A - B/D*C.
+        A, B, C, D, L = 1.0, 0.0, 0.0, 1.0, 0.0
         planes = []
-        for element in matrices:
-            transferMatrix = element * transferMatrix
-            (distance, conjugate) = transferMatrix.forwardConjugate()
-            if distance is not None:
-                planePosition = transferMatrix.L + distance
-                if planePosition != 0 and conjugate is not None:
-                    magnification = conjugate.A
-                    if any([areAbsolutelyAlmostEqual(pos, planePosition) and areAbsolutelyAlmostEqual(mag, magnification) for pos, mag in planes]):
-                        continue
-                    else:
-                        planes.append([planePosition, magnification])
+        # The positions of the planes that were found, in order, to only compare a new plane
+        # with the planes near it.
+        sortedPlanes = []
+        # Planes closer than epsilon (in position and in magnification) are the same plane
+        epsilon = 1e-3
+        for element in self.transferMatrices():
+            A, B, C, D = (element.A * A + element.B * C, element.A * B + element.B * D,
+                          element.C * A + element.D * C, element.C * B + element.D * D)
+            L += element.L
+            if D == 0:
+                continue
+
+            distance = -B / D
+            planePosition = L + distance
+            if planePosition == 0:
+                continue
+            magnification = A + distance * C
+
+            first = bisect_left(sortedPlanes, (planePosition - 2 * epsilon,))
+            last = bisect_right(sortedPlanes, (planePosition + 2 * epsilon,))
+            if any([areAbsolutelyAlmostEqual(pos, planePosition, epsilon)
+                    and areAbsolutelyAlmostEqual(mag, magnification, epsilon)
+                    for pos, mag in sortedPlanes[first:last]]):
+                continue
+
+            planes.append([planePosition, magnification])
+            if isfinite(planePosition):
+                insort(sortedPlanes, (planePosition, magnification))
         return planes
 
     def trace(self, inputRay):
@@ -429,20 +648,171 @@ class MatrixGroup(Matrix):
         """
         if not isinstance(inputRay, (Ray, GaussianBeam)):
             raise TypeError("'inputRay' must be a Ray or a GaussianBeam {0}".format(inputRay))
+        key = None
+        if isinstance(inputRay, Ray):
+            # _currentVersion() only goes through the elements if one of them changed
+            wavelength = inputRay.wavelength
+            key = (self._currentVersion(), float(inputRay.y), float(inputRay.theta), float(inputRay.z),
+                   bool(inputRay.isBlocked), float(inputRay.apertureDiameter),
+                   None if wavelength is None else float(wavelength))
+            rayTrace = self._traceCache.get(key)
+            if rayTrace is not None:
+                self._traceCache.move_to_end(key)
+                self._traceCacheHits += 1
+                return _copiedRayTrace(rayTrace)
+            self._traceCacheMisses += 1
+
         ray = inputRay
-        if ray != self._lastRayToBeTraced:
-            rayTrace = [ray]
-            for element in self.elements:
-                rayTraceInElement = element.trace(ray)
-                rayTrace.extend(rayTraceInElement)
-                ray = rayTraceInElement[-1]  # last
-            self._lastRayToBeTraced = inputRay
-            self._lastRayTrace = rayTrace
-        else:
-            rayTrace = self._lastRayTrace
+        rayTrace = [ray]
+        for element in self.elements:
+            rayTraceInElement = element.trace(ray)
+            rayTrace.extend(rayTraceInElement)
+            ray = rayTraceInElement[-1]  # last
+
+        if key is not None:
+            # Copies: the rays returned (and the input ray) can be modified by the caller
+            self._traceCache[key] = _copiedRayTrace(rayTrace)
+            if len(self._traceCache) > self.traceCacheSize:
+                self._traceCache.popitem(last=False)
 
         return rayTrace
 
+    def traceCacheInfo(self):
+        """The statistics of the cache of trace(): the number of ray traces that were
+        found in the cache (hits) or that had to be computed (misses), the maximum number
+        of ray traces kept (maxSize, see `traceCacheSize`) and the number currently kept (size).
+
+        trace() keeps the last ray traces it computed, for the rays traced most recently.
+        Rays are found in the cache only when all their properties are the same (including
+        z and isBlocked), and only if the group (or any of its elements) was not changed
+        since. The cache keeps copies of the rays, and a new copy is returned every time.
+
+        Returns
+        -------
+        info : TraceCacheInfo
+            hits, misses, maxSize and size
+
+        Examples
+        --------
+        >>> from raytracing import *
+        >>> path = MatrixGroup([Space(d=10), Lens(f=10), Space(d=10)])
+        >>> trace = path.trace(Ray(y=1, theta=0))
+        >>> trace = path.trace(Ray(y=1, theta=0))
+        >>> print(path.traceCacheInfo())
+        TraceCacheInfo(hits=1, misses=1, maxSize=128, size=1)
+        """
+        return TraceCacheInfo(self._traceCacheHits, self._traceCacheMisses, self.traceCacheSize,
+                              len(self._traceCache))
+
+    def traceBatchThrough(self, inputBatch, polychromatic=False):
+        """Trace all the rays of the batch from the first element until after the
+        last element, indicating which rays were blocked. This is the vectorized
+        equivalent of traceThrough() and gives the same rays.
+
+        Parameters
+        ---------
+        inputBatch : object of RayBatch class
+            The rays to trace
+        polychromatic : bool (Optional)
+            If True, the rays of each wavelength are traced through the path compiled
+            for that wavelength (see compileAtWavelength()). (default=False)
+
+        Returns
+        -------
+        outputBatch : object of RayBatch class
+            A new batch with the rays after the last element.
+
+        See Also
+        --------
+        raytracing.Matrix.traceBatchThrough
+        raytracing.RayBatch
+
+        """
+        if not isinstance(inputBatch, RayBatch):
+            raise TypeError("'inputBatch' must be a RayBatch {0}".format(inputBatch))
+
+        if polychromatic:
+            columns = inputBatch.columns()
+            self._traceColumnsByWavelength(columns)
+            return RayBatch(*columns)
+
+        return self.compile().traceBatchThrough(inputBatch)
+
+    def compile(self):
+        """Flatten the group, and any group it contains, into a `CompiledPath`: a single
+        table with the ABCD values, lengths and apertures of all the individual elements.
+        This is what is used to trace a `RayBatch`.
+
+        The table is kept and is only rebuilt when the group, or any element it contains,
+        has changed (see _currentVersion()).
+
+        Returns
+        -------
+        compiledPath : object of CompiledPath class
+            The table of elements
+
+        Examples
+        --------
+        >>> from raytracing import *
+        >>> path = MatrixGroup([Space(d=10), System4f(f1=10, f2=20), Space(d=10)])
+        >>> print(len(path.compile()))
+        8
+
+        See Also
+        --------
+        raytracing.CompiledPath
+        raytracing.MatrixGroup.traceBatchThrough
+        """
+        version = self._currentVersion()
+        if self._compiledPath is None or self._compiledVersion != version:
+            elements = []
+            for element in self.elements:
+                if isinstance(element, MatrixGroup):
+                    elements.extend(element.compile().elements)
+                else:
+                    elements.append(element)
+
+            self._compiledPath = CompiledPath(elements)
+            self._compiledVersion = version
+
+        return self._compiledPath
+
+    def compileAtWavelength(self, wavelength):
+        """Flatten the group into a `CompiledPath` for rays of a given wavelength: the
+        elements made of known materials (e.g. AchromatDoubletLens and SingletLens) use
+        the indices of their materials at that wavelength.
+
+        The tables are kept for each wavelength until the group changes.
+
+        Parameters
+        ----------
+        wavelength : float
+            The wavelength in microns, as for Material.n()
+
+        Returns
+        -------
+        compiledPath : object of CompiledPath class
+            The table of elements at that wavelength
+
+        See Also
+        --------
+        raytracing.MatrixGroup.compile
+        raytracing.MatrixGroup.traceBatchThrough
+        """
+        self._currentVersion()  # Forgets the tables if the group changed
+        compiledPath = self._compiledPathsAtWavelengths.get(wavelength)
+        if compiledPath is None:
+            compiledPath = CompiledPath(self._elementsAtWavelength(wavelength))
+            self._compiledPathsAtWavelengths[wavelength] = compiledPath
+
+        return compiledPath
+
+    def _elementsAtWavelength(self, wavelength):
+        elements = []
+        for element in self.elements:
+            elements.extend(element._elementsAtWavelength(wavelength))
+        return elements
+
     def hasFiniteApertureDiameter(self):
         """ True if ImagingPath has at least one element of finite diameter """
         for element in self.elements:
@@ -472,13 +842,13 @@ class MatrixGroup(Matrix):
         Each element is also flipped individually. """
         self.isFlipped = not self.isFlipped
 
-        allElements = self.elements
-        allElements.reverse()
-        self.elements = []
-
-        for element in allElements:
+        self.elements.reverse()
+        for element in self.elements:
             element.flipOrientation()
-            self.append(element)
+
+        # The elements are the same, but all of them changed
+        self._prefixElements = []
+        self._elementsChangedFrom(0)
 
         return self
 
@@ -1,6 +1,8 @@
 import warnings
 from .utils import deprecated
 
+_inf = float("+Inf")
+
 
 class Ray:
     """A vector and a light ray as transformed by ABCD matrices.
@@ -36,16 +38,39 @@ class Ray:
 
     """
 
+    # Millions of rays can be created when tracing: without a __dict__, each ray
+    # takes less than half the memory and attributes are faster to access.
+    __slots__ = ('y', 'theta', 'z', 'isBlocked', 'apertureDiameter', 'wavelength')
+
     def __init__(self, y: float = 0, theta: float = 0, z: float = 0, isBlocked:bool = False, wavelength: float = None):
         self.y = y
         self.theta = theta
 
         self.z = z
         self.isBlocked = isBlocked
-        self.apertureDiameter = float("+Inf")
+        self.apertureDiameter = _inf
 
         self.wavelength = wavelength
 
+    @classmethod
+    def _fromValues(cls, y, theta, z, isBlocked, apertureDiameter, wavelength=None):
+        """ Fast constructor for tracing: all values are set directly, without defaults. """
+        ray = object.__new__(cls)
+        ray.y = y
+        ray.theta = theta
+        ray.z = z
+        ray.isBlocked = isBlocked
+        ray.apertureDiameter = apertureDiameter
+        ray.wavelength = wavelength
+        return ray
+
+    def __setstate__(self, state):
+        # Rays pickled before __slots__ was used have their attributes in a dictionary
+        if isinstance(state, tuple):
+            state = state[1]
+        for name, value in state.items():
+            setattr(self, name, value)
+
     @property
     def isNotBlocked(self) -> bool:
         """Opposite of isBlocked. Convenience function for readability.
@@ -200,10 +225,7 @@ class Ray:
         raytracing.Ray.along()
 
         """
-        outputRay = Ray(y=self.y + (z-self.z) * self.theta, theta=self.theta, z=z)
-        if self.isBlocked:
-            outputRay.isBlocked = True
-        return outputRay
+        return Ray._fromValues(self.y + (z-self.z) * self.theta, self.theta, z, bool(self.isBlocked), _inf)
 
     @staticmethod
     def along(rayTrace, z):
@@ -260,9 +282,5 @@ class Ray:
 
         if not isinstance(other, Ray):
             return False
-        elif self.y != other.y:
-            return False
-        elif self.theta != other.theta:
-            return False
 
-        return True
+        return self.y == other.y and self.theta == other.theta
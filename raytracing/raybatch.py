@@ -0,0 +1,189 @@
+from .ray import *
+from .rays import *
+import numpy as np
+
+
+class RayBatch:
+    """A group of rays stored as NumPy arrays, for vectorized tracing.
+
+    A `Ray` is convenient to follow a single ray, but tracing millions of them
+    one at a time is slow. A RayBatch keeps the same properties as `Ray`
+    (y, theta, z, isBlocked, apertureDiameter and wavelength), but each
+    property is an array with one value per ray. Every element of a path is
+    then applied to the whole batch at once with `Matrix.traceBatchThrough()`.
+
+    Parameters
+    ----------
+    y : array_like
+        Heights of the rays.
+    theta : array_like
+        Angles of the rays. Must have the same length as y.
+    z : array_like or float (Optional)
+        Positions of the rays along the optical axis. (default = 0)
+    isBlocked : array_like or bool (Optional)
+        Whether or not each ray was blocked by an aperture. (default = False)
+    apertureDiameter : array_like or float (Optional)
+        The diameter of the last aperture each ray went through. (default = +Inf)
+    wavelength : array_like or float (Optional)
+        The wavelength of each ray, NaN when undefined. (default = NaN)
+
+    Examples
+    --------
+    >>> from raytracing import *
+    >>> batch = RayBatch.fromRays([Ray(y=1, theta=0.1), Ray(y=2, theta=-0.1)])
+    >>> outputBatch = Space(d=10).traceBatchThrough(batch)
+    >>> print(outputBatch.y)
+    [2. 1.]
+
+    See Also
+    --------
+    raytracing.Ray
+    raytracing.Rays
+    raytracing.Matrix.traceBatchThrough
+
+    """
+
+    def __init__(self, y, theta, z=0.0, isBlocked=False, apertureDiameter=float("+Inf"), wavelength=float("nan")):
+        self.y = np.array(y, dtype=float, ndmin=1)
+        self.theta = np.array(theta, dtype=float, ndmin=1)
+        if self.y.shape != self.theta.shape or self.y.ndim != 1:
+            raise ValueError("'y' and 'theta' must be one-dimensional and of the same length.")
+
+        count = len(self.y)
+        self.z = self._column(z, count, float)
+        self.isBlocked = self._column(isBlocked, count, bool)
+        self.apertureDiameter = self._column(apertureDiameter, count, float)
+        self.wavelength = self._column(wavelength, count, float)
+
+    _columnNames = ("y", "theta", "z", "isBlocked", "apertureDiameter", "wavelength")
+
+    def columns(self):
+        """All the properties of the rays as a single 2D array of floats, one row per
+        property in the order of the constructor. `RayBatch(*batch.columns())` is a copy
+        of the batch."""
+        return np.array([getattr(self, name) for name in self._columnNames], dtype=float)
+
+    @staticmethod
+    def _column(values, count, dtype):
+        column = np.empty(count, dtype=dtype)
+        column[:] = values
+        return column
+
+    @classmethod
+    def fromRays(cls, rays):
+        """Create a batch from any iterable of `Ray` (a list, a tuple or a `Rays`).
+
+        A wavelength of None is stored as NaN.
+        """
+        if isinstance(rays, Rays):
+            return rays.toRayBatch()
+
+        y = []
+        theta = []
+        z = []
+        isBlocked = []
+        apertureDiameter = []
+        wavelength = []
+        for ray in rays:
+            if not isinstance(ray, Ray):
+                raise TypeError("'rays' elements must be of type Ray.")
+            y.append(ray.y)
+            theta.append(ray.theta)
+            z.append(ray.z)
+            isBlocked.append(ray.isBlocked)
+            apertureDiameter.append(ray.apertureDiameter)
+            wavelength.append(ray.wavelength if ray.wavelength is not None else float("nan"))
+
+        return cls(y, theta, z, isBlocked, apertureDiameter, wavelength)
+
+    @classmethod
+    def chunksOf(cls, source, chunkSize):
+        """A generator of batches of at most chunkSize rays, taken from the source.
+
+        The source can be a RayBatch, any iterable of Ray (a list, a `Rays`, a generator...)
+        or an iterable of RayBatch. With a `RandomRays` source, the rays that were already
+        generated come first, and the missing rays up to maxCount are generated on the fly
+        with `RandomRays.raysBetween()`, without being kept in the source.
+        """
+        if chunkSize <= 0:
+            raise ValueError("The chunk size must be strictly positive.")
+
+        if isinstance(source, RayBatch):
+            for start in range(0, len(source), chunkSize):
+                yield source[start:start + chunkSize]
+            return
+
+        if isinstance(source, Rays):
+            generatedRays = source._storedRayBatch()
+            yield from cls.chunksOf(generatedRays, chunkSize)
+            if not isinstance(source, RandomRays):
+                return
+
+            if type(source).randomBatch is not RandomRays.randomBatch:
+                for start in range(len(generatedRays), source.maxCount, chunkSize):
+                    yield source.raysBetween(start, min(start + chunkSize, source.maxCount))
+                return
+
+            # Subclasses that only implement randomRay() keep the rays they generate
+            source = (source[i] for i in range(len(generatedRays), source.maxCount))
+
+        rays = []
+        for item in source:
+            if isinstance(item, RayBatch):
+                if rays:
+                    yield cls.fromRays(rays)
+                    rays = []
+                yield from cls.chunksOf(item, chunkSize)
+                continue
+
+            rays.append(item)
+            if len(rays) == chunkSize:
+                yield cls.fromRays(rays)
+                rays = []
+
+        if rays:
+            yield cls.fromRays(rays)
+
+    def __len__(self) -> int:
+        return len(self.y)
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            wavelength = float(self.wavelength[item])
+            return Ray._fromValues(float(self.y[item]), float(self.theta[item]), float(self.z[item]),
+                                   bool(self.isBlocked[item]), float(self.apertureDiameter[item]),
+                                   None if np.isnan(wavelength) else wavelength)
+
+        return RayBatch(self.y[item], self.theta[item], self.z[item], self.isBlocked[item],
+                        self.apertureDiameter[item], self.wavelength[item])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def isNotBlocked(self):
+        """Opposite of isBlocked, for every ray of the batch."""
+        return ~self.isBlocked
+
+    @property
+    def count(self):
+        return len(self)
+
+    def copy(self):
+        return RayBatch(self.y, self.theta, self.z, self.isBlocked, self.apertureDiameter, self.wavelength)
+
+    def notBlocked(self):
+        """A new batch with only the rays that were not blocked."""
+        return self[self.isNotBlocked]
+
+    def toRays(self, includeBlocked=False):
+        """
+        Convert the batch to a `Rays` object, by default with only the rays that
+        were not blocked (as `Matrix.traceManyThrough()` does).
+        """
+        batch = self if includeBlocked else self.notBlocked()
+        return Rays._fromColumns(batch.columns())
+
+    def __str__(self):
+        return "RayBatch of {0} rays ({1} blocked)".format(len(self), int(np.count_nonzero(self.isBlocked)))
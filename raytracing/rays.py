@@ -5,9 +5,103 @@ import pickle
 import time
 import os
 import collections.abc as collections
+import functools
 import warnings
 
 
+class _StoredRay(Ray):
+    """ A Ray whose values are in the arrays of a Rays object: reading or changing
+    its properties reads or changes the values stored in Rays. This is what
+    Rays returns when rays are accessed individually. """
+
+    __slots__ = ('_source', '_index')
+
+    def __init__(self, rays, index):
+        object.__setattr__(self, '_source', rays)
+        object.__setattr__(self, '_index', index)
+
+    def _value(row):
+        def getValue(self):
+            return float(self._source._columns[row, self._index])
+
+        def setValue(self, value):
+            self._source._columns[row, self._index] = value
+            self._source._invalidateCachedValues()
+
+        return property(getValue, setValue)
+
+    y = _value(0)
+    theta = _value(1)
+    z = _value(2)
+    apertureDiameter = _value(4)
+
+    @property
+    def isBlocked(self):
+        return bool(self._source._columns[3, self._index])
+
+    @isBlocked.setter
+    def isBlocked(self, value):
+        self._source._columns[3, self._index] = value
+        self._source._invalidateCachedValues()
+
+    @property
+    def wavelength(self):
+        wavelength = float(self._source._columns[5, self._index])
+        return None if np.isnan(wavelength) else wavelength
+
+    @wavelength.setter
+    def wavelength(self, value):
+        self._source._columns[5, self._index] = np.nan if value is None else value
+        self._source._invalidateCachedValues()
+
+    del _value
+
+    def __reduce__(self):
+        # A copy or a pickle is an independent Ray
+        return Ray._fromValues, (self.y, self.theta, self.z, self.isBlocked, self.apertureDiameter, self.wavelength)
+
+
+class _RayList(list):
+    """ The rays of a Rays object as a list (see Rays._rays): modifying the list modifies
+    the stored rays, as when the rays were kept in a list. """
+
+    def __init__(self, rays):
+        super(_RayList, self).__init__(rays._rayAt(i) for i in range(rays._count))
+        self._source = rays
+
+    def append(self, ray):
+        self._source.append(ray)
+        super(_RayList, self).append(self._source._rayAt(self._source._count - 1))
+
+    def pop(self, index=-1):
+        ray = super(_RayList, self).pop(index)
+        # A copy, since the stored rays move
+        ray = Ray._fromValues(ray.y, ray.theta, ray.z, ray.isBlocked, ray.apertureDiameter, ray.wavelength)
+        self._storeRays()
+        return ray
+
+    def _storeRays(self):
+        """ The rays of the list replace the stored rays, and the list has the new stored rays. """
+        source = self._source
+        source._rays = list(self)
+        super(_RayList, self).__setitem__(slice(None), [source._rayAt(i) for i in range(source._count)])
+
+
+def _storingRays(method):
+    @functools.wraps(method)
+    def storingMethod(self, *args, **kwargs):
+        value = method(self, *args, **kwargs)
+        self._storeRays()
+        return value
+
+    return storingMethod
+
+
+for _name in ('__setitem__', '__delitem__', '__iadd__', '__imul__', 'extend', 'insert', 'remove', 'clear', 'sort',
+              'reverse'):
+    setattr(_RayList, _name, _storingRays(getattr(list, _name)))
+
+
 class Rays:
 
     """A source or a detector of rays
@@ -20,6 +114,12 @@ class Rays:
     instance) and will create each ray on demand, then store them as they go
     in the rays list.
 
+    The rays are not stored as `Ray` objects: their properties are stored in
+    NumPy arrays (one value per ray) that grow as rays are appended. The heights
+    and angles are therefore available as arrays without any copy (`yValues`
+    and `thetaValues`), and `Ray` objects are only created when rays are
+    accessed individually (e.g. `rays[3]` or `for ray in rays:`).
+
     It is an iterable object, which means it can be used in an expression
     like `for ray in rays:` which is convenient both when propagating rays
     or when analysing the resulting rays that reached a plane in ImagingPath,
@@ -38,9 +138,9 @@ class Rays:
     progressLog : int
         How many iterations after which the progress through the iterator is shown (default=1000)
         This is mutliplied by 3 after progress report.
-    -yValues : array
+    yValues : array
         An array of shape N*1 (N is the number of rays) which shows the height of each ray
-    -thetaValues : array
+    thetaValues : array
         An array of shape N*1 (N is the number of rays) which shows the angle of each ray
     -yHistogram : array
         An array that shows the values in the histogram of the rays according to the height of rays
@@ -59,13 +159,18 @@ class Rays:
 
     """
 
+    # The properties of the rays, in this order, are the rows of _columns
+    _columnNames = ("y", "theta", "z", "isBlocked", "apertureDiameter", "wavelength")
+
     def __init__(self, rays=None):
-        if rays is None:
-            self._rays = []
-        else:
+        self._columns = np.empty((len(self._columnNames), 0))
+        self._count = 0
+
+        if rays is not None:
             if isinstance(rays, collections.Iterable):
+                rays = list(rays)
                 if all([isinstance(ray, Ray) for ray in rays]):
-                    self._rays = list(rays)
+                    self._rays = rays
                 else:
                     raise TypeError("'rays' elements must be of type Ray.")
             else:
@@ -78,8 +183,6 @@ class Rays:
         self.label = None
 
         # We cache these because they can be lengthy to calculate
-        self._yValues = None
-        self._thetaValues = None
         self._yHistogram = None
         self._thetaHistogram = None
         self._directionBinEdges = None
@@ -90,16 +193,33 @@ class Rays:
         self._anglesHistogramParameters = None
         self._xValuesAnglesHistogram = None
 
+    @classmethod
+    def _fromColumns(cls, columns):
+        """ Rays from a 2D array of their properties, one row per property (see RayBatch.columns()) """
+        rays = Rays()
+        rays._appendColumns(columns)
+        return rays
+
     def __len__(self) -> int:
-        if self._rays is None:
-            return 0
-        return len(self._rays)
+        return self._count
 
     @property
     def rays(self):
-        # Even if "read only" property, we can change the content of the list.
-        # We return a copy with [:]
-        return self._rays[:]
+        """ A list of Ray, one for each stored ray. Changing a ray of this list changes
+        the stored ray. """
+        return [self._rayAt(i) for i in range(self._count)]
+
+    @property
+    def _rays(self):
+        # Kept for compatibility with subclasses written when rays were stored in a list:
+        # the rays appended to (or removed from) this list are appended to (or removed from) Rays
+        return _RayList(self)
+
+    @_rays.setter
+    def _rays(self, rays):
+        self._count = 0
+        self._appendColumns(self._columnsOf(rays))
+        self._invalidateCachedValues()
 
     @property
     def count(self):
@@ -111,22 +231,66 @@ class Rays:
     @property
     def yValues(self):
         """
-        Returns the heights of rays in the list.
+        Returns the heights of rays in the list, as a read-only array (not a copy).
         """
-        if self._yValues is None:
-            self._yValues = list(map(lambda x: x.y, self))
-
-        return self._yValues
+        return self._readOnlyView(0)
 
     @property
     def thetaValues(self):
         """
-        Returns the angles of rays in the list.
+        Returns the angles of rays in the list, as a read-only array (not a copy).
         """
-        if self._thetaValues is None:
-            self._thetaValues = list(map(lambda x: x.theta, self))
+        return self._readOnlyView(1)
+
+    def _readOnlyView(self, row):
+        values = self._columns[row, :self._count]
+        values.flags.writeable = False
+        return values
+
+    def toRayBatch(self):
+        """ A RayBatch (a copy) with all the rays, to be traced with
+        `Matrix.traceBatchThrough()` or `Matrix.traceStream()`. """
+        return self._storedRayBatch()
+
+    def _storedRayBatch(self):
+        from .raybatch import RayBatch
+        return RayBatch(*self._columns[:, :self._count])
+
+    def _rayAt(self, index):
+        return _StoredRay(self, index)
+
+    @staticmethod
+    def _columnsOf(rays):
+        columns = np.empty((len(Rays._columnNames), len(rays)))
+        for i, ray in enumerate(rays):
+            columns[:, i] = (ray.y, ray.theta, ray.z, ray.isBlocked, ray.apertureDiameter,
+                             np.nan if ray.wavelength is None else ray.wavelength)
+        return columns
+
+    def _appendColumns(self, columns):
+        count = columns.shape[1]
+        self._reserve(self._count + count)
+        self._columns[:, self._count:self._count + count] = columns
+        self._count += count
+
+    def _reserve(self, count):
+        # The capacity is doubled when needed: appending is amortized O(1)
+        capacity = self._columns.shape[1]
+        if count > capacity:
+            columns = np.empty((len(self._columnNames), max(count, 2 * capacity, 16)))
+            columns[:, :self._count] = self._columns[:, :self._count]
+            self._columns = columns
+
+    def _invalidateCachedValues(self):
+        self._yHistogram = None
+        self._thetaHistogram = None
+        self._directionBinEdges = None
+
+        self._countHistogramParameters = None
+        self._xValuesCountHistogram = None
 
-        return self._thetaValues
+        self._anglesHistogramParameters = None
+        self._xValuesAnglesHistogram = None
 
     def rayCountHistogram(self, binCount=None, minValue=None, maxValue=None):
 
@@ -185,10 +349,10 @@ class Rays:
             binCount = 40
 
         if minValue is None:
-            minValue = min(self.yValues)
+            minValue = self.yValues.min()
 
         if maxValue is None:
-            maxValue = max(self.yValues)
+            maxValue = self.yValues.max()
 
         if self._countHistogramParameters != (binCount, minValue, maxValue):
             self._countHistogramParameters = (binCount, minValue, maxValue)
@@ -265,10 +429,10 @@ class Rays:
             binCount = 40
 
         if minValue is None:
-            minValue = min(self.thetaValues)
+            minValue = self.thetaValues.min()
 
         if maxValue is None:
-            maxValue = max(self.thetaValues)
+            maxValue = self.thetaValues.max()
 
         if self._anglesHistogramParameters != (binCount, minValue, maxValue):
             self._anglesHistogramParameters = (binCount, minValue, maxValue)
@@ -362,18 +526,23 @@ class Rays:
         return self
 
     def __next__(self) -> Ray:
-        if self._rays is None:
-            raise StopIteration
-
-        if self.iteration < len(self._rays):
-            ray = self._rays[self.iteration]
+        if self.iteration < self._count:
+            ray = self._rayAt(self.iteration)
             self.iteration += 1
             return ray
 
         raise StopIteration
 
     def __getitem__(self, item):
-        return self._rays[item]
+        if isinstance(item, slice):
+            return Rays._fromColumns(self._columns[:, :self._count][:, item])
+
+        if item < 0:
+            item += self._count
+        if item < 0 or item >= self._count:
+            raise IndexError("Index {0} out of range.".format(item))
+
+        return self._rayAt(item)
 
     def append(self, ray):
         """A ray can be appended to the List of the rays using this function.
@@ -386,21 +555,15 @@ class Rays:
          """
         if not isinstance(ray, Ray):
             raise TypeError("'ray' must be a 'Ray' object.")
-        if self._rays is not None:
-            self._rays.append(ray)
 
-        # Invalidate cached values
-        self._yValues = None
-        self._thetaValues = None
-        self._yHistogram = None
-        self._thetaHistogram = None
-        self._directionBinEdges = None
-
-        self._countHistogramParameters = None
-        self._xValuesCountHistogram = None
+        self._reserve(self._count + 1)
+        self._columns[:, self._count] = (ray.y, ray.theta, ray.z, ray.isBlocked, ray.apertureDiameter,
+                                         np.nan if ray.wavelength is None else ray.wavelength)
+        self._count += 1
 
-        self._anglesHistogramParameters = None
-        self._xValuesAnglesHistogram = None
+        # Invalidate cached values
+        if self._countHistogramParameters is not None or self._anglesHistogramParameters is not None:
+            self._invalidateCachedValues()
 
     def load(self, filePath, append=False):
 
@@ -421,10 +584,10 @@ class Rays:
                 raise IOError(f"{filePath} does not contain an iterable of Ray objects.")
             if not all([isinstance(ray, Ray) for ray in loadedRays]):
                 raise IOError(f"{filePath} must contain only Ray objects.")
-            if append and self._rays is not None:
-                self._rays.extend(loadedRays)
-            else:
-                self._rays = loadedRays
+            if not append:
+                self._count = 0
+            self._appendColumns(self._columnsOf(list(loadedRays)))
+            self._invalidateCachedValues()
 
     def save(self, filePath):
 
@@ -438,7 +601,7 @@ class Rays:
         """
 
         with open(filePath, 'wb') as outfile:
-            pickle.Pickler(outfile).dump(self._rays)
+            pickle.Pickler(outfile).dump(self.rays)
 
         # We save the data to disk using a module called Pickler
         # Some asynchronous magic is happening here with Pickle
@@ -462,9 +625,8 @@ class Rays:
                 # Not possible, yet: sometimes we get here
                 time.sleep(0.1)
 
-    # For 2D histogram:
+    # For 2D histograms of the rays along a path, see DensityMap (Xiaolin Wu's line algorithm):
     # https://en.wikipedia.org/wiki/Xiaolin_Wu's_line_algorithm
-    # and https://stackoverflow.com/questions/3122049/drawing-an-anti-aliased-line-with-thepython-imaging-library
 
 
 class UniformRays(Rays):
@@ -612,7 +774,18 @@ class RandomRays(Rays):
         If no value is assigned to this parameter it will be -thetaMax
     maxCount : int
         Number of rays in the list
-
+    seed : int, numpy.random.SeedSequence or numpy.random.Generator (Optional)
+        The seed of the random rays (default=None). If None, the rays are drawn from
+        the global state of `np.random`. Otherwise, the rays are drawn in blocks of 10000
+        rays, each from its own independent stream derived from the seed
+        (see `numpy.random.SeedSequence.spawn`): the rays are then always the same,
+        whatever the order in which they are generated or the size of the batches
+        they are traced in.
+
+    Notes
+    -----
+    With a Generator, the seed of the rays is drawn from the Generator: two sources
+    created with the same Generator have different rays, and the Generator is advanced.
 
     See Also
     --------
@@ -620,8 +793,11 @@ class RandomRays(Rays):
     raytracing.RandomUniformRays
 
     """
-    def __init__(self, yMax=1.0, yMin=None, thetaMax=np.pi / 2, thetaMin=None, maxCount=100000):
+    def __init__(self, yMax=1.0, yMin=None, thetaMax=np.pi / 2, thetaMin=None, maxCount=100000, seed=None):
         self.maxCount = maxCount
+        self.seed = seed
+        self._seedSequence = self._seedSequenceOf(seed)
+        self._lastBlock = None
         self.yMax = yMax
         self.yMin = yMin
         if self.yMin is None:
@@ -635,6 +811,9 @@ class RandomRays(Rays):
     def __len__(self) -> int:
         return self.maxCount
 
+    # Number of rays generated at once when iterating
+    _generationBlockSize = 10000
+
     def __getitem__(self, item):
         if item < 0:
             # Convert negative index to positive (i.e. -1 == len - 1)
@@ -643,24 +822,130 @@ class RandomRays(Rays):
         if item < 0 or item >= self.maxCount:
             raise IndexError(f"Index {item} out of bound, min = 0, max {self.maxCount}.")
 
-        start = time.monotonic()
-        while len(self._rays) <= item:
-            self.randomRay()
-            if time.monotonic() - start > 3:
-                warnings.warn(f"Generating missing rays. This can take a few seconds.", UserWarning)
+        if self._count <= item:
+            self._generateRays(item + 1 - self._count)
 
-        return self._rays[item]
+        return self._rayAt(item)
 
     def __next__(self) -> Ray:
         if self.iteration >= self.maxCount:
             raise StopIteration
-        # This should be able to know if enough rays. If not enough, generate them
-        ray = self[self.iteration]
+
+        if self.iteration >= self._count:
+            # The missing rays are generated ahead, a block at a time
+            self._generateRays(min(self._generationBlockSize, self.maxCount - self._count))
+
+        ray = self._rayAt(self.iteration)
         self.iteration += 1
         return ray
 
+    @property
+    def yValues(self):
+        """
+        Returns the heights of all the maxCount rays, generating the missing rays first.
+        """
+        self._generateRays(self.maxCount - self._count)
+        return super(RandomRays, self).yValues
+
+    @property
+    def thetaValues(self):
+        """
+        Returns the angles of all the maxCount rays, generating the missing rays first.
+        """
+        self._generateRays(self.maxCount - self._count)
+        return super(RandomRays, self).thetaValues
+
+    def toRayBatch(self):
+        """ A RayBatch (a copy) with all the maxCount rays. The missing rays are generated first. """
+        self._generateRays(self.maxCount - self._count)
+        return self._storedRayBatch()
+
+    def _generateRays(self, count):
+        if count <= 0:
+            return
+
+        if type(self).randomBatch is not RandomRays.randomBatch:
+            self._appendColumns(self.raysBetween(self._count, self._count + count).columns())
+            return
+
+        # Subclasses that only implement randomRay() generate (and append) one ray at a time
+        start = time.monotonic()
+        for _ in range(count):
+            self.randomRay()
+            if time.monotonic() - start > 3:
+                warnings.warn(f"Generating missing rays. This can take a few seconds.", UserWarning)
+
     def randomRay(self) -> Ray:
-        raise NotImplementedError("You must implement randomRay() in your subclass")
+        """Generate a new random ray and append it to the list of rays. Subclasses
+        must implement randomBatch(), or this method."""
+        if type(self).randomBatch is RandomRays.randomBatch:
+            raise NotImplementedError("You must implement randomRay() or randomBatch() in your subclass")
+
+        if self._count == self.maxCount:
+            raise AttributeError("Cannot generate more random rays, maximum count achieved")
+
+        self._appendColumns(self.raysBetween(self._count, self._count + 1).columns())
+        return self._rayAt(self._count - 1)
+
+    def raysBetween(self, start, stop):
+        """The rays from start to stop (excluded) of the distribution, as a RayBatch, without
+        keeping them in the list of rays. This is used to stream rays in bounded memory
+        (see `Matrix.traceStream()`).
+
+        With a seed, these are always the same rays, and the same rays as `rays[start:stop]`.
+        Without a seed, these are simply stop-start new random rays.
+        """
+        if self._seedSequence is None:
+            return self.randomBatch(stop - start)
+
+        from .raybatch import RayBatch
+
+        blockSize = self._generationBlockSize
+        columns = []
+        for block in range(start // blockSize, (stop - 1) // blockSize + 1):
+            blockColumns = self._blockColumns(block)
+            first = max(start - block * blockSize, 0)
+            last = min(stop - block * blockSize, blockSize)
+            columns.append(blockColumns[:, first:last])
+
+        return RayBatch(*np.concatenate(columns, axis=1))
+
+    def _blockColumns(self, block):
+        # The last block is kept: rays are usually generated in order, a few at a time
+        if self._lastBlock is None or self._lastBlock[0] != block:
+            seedSequence = np.random.SeedSequence(self._seedSequence.entropy,
+                                                  spawn_key=self._seedSequence.spawn_key + (block,))
+            batch = self.randomBatch(self._generationBlockSize, generator=np.random.default_rng(seedSequence))
+            self._lastBlock = (block, batch.columns())
+
+        return self._lastBlock[1]
+
+    @staticmethod
+    def _seedSequenceOf(seed):
+        if seed is None:
+            return None
+        if isinstance(seed, np.random.Generator):
+            return np.random.SeedSequence(int(seed.integers(2 ** 63)))
+        if isinstance(seed, np.random.SeedSequence):
+            return seed
+        if isinstance(seed, (int, np.integer)):
+            return np.random.SeedSequence(seed)
+
+        raise TypeError("'seed' must be an integer, a SeedSequence or a Generator.")
+
+    def randomBatch(self, count, generator=None):
+        """Generate count new random rays at once, as a RayBatch. Contrary to randomRay(),
+        the rays are not kept in the list of rays and maxCount does not apply.
+
+        Parameters
+        ----------
+        count : int
+            The number of rays
+        generator : numpy.random.Generator (Optional)
+            The random numbers are drawn from this generator, or from the global
+            state of `np.random` if None. (default=None)
+        """
+        raise NotImplementedError("You must implement randomBatch() in your subclass")
 
 
 class RandomUniformRays(RandomRays):
@@ -680,6 +965,8 @@ class RandomUniformRays(RandomRays):
             If no value is assigned to this parameter it will be -thetaMax
         maxCount : int
             Number of rays in the list
+        seed : int, numpy.random.SeedSequence or numpy.random.Generator
+            The seed of the random rays (default=None). See `RandomRays`.
 
         Examples
         --------
@@ -704,19 +991,18 @@ class RandomUniformRays(RandomRays):
 
         """
 
-    def __init__(self, yMax=1.0, yMin=None, thetaMax=np.pi / 2, thetaMin=None, maxCount=100000):
+    def __init__(self, yMax=1.0, yMin=None, thetaMax=np.pi / 2, thetaMin=None, maxCount=100000, seed=None):
         super(RandomUniformRays, self).__init__(yMax=yMax, yMin=yMin, thetaMax=thetaMax, thetaMin=thetaMin,
-                                                maxCount=maxCount)
+                                                maxCount=maxCount, seed=seed)
 
-    def randomRay(self) -> Ray:
-        if len(self._rays) == self.maxCount:
-            raise AttributeError("Cannot generate more random rays, maximum count achieved")
+    def randomBatch(self, count, generator=None):
+        from .raybatch import RayBatch
 
-        theta = self.thetaMin + np.random.random() * (self.thetaMax - self.thetaMin)
-        y = self.yMin + np.random.random() * (self.yMax - self.yMin)
-        ray = Ray(y=y, theta=theta)
-        self.append(ray)
-        return ray
+        random = np.random if generator is None else generator
+
+        theta = self.thetaMin + random.random(count) * (self.thetaMax - self.thetaMin)
+        y = self.yMin + random.random(count) * (self.yMax - self.yMin)
+        return RayBatch(y=y, theta=theta)
 
 
 class RandomLambertianRays(RandomRays):
@@ -731,6 +1017,8 @@ class RandomLambertianRays(RandomRays):
         If no value is assigned to this parameter it will be -yMax.
     maxCount : int
         Number of rays in the list
+    seed : int, numpy.random.SeedSequence or numpy.random.Generator
+        The seed of the random rays (default=None). See `RandomRays`.
 
     Examples
     --------
@@ -755,26 +1043,21 @@ class RandomLambertianRays(RandomRays):
 
     """
 
-    def __init__(self, yMax=1.0, yMin=None, maxCount=10000):
+    def __init__(self, yMax=1.0, yMin=None, maxCount=10000, seed=None):
         super(RandomLambertianRays, self).__init__(yMax=yMax, yMin=yMin, thetaMax=np.pi / 2, thetaMin=-np.pi / 2,
-                                                   maxCount=maxCount)
+                                                   maxCount=maxCount, seed=seed)
 
-    def randomRay(self) -> Ray:
-        if len(self._rays) == self.maxCount:
-            raise AttributeError("Cannot generate more random rays, maximum count achieved")
+    def randomBatch(self, count, generator=None):
+        from .raybatch import RayBatch
 
-        theta = 0
-        while (True):
-            theta = self.thetaMin + np.random.random() * (self.thetaMax - self.thetaMin)
-            intensity = np.cos(theta)
-            randomValue = np.random.random()
-            if randomValue < intensity:
-                break
-
-        y = self.yMin + np.random.random() * (self.yMax - self.yMin)
-        ray = Ray(y, theta)
-        self.append(ray)
-        return ray
+        random = np.random if generator is None else generator
+
+        # The intensity is proportional to cos(theta): the cumulative distribution is
+        # sin(theta), which is inverted to transform uniform values into angles.
+        sinMin, sinMax = np.sin(self.thetaMin), np.sin(self.thetaMax)
+        theta = np.arcsin(sinMin + random.random(count) * (sinMax - sinMin))
+        y = self.yMin + random.random(count) * (self.yMax - self.yMin)
+        return RayBatch(y=y, theta=theta)
 
 
 class GaussianProfileUniformRays(RandomRays):
@@ -786,6 +1069,8 @@ class GaussianProfileUniformRays(RandomRays):
         1/e gaussien width in intensity
     maxCount : int
         Number of rays in the list
+    seed : int, numpy.random.SeedSequence or numpy.random.Generator
+        The seed of the random rays (default=None). See `RandomRays`.
 
     Examples
     --------
@@ -805,33 +1090,26 @@ class GaussianProfileUniformRays(RandomRays):
     raytracing.RandomUniformRays
 
     """
-    def __init__(self, intensityWidth, maxCount=10000):
+    def __init__(self, intensityWidth, maxCount=10000, seed=None):
         super(GaussianProfileUniformRays, self).__init__(yMax=4*intensityWidth, yMin=-4*intensityWidth, thetaMax=np.pi / 2, thetaMin=-np.pi / 2,
-                                                   maxCount=maxCount)
+                                                   maxCount=maxCount, seed=seed)
         self.intensityWidth = intensityWidth
 
-    def randomRay(self) -> Ray:
-        """
-        Return a ray randomly from the distribution
+    def randomBatch(self, count, generator=None):
+        from .raybatch import RayBatch
 
-        This strategy to get gaussian rays is fairly inefficient, but it works.
+        random = np.random if generator is None else generator
 
-        """
-        if len(self._rays) == self.maxCount:
-            raise AttributeError("Cannot generate more random rays, maximum count achieved")
+        # An intensity of exp(-y^2/w^2) is a normal distribution with a standard deviation
+        # of w/sqrt(2), truncated to [yMin, yMax]: the few heights outside are drawn again.
+        y = random.normal(scale=self.intensityWidth / np.sqrt(2), size=count)
+        isOutside = (y < self.yMin) | (y > self.yMax)
+        while isOutside.any():
+            y[isOutside] = random.normal(scale=self.intensityWidth / np.sqrt(2), size=np.count_nonzero(isOutside))
+            isOutside = (y < self.yMin) | (y > self.yMax)
 
-
-        while (True):
-            y = self.yMin + np.random.random() * (self.yMax - self.yMin)
-            intensity = np.exp(-y*y/self.intensityWidth/self.intensityWidth)
-            randomValue = np.random.random()
-            if randomValue < intensity:
-                break
-
-        theta = self.thetaMin + np.random.random() * (self.thetaMax - self.thetaMin)
-        ray = Ray(y, theta)
-        self.append(ray)
-        return ray
+        theta = self.thetaMin + random.random(count) * (self.thetaMax - self.thetaMin)
+        return RayBatch(y=y, theta=theta)
 
 
 class ObjectRays(UniformRays):
@@ -3,6 +3,7 @@ from .materials import *
 from math import *
 import matplotlib.transforms as transforms
 from numpy import linspace
+import numpy as np
 import matplotlib.pyplot as plt
 
 """ 
@@ -58,6 +59,11 @@ class CompoundLens(MatrixGroup):
         """ The chromatic aberration shifts to the focal distance from the
         design focal length for a range of wavelengths.
 
+        When the materials of the lens are known (see _indicesAtWavelengths()),
+        only the interfaces change with the wavelength: the transfer matrix
+        of the lens is computed for all wavelengths at once with the indices
+        of the materials. Otherwise, the lens is created again for each wavelength.
+
         Parameters
         ----------
         wavelengths : list or list like
@@ -69,14 +75,75 @@ class CompoundLens(MatrixGroup):
 
         if wavelengths is None:
             wavelengths = linspace(0.4, 0.8, 100)
-        
-        focalShifts = []
-        for l in wavelengths:
-            lens = type(self)(wavelength=l)
-            f,f = lens.effectiveFocalLengths()
-            focalShifts.append(f-self.designFocalLength)
-        
-        return wavelengths*1000, focalShifts
+        wavelengths = np.asarray(wavelengths, dtype=float)
+
+        C = self._transferMatrixCAtWavelengths(wavelengths)
+        if C is None:
+            focalShifts = []
+            for l in wavelengths:
+                lens = type(self)(wavelength=l)
+                f,f = lens.effectiveFocalLengths()
+                focalShifts.append(f-self.designFocalLength)
+            return wavelengths*1000, np.array(focalShifts)
+
+        with np.errstate(divide='ignore'):
+            return wavelengths*1000, -1.0 / C - self.designFocalLength
+
+    def _indicesAtWavelengths(self, wavelengths):
+        """ A dictionary with every index of refraction used in the elements as keys and the
+        index of the same material at each wavelength as values, or None if the materials are
+        not known. Subclasses that know their materials override this. """
+        return None
+
+    def _transferMatrixCAtWavelengths(self, wavelengths):
+        """ The C element of the transfer matrix of the lens at each wavelength,
+        or None if the indices of refraction at other wavelengths are not known. """
+        indices = self._indicesAtWavelengths(wavelengths)
+        if indices is None:
+            return None
+
+        ones = np.ones(len(wavelengths))
+        indices[1.0] = ones
+
+        A, B, C, D = ones, 0 * ones, 0 * ones, ones
+        for element in self.elements:
+            if isinstance(element, DielectricInterface):
+                if element.n1 not in indices or element.n2 not in indices:
+                    return None
+                n1, n2 = indices[element.n1], indices[element.n2]
+                a, b, c, d = 1.0, 0.0, - (n2 - n1) / (n2 * element.R), n1 / n2
+            elif isinstance(element, MatrixGroup):
+                return None
+            else:
+                a, b, c, d = element.A, element.B, element.C, element.D
+
+            A, B, C, D = a * A + b * C, a * B + b * D, c * A + d * C, c * B + d * D
+
+        return C
+
+    def _elementsAtWavelength(self, wavelength):
+        """ The elements of the lens with the indices of its materials at that wavelength,
+        or the elements as they are if the materials are not known. """
+        indices = self._indicesAtWavelengths(wavelength)
+        if indices is None:
+            return super(CompoundLens, self)._elementsAtWavelength(wavelength)
+        indices[1.0] = 1.0
+
+        elements = []
+        for element in self.elements:
+            if isinstance(element, DielectricInterface):
+                if element.n1 not in indices or element.n2 not in indices:
+                    return super(CompoundLens, self)._elementsAtWavelength(wavelength)
+                element = DielectricInterface(n1=indices[element.n1], n2=indices[element.n2], R=element.R,
+                                              diameter=element.apertureDiameter, label=element.label)
+            elif isinstance(element, Space):
+                if element.frontIndex not in indices:
+                    return super(CompoundLens, self)._elementsAtWavelength(wavelength)
+                element = Space(d=element.L, n=indices[element.frontIndex], diameter=element.apertureDiameter,
+                                label=element.label)
+            elements.extend(element._elementsAtWavelength(wavelength))
+
+        return elements
 
     def showChromaticAberrations(self, wavelengths=None):
         """ Show the chromatic aberrations focal shifts for this lens
@@ -220,6 +287,11 @@ class AchromatDoubletLens(CompoundLens):
                   "{1:0.1f}".format(corner3 - corner1, self.te, self.label)
             warnings.warn(msg, ExpertNote)
 
+    def _indicesAtWavelengths(self, wavelengths):
+        if self.mat1 is None or self.mat2 is None:
+            return None
+        return {self.n1: self.mat1.n(wavelengths), self.n2: self.mat2.n(wavelengths)}
+
     @property
     def forwardSurfaces(self) -> List[Interface]:
         return [SphericalInterface(R=self.R1, L=self.tc1, n=self.n1),
@@ -331,6 +403,11 @@ class SingletLens(CompoundLens):
                   "{1:0.1f}".format(corner2 - corner1, self.te, self.label)
             warnings.warn(msg, ExpertNote)
 
+    def _indicesAtWavelengths(self, wavelengths):
+        if self.mat is None:
+            return None
+        return {self.n: self.mat.n(wavelengths)}
+
     @property
     def forwardSurfaces(self) -> List[Interface]:
         return [SphericalInterface(R=self.R1, L=self.tc, n=self.n),
@@ -86,6 +86,45 @@ class TestAxicon(envtest.RaytracingTestCase):
         self.assertEqual(outputRay.theta, axicon.deviationAngle())
         self.assertTrue(outputRay.theta > 0)
 
+    def testDeviationAngleFollowsIndexAndAlpha(self):
+        axicon = Axicon(alpha=2*degrees, n=1.5)
+        self.assertAlmostEqual(axicon.deviationAngle(), 1*degrees)
+        axicon.n = 2
+        self.assertAlmostEqual(axicon.deviationAngle(), 2*degrees)
+        axicon.alpha = 1*degrees
+        self.assertAlmostEqual(axicon.deviationAngle(), 1*degrees)
+
+    def testBlockedRayIsNotDeviated(self):
+        axicon = Axicon(alpha=2*degrees, n=1.5)
+        ray = Ray(10, 0)
+        ray.isBlocked = True
+        self.assertEqual((axicon*ray).theta, 0)
+
+    def testMulRayBatch(self):
+        axicon = Axicon(alpha=2*degrees, n=1.5, diameter=10)
+        rays = [Ray(y, theta) for y in [-6, -2, 0, 2, 6] for theta in [-0.1, 0, 0.1]]
+        rays[0].isBlocked = True
+
+        batch = axicon.mul_rayBatch(RayBatch.fromRays(rays))
+        for i, ray in enumerate(rays):
+            outputRay = axicon.mul_ray(ray)
+            self.assertAlmostEqual(batch.y[i], outputRay.y)
+            self.assertAlmostEqual(batch.theta[i], outputRay.theta)
+            self.assertEqual(batch.isBlocked[i], outputRay.isBlocked)
+
+    def testTraceBatchThroughIsNotOneByOne(self):
+        axicon = Axicon(alpha=2*degrees, n=1.5)
+        axicon.mul_ray = None  # The batch must not be traced with mul_ray()
+        path = MatrixGroup([Space(d=10), axicon, Space(d=100)])
+        batch = path.traceBatchThrough(RayBatch(y=[-1, 0, 1], theta=[0, 0, 0]))
+        self.assertAlmostEqual(batch.y[0], -1 + 100*axicon.deviationAngle())
+        self.assertEqual(batch.y[1], 0)
+
+    def testMulBeamBatch(self):
+        axicon = Axicon(alpha=2*degrees, n=1.5)
+        with self.assertRaises(TypeError):
+            axicon.mul_beamBatch(BeamBatch(w=[1, 2]))
+
     @envtest.expectedFailure
     def testMulMatrix(self):
         matrix = Matrix()
@@ -0,0 +1,106 @@
+import envtest  # modifies path
+
+from raytracing import *
+import numpy as np
+
+inf = float("+inf")
+
+
+class TestBeamBatch(envtest.RaytracingTestCase):
+
+    def assertBatchMatchesBeams(self, batch, beams):
+        self.assertEqual(len(batch), len(beams))
+        for i, beam in enumerate(beams):
+            self.assertAlmostEqual(batch.q[i], beam.q, places=10)
+            self.assertEqual(batch.n[i], beam.n)
+            self.assertEqual(batch.z[i], beam.z)
+            self.assertEqual(batch.wavelength[i], beam.wavelength)
+            self.assertEqual(batch.isClipped[i], beam.isClipped)
+
+    def testBeamBatch(self):
+        batch = BeamBatch(w=[1, 2], R=[inf, 10], wavelength=0.001)
+        self.assertEqual(len(batch), 2)
+        for i, (w, R) in enumerate([(1, inf), (2, 10)]):
+            beam = GaussianBeam(w=w, R=R, wavelength=0.001)
+            self.assertAlmostEqual(batch.q[i], beam.q)
+            self.assertAlmostEqual(batch.w[i], beam.w)
+            self.assertAlmostEqual(batch.R[i], beam.R)
+        self.assertListEqual(list(batch.n), [1, 1])
+        self.assertListEqual(list(batch.isClipped), [False, False])
+
+    def testBeamBatchNoQNoW(self):
+        with self.assertRaises(ValueError):
+            BeamBatch()
+
+    def testBeamBatchWAndQMismatch(self):
+        q = GaussianBeam(w=1).q
+        self.assertDoesNotRaise(BeamBatch, ValueError, q=[q], w=[1])
+        with self.assertRaises(ValueError):
+            BeamBatch(q=[q * 1.007], w=[1])
+
+    def testFromBeams(self):
+        beams = [GaussianBeam(w=1, z=2), GaussianBeam(w=0.5, n=1.5, wavelength=0.001)]
+        beams[1].isClipped = True
+        batch = BeamBatch.fromBeams(beams)
+        self.assertBatchMatchesBeams(batch, beams)
+        self.assertEqual(batch[1].w, beams[1].w)
+        self.assertTrue(batch[1].isClipped)
+
+    def testFromBeamsNotBeams(self):
+        with self.assertRaises(TypeError):
+            BeamBatch.fromBeams([GaussianBeam(w=1), Ray()])
+
+    def testNotFiniteBeams(self):
+        batch = BeamBatch(q=[0, complex(1, -1), complex(1, 1)])
+        self.assertListEqual(list(batch.isFinite), [False, False, True])
+        self.assertListEqual(list(batch.w[:2]), [inf, inf])
+        self.assertEqual(batch.R[0], inf)
+        self.assertTrue(np.isnan(batch.wo[1]))
+
+    def testMulBeamBatch(self):
+        m = Matrix(A=1, B=2, C=0, D=2 / 3, physicalLength=1, apertureDiameter=0.1, frontIndex=1, backIndex=1.5)
+        beams = [GaussianBeam(w=w, wavelength=0.001) for w in [0.01, 0.05, 1]]
+        self.assertBatchMatchesBeams(m * BeamBatch.fromBeams(beams), [m * beam for beam in beams])
+
+    def testMulBeamBatchIndexNotTracked(self):
+        with self.assertRaises(RuntimeError):
+            Matrix(frontIndex=1.5, backIndex=1.5) * BeamBatch(w=[1, 2])
+
+    def testTraceBeamBatchThroughMatchesTraceThrough(self):
+        path = LaserPath()
+        path.append(Space(d=10))
+        path.append(Lens(f=10, diameter=0.5))
+        path.append(Space(d=10))
+        path.append(DielectricInterface(n1=1, n2=1.5, R=20, diameter=3))
+        path.append(Space(d=10, n=1.5))
+        path.append(DielectricInterface(n1=1.5, n2=1, R=-20))
+        path.append(Space(d=10))
+        path.append(thorlabs.AC254_050_A())
+        beams = [GaussianBeam(w=w, R=R, wavelength=0.001) for w in [0.01, 0.05, 0.1, 0.3, 1] for R in [-20, inf, 20]]
+
+        batch = path.traceBeamBatchThrough(BeamBatch.fromBeams(beams))
+        self.assertBatchMatchesBeams(batch, [path.traceThrough(beam) for beam in beams])
+
+    def testTraceBeamBatchThroughIndexNotTracked(self):
+        path = LaserPath([Space(d=10, n=1.5)])
+        with self.assertRaises(RuntimeError):
+            path.traceBeamBatchThrough(BeamBatch(w=[1, 2], n=[1.5, 1]))
+
+    def testTraceBeamBatchThroughAxicon(self):
+        path = LaserPath([Space(d=10), Axicon(alpha=0.1, n=1.5)])
+        with self.assertRaises(TypeError):
+            path.traceBeamBatchThrough(BeamBatch(w=[1, 2]))
+
+    def testTraceBeamBatchThroughNotABatch(self):
+        with self.assertRaises(TypeError):
+            LaserPath([Space(d=10)]).traceBeamBatchThrough(GaussianBeam(w=1))
+
+    def testTraceBeamBatchThroughEmptyPath(self):
+        batch = BeamBatch(w=[1])
+        outputBatch = LaserPath().traceBeamBatchThrough(batch)
+        self.assertIsNot(outputBatch, batch)
+        self.assertEqual(outputBatch.q[0], batch.q[0])
+
+
+if __name__ == '__main__':
+    envtest.main()
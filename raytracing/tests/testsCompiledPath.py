@@ -0,0 +1,183 @@
+import envtest  # modifies path
+
+from raytracing import *
+import numpy as np
+
+inf = float("+inf")
+
+
+class TestCompiledPath(envtest.RaytracingTestCase):
+
+    def testCompiledPath(self):
+        compiledPath = CompiledPath([Space(d=10), Lens(f=5, diameter=4), Aperture(diameter=2, NA=0.5)])
+        self.assertEqual(len(compiledPath), 3)
+        self.assertListEqual(list(compiledPath.B), [10, 0, 0])
+        self.assertListEqual(list(compiledPath.C), [0, -0.2, 0])
+        self.assertListEqual(list(compiledPath.L), [10, 0, 0])
+        self.assertListEqual(list(compiledPath.apertureDiameter), [inf, 4, 2])
+        self.assertListEqual(list(compiledPath.apertureNA), [inf, inf, 0.5])
+        self.assertListEqual(list(compiledPath.isTracedOneByOne), [False, False, False])
+
+    def testCompiledPathSpecialElements(self):
+        compiledPath = CompiledPath([Space(d=10), Axicon(alpha=0.1, n=1.5)])
+        self.assertListEqual(list(compiledPath.isTracedOneByOne), [False, True])
+        self.assertListEqual(list(compiledPath.isBeamTracedOneByOne), [False, True])
+
+    def testMatrixCompile(self):
+        lens = Lens(f=5)
+        self.assertListEqual(lens.compile().elements, [lens])
+
+    def testCompileFlattensGroups(self):
+        space = Space(d=10)
+        system = System4f(f1=10, f2=20)
+        path = MatrixGroup([space, system, Space(d=10)])
+        compiledPath = path.compile()
+        self.assertEqual(len(compiledPath), len(system.elements) + 2)
+        self.assertIs(compiledPath.elements[0], space)
+        self.assertIs(compiledPath.elements[1], system.elements[0])
+
+    def testCompileIsKept(self):
+        path = MatrixGroup([Space(d=10), Lens(f=10)])
+        self.assertIs(path.compile(), path.compile())
+
+    def testCompileRebuiltAfterAppend(self):
+        path = MatrixGroup([Space(d=10), Lens(f=10)])
+        compiledPath = path.compile()
+        path.append(Space(d=10))
+        self.assertIsNot(path.compile(), compiledPath)
+        self.assertEqual(len(path.compile()), 3)
+
+    def testCompileRebuiltAfterPop(self):
+        path = MatrixGroup([Space(d=10), Lens(f=10)])
+        path.compile()
+        path.pop(0)
+        self.assertEqual(len(path.compile()), 1)
+
+    def testCompileRebuiltAfterElementsChangedDirectly(self):
+        path = MatrixGroup([Space(d=10), Lens(f=10)])
+        path.compile()
+        path.elements.append(Space(d=10))
+        self.assertEqual(len(path.compile()), 3)
+
+    def testCompileRebuiltAfterNestedGroupChanged(self):
+        group = MatrixGroup([Space(d=10), Lens(f=10)])
+        path = MatrixGroup([group, Space(d=10)])
+        path.compile()
+        group.append(Space(d=5))
+        self.assertEqual(len(path.compile()), 4)
+
+    def testCompileRebuiltAfterApertureChanged(self):
+        path = MatrixGroup([Space(d=10), Lens(f=10), Space(d=10)])
+        rays = [Ray(y=y, theta=0) for y in np.linspace(-5, 5, 11)]
+        self.assertEqual(len([ray for ray in path.traceManyThrough(rays) if ray.isNotBlocked]), 11)
+
+        path.elements[1].apertureDiameter = 2
+        self.assertEqual(len([ray for ray in path.traceManyThrough(rays) if ray.isNotBlocked]), 3)
+        self.assertEqual(path.transmission(rays).isTransmitted.sum(), 3)
+
+    def testCompileRebuiltAfterFocalLengthChangedInNestedGroup(self):
+        lens = Lens(f=10)
+        path = MatrixGroup([Space(d=10), MatrixGroup([lens]), Space(d=10)])
+        path.compile()
+
+        lens.C = -1 / 5
+        batch = path.traceBatchThrough(RayBatch(y=[1], theta=[0]))
+        ray = path.traceThrough(Ray(y=1, theta=0))
+        self.assertAlmostEqual(batch.y[0], -1)
+        self.assertAlmostEqual(batch.y[0], ray.y)
+        self.assertAlmostEqual(path.C, -1 / 5)
+
+    def testTraceBatchThroughWithBlockedRays(self):
+        path = MatrixGroup([Space(d=10, diameter=10), Lens(f=5, diameter=4), Space(d=5), Aperture(diameter=1)])
+        inputRays = [Ray(y, theta) for y in [-6, -2, -0.5, 0, 0.5, 2, 6] for theta in [-0.5, -0.1, 0, 0.1, 0.5]]
+        inputRays.append(Ray(0, 0, isBlocked=True))
+
+        batch = path.compile().traceBatchThrough(RayBatch.fromRays(inputRays))
+        for i, inputRay in enumerate(inputRays):
+            ray = path.traceThrough(Ray(inputRay.y, inputRay.theta, isBlocked=inputRay.isBlocked))
+            self.assertEqual(batch[i], ray)
+            self.assertEqual(batch.z[i], ray.z)
+            self.assertEqual(batch.isBlocked[i], ray.isBlocked)
+            self.assertEqual(batch.apertureDiameter[i], ray.apertureDiameter)
+
+    def testTraceBatchThroughEmpty(self):
+        batch = CompiledPath([]).traceBatchThrough(RayBatch(y=[1, 2], theta=[0, 0]))
+        self.assertListEqual(list(batch.y), [1, 2])
+
+    def testTransmissionWithSpecialElements(self):
+        path = MatrixGroup([Space(d=5), Axicon(alpha=0.1, n=1.5, diameter=10), Space(d=5, diameter=4)])
+        inputBatch = RayBatch(y=range(-6, 7), theta=[0.1] * 13)
+        transmission = path.compile().transmission(inputBatch)
+        outputBatch = path.traceBatchThrough(inputBatch)
+        self.assertListEqual(list(transmission.isTransmitted), list(outputBatch.isNotBlocked))
+        self.assertListEqual(list(transmission.theta[transmission.isTransmitted]),
+                             list(outputBatch.theta[outputBatch.isNotBlocked]))
+
+    def testTransmissionAllBlocked(self):
+        transmission = CompiledPath([Aperture(diameter=1), Space(d=10)]).transmission(RayBatch(y=[2, 3], theta=[0, 0]))
+        self.assertListEqual(list(transmission.isTransmitted), [False, False])
+
+    @envtest.skipIf(sys.platform == 'darwin' and sys.version_info.major == 3 and sys.version_info.minor <= 7,
+                    "Endless loop on macOS")
+    def testTraceBatchThroughInParallel(self):
+        path = MatrixGroup([Space(d=10, diameter=10), Lens(f=5, diameter=4), Space(d=5)])
+        inputBatch = RayBatch(y=[y / 10 for y in range(-60, 61)], theta=[0.1] * 121)
+
+        batch = path.compile().traceBatchThroughInParallel(inputBatch, processes=2)
+        self.assertTrue(np.array_equal(batch.columns(), path.traceBatchThrough(inputBatch).columns(), equal_nan=True))
+
+    def testTraceBatchThroughInParallelEmpty(self):
+        batch = CompiledPath([Space(d=10)]).traceBatchThroughInParallel(RayBatch(y=[], theta=[]), processes=2)
+        self.assertEqual(len(batch), 0)
+
+    def testCompileAtWavelength(self):
+        lens = thorlabs.AC254_100_A()
+        for wavelength in [0.45, 0.6, 0.9]:
+            compiledPath = lens.compileAtWavelength(wavelength)
+            reference = thorlabs.AC254_100_A(wavelength=wavelength).compile()
+            self.assertTrue(np.allclose(compiledPath.C, reference.C))
+            self.assertTrue(np.allclose(compiledPath.D, reference.D))
+
+    def testCompileAtWavelengthWithoutMaterials(self):
+        path = MatrixGroup([Space(d=10), Lens(f=10)])
+        self.assertListEqual(path.compileAtWavelength(0.5).elements, path.compile().elements)
+
+    def testCompileAtWavelengthRebuiltAfterAppend(self):
+        path = MatrixGroup([Space(d=10), thorlabs.AC254_100_A()])
+        compiledPath = path.compileAtWavelength(0.5)
+        self.assertIs(path.compileAtWavelength(0.5), compiledPath)
+        path.append(Space(d=10))
+        self.assertEqual(len(path.compileAtWavelength(0.5)), len(compiledPath) + 1)
+
+    def testTraceBatchThroughPolychromatic(self):
+        path = ImagingPath([Space(d=100), thorlabs.AC254_100_A(), Space(d=50)])
+        wavelengths = [0.45, 0.6, float("nan"), 0.9, 0.45]
+        inputBatch = RayBatch(y=[1, 2, 3, 4, 5], theta=[0.01, 0, -0.01, 0.02, 0], wavelength=wavelengths)
+
+        batch = path.traceBatchThrough(inputBatch, polychromatic=True)
+        self.assertTrue(np.array_equal(batch.wavelength, inputBatch.wavelength, equal_nan=True))
+        for i, wavelength in enumerate(wavelengths):
+            if np.isnan(wavelength):
+                reference = path
+            else:
+                reference = ImagingPath([Space(d=100), thorlabs.AC254_100_A(wavelength=wavelength), Space(d=50)])
+            ray = reference.traceThrough(inputBatch[i])
+            self.assertAlmostEqual(batch.y[i], ray.y)
+            self.assertAlmostEqual(batch.theta[i], ray.theta)
+
+    def testTraceManyThroughPolychromatic(self):
+        path = ImagingPath([Space(d=100), thorlabs.AC254_100_A(), Space(d=100)])
+        rays = Rays([Ray(y=1, wavelength=0.45), Ray(y=1, wavelength=0.9)])
+        outputRays = path.traceManyThrough(rays, polychromatic=True)
+        self.assertListEqual([ray.wavelength for ray in outputRays], [0.45, 0.9])
+        self.assertNotAlmostEqual(outputRays[0].y, outputRays[1].y)
+
+    def testProgressCheckpoints(self):
+        from raytracing.compiledpath import _progressCheckpoints
+        self.assertListEqual(_progressCheckpoints(5000), [])
+        self.assertListEqual(_progressCheckpoints(10000), [10000])
+        self.assertListEqual(_progressCheckpoints(100000), [10000, 30000, 90000, 100000])
+
+
+if __name__ == '__main__':
+    envtest.main()
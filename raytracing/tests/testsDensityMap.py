@@ -0,0 +1,122 @@
+import envtest  # modifies path
+
+from raytracing import *
+import numpy as np
+
+inf = float("+inf")
+
+
+class TestDensityMap(envtest.RaytracingTestCase):
+
+    def testDensityMap(self):
+        densityMap = DensityMap(zMin=0, zMax=10, yMin=-1, yMax=1, zCount=20, yCount=4)
+        self.assertEqual(densityMap.image.shape, (4, 20))
+        self.assertEqual(densityMap.image.sum(), 0)
+        self.assertTupleEqual(densityMap.extent, (0, 10, -1, 1))
+
+    def testDensityMapInvalidEdges(self):
+        with self.assertRaises(ValueError):
+            DensityMap(zMin=10, zMax=0, yMin=-1, yMax=1)
+        with self.assertRaises(ValueError):
+            DensityMap(zMin=0, zMax=10, yMin=-1, yMax=1, zCount=0)
+
+    def testHorizontalSegment(self):
+        densityMap = DensityMap(zMin=0, zMax=10, yMin=0, yMax=10, zCount=10, yCount=10)
+        densityMap.addSegments(z1=0, y1=2.5, z2=10, y2=2.5)
+        self.assertListEqual(list(densityMap.image[2]), [1] * 10)
+        self.assertEqual(densityMap.image.sum(), 10)
+
+    def testSegmentBetweenTwoRows(self):
+        densityMap = DensityMap(zMin=0, zMax=10, yMin=0, yMax=10, zCount=10, yCount=10)
+        densityMap.addSegments(z1=0, y1=5, z2=10, y2=5)
+        self.assertListEqual(list(densityMap.image[4]), [0.5] * 10)
+        self.assertListEqual(list(densityMap.image[5]), [0.5] * 10)
+
+    def testVerticalSegment(self):
+        densityMap = DensityMap(zMin=0, zMax=10, yMin=0, yMax=10, zCount=10, yCount=10)
+        densityMap.addSegments(z1=2.5, y1=0, z2=2.5, y2=10)
+        self.assertListEqual(list(densityMap.image[:, 2]), [1] * 10)
+
+    def testDiagonalSegment(self):
+        densityMap = DensityMap(zMin=0, zMax=10, yMin=0, yMax=10, zCount=10, yCount=10)
+        densityMap.addSegments(z1=0, y1=0, z2=10, y2=10)
+        self.assertTrue(np.allclose(densityMap.image, np.eye(10)))
+
+    def testSegmentsOutsideAreClipped(self):
+        densityMap = DensityMap(zMin=0, zMax=10, yMin=0, yMax=10, zCount=10, yCount=10)
+        densityMap.addSegments(z1=[-100, 5.5, 0, 0], y1=[4.5, -100, 20, 5], z2=[100, 5.5, 10, inf], y2=[4.5, 100, 20, 5])
+        self.assertListEqual(list(densityMap.image[4]), [1] * 5 + [2] + [1] * 4)
+        self.assertListEqual(list(densityMap.image[:, 5]), [1] * 4 + [2] + [1] * 5)
+        self.assertEqual(densityMap.image.sum(), 20)
+
+    def testSegmentsWithSameColumnsAsOtherSegments(self):
+        z1, z2 = np.full(50, 3.3), np.full(50, 71.7)
+        y1 = np.linspace(-20, 20, 50)
+        y2 = y1 + np.linspace(-10, 10, 50)
+        densityMap = DensityMap(zMin=0, zMax=80, yMin=-15, yMax=15, zCount=160, yCount=60)
+        densityMap.addSegments(z1, y1, z2, y2)
+
+        otherMap = densityMap.emptyCopy()
+        for i in range(50):
+            otherMap.addSegments(z1[i], y1[i], z2[i], y2[i])
+        self.assertTrue(np.allclose(densityMap.image, otherMap.image))
+
+    def testAddDensityMaps(self):
+        densityMap = DensityMap(zMin=0, zMax=10, yMin=0, yMax=10, zCount=10, yCount=10)
+        densityMap.addSegments(z1=0, y1=2.5, z2=10, y2=2.5)
+        otherMap = densityMap.emptyCopy()
+        otherMap.addSegments(z1=0, y1=7.5, z2=10, y2=7.5)
+
+        total = densityMap + otherMap
+        self.assertEqual(total.image.sum(), 20)
+        self.assertEqual(densityMap.image.sum(), 10)
+        densityMap += otherMap
+        self.assertTrue(np.array_equal(densityMap.image, total.image))
+
+    def testAddDensityMapsOfDifferentSizes(self):
+        densityMap = DensityMap(zMin=0, zMax=10, yMin=0, yMax=10, zCount=10, yCount=10)
+        with self.assertRaises(ValueError):
+            densityMap += DensityMap(zMin=0, zMax=10, yMin=0, yMax=10, zCount=10, yCount=20)
+
+    def testAddRayBatch(self):
+        path = MatrixGroup([Space(d=10), Lens(f=5), Space(d=10)])
+        densityMap = DensityMap(zMin=0, zMax=20, yMin=-1, yMax=1, zCount=20, yCount=2)
+        densityMap.addRayBatch(path, RayBatch(y=[0.5, -0.5], theta=[0, 0]))
+        self.assertEqual(densityMap.image.sum(), 40)
+        self.assertListEqual(list(densityMap.image[1, :10]), [1] * 10)
+
+    def testAddRayBatchStopsAtBlockingAperture(self):
+        path = MatrixGroup([Space(d=10), Aperture(diameter=1.5), Space(d=10)])
+        densityMap = DensityMap(zMin=0, zMax=20, yMin=-2, yMax=2, zCount=20, yCount=4)
+        densityMap.addRayBatch(path, RayBatch(y=[1.5, -0.5], theta=[0, 0]))
+        self.assertListEqual(list(densityMap.image[3]), [1] * 10 + [0] * 10)
+        self.assertListEqual(list(densityMap.image[1]), [1] * 20)
+
+    def testAddRayBatchNotABatch(self):
+        densityMap = DensityMap(zMin=0, zMax=20, yMin=-1, yMax=1)
+        with self.assertRaises(TypeError):
+            densityMap.addRayBatch(Space(d=10), Ray())
+
+    def testAddRaysInChunks(self):
+        path = ImagingPath([Space(d=10), Lens(f=10, diameter=5), Space(d=20)])
+        inputBatch = RayBatch(y=np.linspace(-3, 3, 101), theta=np.linspace(-0.1, 0.1, 101))
+        densityMap = DensityMap(zMin=0, zMax=30, yMin=-3, yMax=3, zCount=60, yCount=30)
+        densityMap.addRayBatch(path, inputBatch)
+
+        otherMap = densityMap.emptyCopy()
+        otherMap.addRays(path, inputBatch, chunkSize=10)
+        self.assertTrue(np.allclose(densityMap.image, otherMap.image))
+
+    def testAddRaysInParallel(self):
+        path = ImagingPath([Space(d=10), Lens(f=10, diameter=5), Space(d=20)])
+        inputBatch = RayBatch(y=np.linspace(-3, 3, 101), theta=np.linspace(-0.1, 0.1, 101))
+        densityMap = DensityMap(zMin=0, zMax=30, yMin=-3, yMax=3, zCount=60, yCount=30)
+        densityMap.addRays(path, inputBatch, chunkSize=25)
+
+        otherMap = densityMap.emptyCopy()
+        otherMap.addRays(path, inputBatch, chunkSize=25, processes=2)
+        self.assertTrue(np.allclose(densityMap.image, otherMap.image))
+
+
+if __name__ == '__main__':
+    envtest.main()
@@ -16,6 +16,7 @@ contextlib.redirect_stdout(fout)
 with patch('matplotlib.pyplot.show', new=Mock()):
     doctest.testmod(m=raytracing.axicon,verbose=False)
     doctest.testmod(m=raytracing.components,verbose=False)
+    doctest.testmod(m=raytracing.densitymap,verbose=False)
     doctest.testmod(m=raytracing.eo,verbose=False)
     doctest.testmod(m=raytracing.figure,verbose=False)
     doctest.testmod(m=raytracing.gaussianbeam,verbose=False)
@@ -26,6 +27,7 @@ with patch('matplotlib.pyplot.show', new=Mock()):
     doctest.testmod(m=raytracing.matrix,verbose=False)
     doctest.testmod(m=raytracing.matrixgroup,verbose=False)
     doctest.testmod(m=raytracing.ray,verbose=False)
+    doctest.testmod(m=raytracing.raybatch,verbose=False)
     doctest.testmod(m=raytracing.rays,verbose=False)
     doctest.testmod(m=raytracing.specialtylenses,verbose=False)
     doctest.testmod(m=raytracing.utils,verbose=False)
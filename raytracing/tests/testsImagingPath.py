@@ -147,6 +147,98 @@ class TestImagingPath(envtest.RaytracingTestCase):
         self.assertEqual(path.fieldStop().diameter, 50)
         self.assertTrue(path.hasFieldStop())
 
+    def testExactFieldStop(self):
+        path = ImagingPath([Space(10), Lens(10, 25), Space(20), Lens(10, 50), Space(10)])
+        self.assertTupleEqual(path.exactFieldStop(), path.fieldStop())
+        self.assertAlmostEqual(path.exactHalfFieldOfView(), path.halfFieldOfView(), 5)
+
+    def testExactFieldStopBlockedByNA(self):
+        path = ImagingPath([Space(10), Aperture(diameter=10), Space(10), Aperture(diameter=inf, NA=0.1), Space(10),
+                            Lens(f=10, diameter=30), Space(10)])
+        self.assertTupleEqual(path.exactFieldStop(), path.fieldStop())
+        self.assertAlmostEqual(path.exactHalfFieldOfView(), path.halfFieldOfView(), 5)
+
+    def testExactFieldStopNoFieldStop(self):
+        path = ImagingPath([Lens(f=10, diameter=450), Space(20), Lens(10), Space(10)])
+        self.assertTupleEqual(path.exactFieldStop(), (None, inf))
+        self.assertEqual(path.exactHalfFieldOfView(), inf)
+
+        path = ImagingPath([Space(10), Lens(10), Space(20)])
+        self.assertTupleEqual(path.exactFieldStop(), (None, inf))
+        self.assertEqual(path.exactHalfFieldOfView(), inf)
+
+    def testExactFieldStopBeyondMaxHeight(self):
+        path = ImagingPath()
+        path.append(System2f(f=10, diameter=path.maxHeight * 2))
+        path.append(Aperture(diameter=path.maxHeight * 2.3))
+        self.assertTupleEqual(path.exactFieldStop(), (None, inf))
+        self.assertEqual(path.exactHalfFieldOfView(), inf)
+
+    def testExactHalfFieldOfView(self):
+        path = ImagingPath()
+        path.append(System2f(f=10, diameter=10))
+        path.append(Aperture(diameter=20))
+        self.assertAlmostEqual(path.exactHalfFieldOfView(), 10)
+        self.assertAlmostEqual(path.exactHalfFieldOfView(), path.halfFieldOfView(), 5)
+
+    def testExactFieldStopWithAxicon(self):
+        path = ImagingPath([Space(10), Lens(f=10, diameter=20), Space(10), Axicon(alpha=0.01, n=1.5, diameter=10),
+                            Space(10), Aperture(diameter=5)])
+        self.assertTupleEqual(path.exactFieldStop(), path.fieldStop())
+        self.assertEqual(path.exactHalfFieldOfView(), path.halfFieldOfView())
+
+    def testStopsForgottenAfterAppend(self):
+        path = ImagingPath([Space(10), Lens(10, 100), Space(20)])
+        self.assertTupleEqual(path.fieldStop(), (None, inf))
+        path.append(Lens(10, 50))
+        path.append(Space(10))
+        self.assertTupleEqual(path.fieldStop(), (10, 100))
+        path.pop(1)
+        self.assertTupleEqual(path.apertureStop(), (30, 50))
+
+    def testStopsForgottenAfterNestedGroupChanged(self):
+        group = MatrixGroup([Space(10), Lens(10, 100)])
+        path = ImagingPath([group, Space(20)])
+        self.assertTupleEqual(path.apertureStop(), (10, 100))
+        group.append(Aperture(diameter=10))
+        self.assertTupleEqual(path.apertureStop(), (10, 10))
+
+    def testStopsForgottenAfterApertureChanged(self):
+        lens = Lens(10, 100)
+        path = ImagingPath([Space(10), lens, Space(20), Lens(10, 50), Space(10)])
+        self.assertTupleEqual(path.fieldStop(), (10, 100))
+        self.assertTupleEqual(path.apertureStop(), (30, 50))
+        self.assertAlmostEqual(path.chiefRay().y, 25, 3)
+
+        lens.apertureDiameter = 25
+        self.assertTupleEqual(path.fieldStop(), (30, 50))
+        self.assertTupleEqual(path.apertureStop(), (10, 25))
+        self.assertTupleEqual(path.exactFieldStop(), (30, 50))
+        self.assertAlmostEqual(path.chiefRay().y, 12.5, 3)
+
+    def testStopsForgottenAfterApertureChangedInNestedGroup(self):
+        aperture = Aperture(diameter=100)
+        path = ImagingPath([MatrixGroup([Space(10), Lens(10, 100), aperture]), Space(20)])
+        self.assertTupleEqual(path.apertureStop(), (10, 100))
+        aperture.apertureDiameter = 10
+        self.assertTupleEqual(path.apertureStop(), (10, 10))
+
+    def testStopsForgottenAfterPrecisionChanged(self):
+        path = ImagingPath([Space(10), Lens(10, 25), Space(20), Lens(10, 50), Space(10)])
+        halfFieldOfView = path.halfFieldOfView()
+        path.precision = 0.01
+        self.assertNotEqual(path.halfFieldOfView(), halfFieldOfView)
+        self.assertAlmostEqual(path.halfFieldOfView(), halfFieldOfView, 1)
+
+    def testMemoizedRaysAreCopies(self):
+        path = ImagingPath([Space(10), Lens(10, 25), Space(20), Lens(10, 50), Space(10)])
+        principalRay = path.principalRay()
+        principalRay.y = 1000
+        self.assertNotEqual(path.principalRay().y, 1000)
+        path.marginalRays().up.theta = 1
+        self.assertNotEqual(path.axialRay().theta, 1)
+        self.assertNotEqual(path.chiefRay(y=1), path.chiefRay(y=2))
+
     def testEntrancePupilNoBackwardConjugate(self):
         path = ImagingPath()
         path.append(System2f(f=10))
@@ -1,5 +1,6 @@
 import envtest  # modifies path
 from raytracing import *
+import numpy as np
 
 inf = float("+inf")
 
@@ -25,6 +26,20 @@ class TestLaserPath(envtest.RaytracingTestCase):
         with self.assertRaises(TypeError):
             LaserPath(elements)
 
+    def testBeamTraceLines(self):
+        path = LaserPath([Space(d=10), Lens(f=10), Space(d=20)])
+        beam = GaussianBeam(w=0.1, wavelength=0.001)
+        upperLine, lowerLine = path.figure.beamTraceLines(beam)
+        self.assertEqual(len(upperLine.xData), 1 + 100 + 1 + 100)
+        self.assertListEqual(list(lowerLine.yData), [-w for w in upperLine.yData])
+
+        z, w = upperLine.xData, upperLine.yData
+        self.assertAlmostEqual(z[50], 5)
+        self.assertAlmostEqual(w[50], (Space(d=5) * beam).w)
+        self.assertAlmostEqual(z[-1], 30)
+        self.assertAlmostEqual(w[-1], path.traceThrough(beam).w)
+        self.assertAlmostEqual(w[151], (Space(d=10) * path.transferMatrix(upTo=10) * beam).w)
+
     @envtest.skip("This test needs to be moved to Figure")
     def testRearrangeBeamTraceForPlotting(self):
         x = [x for x in range(1, 6)]
@@ -102,5 +117,30 @@ class TestLaserCavity(envtest.RaytracingTestCase):
         self.assertIsNotNone(laser)
         self.assertTrue(len(laser.laserModes()) == 1)
 
+    def testStabilityMap(self):
+        radii = np.array([-50, -100, -200, -400, 100])
+        lengths = np.array([20, 60, 120, 250])
+        R, d = np.meshgrid(radii, lengths)
+        modes = LaserCavity.stabilityMap([(1, d, 0, 1), CurvedMirror(R=-150), (1, d, 0, 1), (1, 0, 2 / R, 1)])
+        self.assertEqual(modes.isStable.shape, (4, 5))
+
+        for i, length in enumerate(lengths):
+            for j, radius in enumerate(radii):
+                cavity = LaserCavity([Space(d=length), CurvedMirror(R=-150), Space(d=length), CurvedMirror(R=radius)])
+                self.assertEqual(modes.isStable[i, j], cavity.isStable)
+                if cavity.isStable:
+                    beam = cavity.laserModes()[0]
+                    self.assertAlmostEqual(modes.q[i, j], beam.q)
+                    self.assertAlmostEqual(modes.w[i, j], beam.w)
+                    self.assertAlmostEqual(modes.waist[i, j], beam.waist)
+                    self.assertAlmostEqual(modes.waistPosition[i, j], beam.waistPosition)
+                else:
+                    self.assertTrue(np.isnan(modes.w[i, j]))
+
+    def testStabilityMapNoPower(self):
+        modes = LaserCavity.stabilityMap([(1, [10, 20], 0, 1)])
+        self.assertListEqual(list(modes.isStable), [False, False])
+
+
 if __name__ == '__main__':
     envtest.main()
@@ -1,5 +1,6 @@
 import envtest # modifies path
 from raytracing import *
+import numpy as np
 
 
 class TestMaterial(envtest.RaytracingTestCase):
@@ -55,6 +56,40 @@ class TestMaterialSubclasses(envtest.RaytracingTestCase):
                 fails.append('ValueError for subclass {}'.format(material.__name__))
         self.assertEqual([], fails)
 
+    def testMaterialSubclassesArrays(self):
+        wavelengths = np.linspace(0.4, 2, 20)
+        for material in self.materials:
+            indices = material.n(wavelengths)
+            self.assertIsInstance(indices, np.ndarray)
+            for wavelength, n in zip(wavelengths, indices):
+                self.assertAlmostEqual(n, material.n(float(wavelength)), places=12)
+            self.assertIsInstance(material.n(0.5), float)
+
+    def testMaterialSubclassesArraysValueErrors(self):
+        for material in self.materials:
+            self.assertRaises(ValueError, material.n, np.array([0.5, 100]))
+            self.assertRaises(ValueError, material.n, [0, 0.5])
+
+    def testDispersionTable(self):
+        wavelengths = np.linspace(0.4, 2, 1000)
+        for material in self.materials:
+            table = material.dispersionTable()
+            self.assertLess(table.maximumError, 1e-6)
+            self.assertLessEqual(np.max(np.abs(table.n(wavelengths) - material.n(wavelengths))),
+                                 table.maximumError * 1.01)
+            self.assertAlmostEqual(table.n(0.6), material.n(0.6), 6)
+            self.assertAlmostEqual(table.n(2.0), material.n(2.0), 12)
+
+    def testDispersionTableIsKept(self):
+        self.assertIs(N_BK7.dispersionTable(), N_BK7.dispersionTable())
+        self.assertIsNot(N_BK7.dispersionTable(), N_BK7.dispersionTable(wavelengthMax=1.0))
+
+    def testDispersionTableOutOfRange(self):
+        table = N_BK7.dispersionTable(wavelengthMin=0.5, wavelengthMax=0.7, count=201)
+        self.assertRaises(ValueError, table.n, 0.4)
+        self.assertRaises(ValueError, table.n, [0.6, 0.8])
+        self.assertRaises(ValueError, DispersionTable, N_BK7, 0.7, 0.5)
+
     @envtest.expectedFailure
     def testMaterialSubclasses(self):
         ''' These are sample values of refractive indices for each subclass of material for a wavelength of 0.6 micron.
@@ -2,6 +2,7 @@ import envtest  # modifies path
 import subprocess
 
 from raytracing import *
+import numpy as np
 inf = float("+inf")
 
 
@@ -84,6 +85,24 @@ class TestMatrix(envtest.RaytracingTestCase):
         self.assertEqual(m3.C, 16)
         self.assertEqual(m3.D, 13)
 
+    def testMatrixProductSameAsConstructor(self):
+        m1 = Matrix(A=1, B=0, C=-1 / 3, D=1, frontVertex=0, backVertex=0, label='Lens', apertureDiameter=10)
+        m2 = Matrix(A=1, B=2, C=0, D=1, physicalLength=2, apertureNA=0.5)
+        m3 = m1 * m2
+        self.assertEqual(m3, Matrix(A=1, B=2, C=-1 / 3, D=-1 / 3 * 2 + 1, physicalLength=2, frontVertex=2, backVertex=2))
+
+    def testMatrixProductChecksProducts(self):
+        m1 = Matrix(A=2, B=0, C=0, D=0.5)
+        m1.D = 1  # Inconsistent determinant, not checked by the constructor
+        self.assertDoesNotRaise(m1.mul_matrix, ValueError, Matrix())
+
+        Matrix.checksProducts = True
+        try:
+            with self.assertRaises(ValueError):
+                m1 * Matrix(A=1, B=2, C=0, D=1)
+        finally:
+            Matrix.checksProducts = False
+
     def testIsIdentity(self):
         m = Matrix()
         self.assertTrue(m.isIdentity)
@@ -346,6 +365,32 @@ class TestMatrix(envtest.RaytracingTestCase):
         traceMany = [[ray, ray] for ray in rays]
         self.assertListEqual(m.traceMany(rays), traceMany)
 
+    def testProfilesFromRayTraces(self):
+        path = MatrixGroup([Space(d=10), Lens(f=10, diameter=15), Space(d=10), Aperture(diameter=1), Space(d=5)])
+        rayTraces = path.traceMany([Ray(y / 5, theta / 100) for y in range(-30, 31) for theta in range(-20, 21)])
+        z = [-1, 0, 5, 10, 20, 22.5, 25, 30]
+
+        profiles = path.profilesFromRayTraces(rayTraces, z, binCount=20, minValue=-6, maxValue=6)
+        self.assertEqual(profiles.counts.shape, (len(z), 20))
+        self.assertEqual(len(profiles.y), 20)
+        for i, zProfile in enumerate(z):
+            yValues = [ray.y for ray in path.profileFromRayTraces(rayTraces, zProfile)]
+            counts, _ = np.histogram(yValues, bins=20, range=(-6, 6))
+            self.assertListEqual(list(profiles.counts[i]), list(counts))
+
+    def testProfilesFromRayTracesOfDifferentLengths(self):
+        rayTraces = [[Ray(0, 0.1), Ray(0.1, 0.2, z=1), Ray(0.3, 0, z=2)], [Ray(1, 0.1, z=0.5), Ray(2, 0, z=3)]]
+        z = [-1, 0, 0.5, 1, 1.5, 2, 2.5, 3, 4]
+        profiles = Matrix().profilesFromRayTraces(rayTraces, z, binCount=5, minValue=-0.5, maxValue=2.5)
+        for i, zProfile in enumerate(z):
+            counts, _ = np.histogram([Ray.along(rayTrace, zProfile).y for rayTrace in rayTraces], bins=5,
+                                     range=(-0.5, 2.5))
+            self.assertListEqual(list(profiles.counts[i]), list(counts))
+
+    def testProfilesFromNoRayTraces(self):
+        profiles = Matrix().profilesFromRayTraces([], [0, 1], binCount=4)
+        self.assertListEqual(profiles.counts.tolist(), [[0] * 4] * 2)
+
     def testTraceManyJustOne(self):
         rays = [Ray()]
         m = Matrix(physicalLength=1e-9)
@@ -389,6 +434,53 @@ class TestMatrix(envtest.RaytracingTestCase):
         # One less ray, because last is blocked
         self.assertEqual(len(traceManyThrough), len(rays) - 1)
 
+    def testMulRayBlockedReturnsSameRay(self):
+        ray = Ray(1, 1, isBlocked=True)
+        self.assertIs(Matrix(A=1, B=1, C=0, D=1) * ray, ray)
+
+    def testTransmission(self):
+        m = Matrix(A=1, B=1, C=0, D=1, physicalLength=1, apertureDiameter=4, apertureNA=0.5)
+        rays = [Ray(1, 0.1), Ray(3, 0.1), Ray(1, 0.6), Ray(1, 0.1, isBlocked=True)]
+        transmission = m.transmission(rays)
+        self.assertListEqual(list(transmission.isTransmitted), [True, False, False, False])
+        self.assertEqual(transmission.y[0], 1.1)
+        self.assertEqual(transmission.theta[0], 0.1)
+        self.assertTrue(all(np.isnan(transmission.y[1:])))
+
+    def testTransmissionMatchesTraceManyThrough(self):
+        path = MatrixGroup([Space(d=10, diameter=10), Lens(f=5, diameter=4), Space(d=5), Aperture(diameter=1)])
+        rays = [Ray(y, theta) for y in [-6, -2, -0.5, 0, 0.5, 2, 6] for theta in [-0.5, -0.1, 0, 0.1, 0.5]]
+        transmission = path.transmission(RayBatch.fromRays(rays))
+        outputRays = path.traceManyThrough(rays, progress=False)
+        self.assertListEqual(list(transmission.y[transmission.isTransmitted]), list(outputRays.yValues))
+        self.assertListEqual(list(transmission.theta[transmission.isTransmitted]), list(outputRays.thetaValues))
+
+    def testTransmissionNotIterable(self):
+        with self.assertRaises(TypeError):
+            Matrix().transmission(Ray())
+
+    def testSurvivalMask(self):
+        path = MatrixGroup([Space(d=10), Lens(f=10, diameter=10), Space(d=10)])
+        mask = path.survivalMask([Ray(0, 0.1), Ray(0, 0.6), Ray(6, 0)])
+        self.assertListEqual(list(mask), [True, False, False])
+
+    def testTraceStream(self):
+        rays = [Ray(y, 0) for y in range(-5, 6)]
+        m = Matrix(physicalLength=1, apertureDiameter=5)
+        outputBatches = list(m.traceStream(rays, chunkSize=4))
+        self.assertListEqual([len(batch) for batch in outputBatches], [4, 4, 3])
+        self.assertEqual(sum(batch.isNotBlocked.sum() for batch in outputBatches), 5)
+
+    def testTraceStreamRandomRays(self):
+        rays = RandomUniformRays(maxCount=1000)
+        m = Matrix(physicalLength=1)
+        self.assertEqual(sum(len(batch) for batch in m.traceStream(rays, chunkSize=300)), 1000)
+        self.assertEqual(len(rays.rays), 0)
+
+    def testTraceStreamNotIterable(self):
+        with self.assertRaises(TypeError):
+            Matrix().traceStream(Ray())
+
     @envtest.skipIf(sys.platform == 'darwin' and sys.version_info.major == 3 and sys.version_info.minor <= 7,
                     "Endless loop on macOS")
     # Some information here: https://github.com/gammapy/gammapy/issues/2453
@@ -411,6 +503,15 @@ class TestMatrix(envtest.RaytracingTestCase):
             # Order is not kept, we have to check if the ray traced is in the original list
             self.assertIn(trace[i], rays)
 
+    @envtest.skipIf(sys.platform == 'darwin' and sys.version_info.major == 3 and sys.version_info.minor <= 7,
+                    "Endless loop on macOS")
+    # Some information here: https://github.com/gammapy/gammapy/issues/2453
+    def testTraceManyThroughInParallelKeepsOrder(self):
+        rays = [Ray(y, y) for y in range(10)]
+        m = Matrix(physicalLength=1, apertureDiameter=10)
+        trace = m.traceManyThroughInParallel(rays, processes=3, progress=False)
+        self.assertListEqual(trace.rays, [m * ray for ray in rays[:6]])
+
     @envtest.skipIf(sys.platform == 'darwin' and sys.version_info.major == 3 and sys.version_info.minor <= 7,
                     "Endless loop on macOS")
     # Some information here: https://github.com/gammapy/gammapy/issues/2453
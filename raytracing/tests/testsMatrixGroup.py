@@ -9,8 +9,7 @@ class TestMatrixGroup(envtest.RaytracingTestCase):
     def testMatrixGroup(self):
         mg = MatrixGroup()
         self.assertIsInstance(mg, MatrixGroup)
-        self.assertIsNone(mg._lastRayToBeTraced)
-        self.assertIsNone(mg._lastRayTrace)
+        self.assertEqual(mg.traceCacheInfo(), TraceCacheInfo(hits=0, misses=0, maxSize=128, size=0))
         self.assertEqual(mg.A, 1)
         self.assertEqual(mg.B, 0)
         self.assertEqual(mg.C, 0)
@@ -200,8 +199,7 @@ class TestMatrixGroup(envtest.RaytracingTestCase):
         ray = Ray(10, 10)
         trace = [ray]
         self.assertListEqual(mg.trace(ray), trace)
-        self.assertEqual(mg._lastRayToBeTraced, ray)
-        self.assertListEqual(mg._lastRayTrace, trace)
+        self.assertEqual(mg.traceCacheInfo().size, 1)
 
     def testTrace(self):
         s = Space(2, diameter=5)
@@ -213,8 +211,7 @@ class TestMatrixGroup(envtest.RaytracingTestCase):
         self.assertEqual(len(mgTrace), 4)
         self.assertListEqual(mgTrace, trace)
         self.assertTrue(mgTrace[-1].isBlocked)
-        self.assertListEqual(mg._lastRayTrace, trace)
-        self.assertEqual(mg._lastRayToBeTraced, trace[0])
+        self.assertEqual(mg.traceCacheInfo().misses, 1)
 
     def testTraceAlreadyTraced(self):
         s = Space(2, diameter=5)
@@ -225,12 +222,103 @@ class TestMatrixGroup(envtest.RaytracingTestCase):
         mgTrace1 = mg.trace(ray)
 
         mgTrace2 = mg.trace(ray)  # Trace a 2nd time
-        self.assertListEqual(mg._lastRayTrace, trace)
         self.assertListEqual(mgTrace2, trace)
         self.assertListEqual(mgTrace1, mgTrace2)
-        self.assertEqual(mg._lastRayToBeTraced, trace[0])
+        self.assertEqual(mg.traceCacheInfo().hits, 1)
         self.assertTrue(mgTrace2[-1].isBlocked)
 
+    def testTraceCacheKeepsSeveralRays(self):
+        mg = MatrixGroup([Space(2, diameter=5), Lens(6, diameter=5)])
+        rays = [Ray(1, 0), Ray(2, 0.1), Ray(1, 0)]
+        for ray in rays + rays:
+            mg.trace(ray)
+        self.assertEqual(mg.traceCacheInfo(), TraceCacheInfo(hits=4, misses=2, maxSize=128, size=2))
+
+    def testTraceCacheUsesAllPropertiesOfTheRay(self):
+        mg = MatrixGroup([Space(2, diameter=5), Lens(6, diameter=5)])
+        mg.trace(Ray(1, 0))
+        trace = mg.trace(Ray(1, 0, z=10))
+        self.assertEqual(trace[-1].z, 12)
+        trace = mg.trace(Ray(1, 0, isBlocked=True))
+        self.assertTrue(trace[-1].isBlocked)
+        self.assertEqual(mg.traceCacheInfo().hits, 0)
+
+    def testTraceCacheLeastRecentlyUsedRemoved(self):
+        mg = MatrixGroup([Space(2), Lens(6)])
+        mg.traceCacheSize = 2
+        mg.trace(Ray(1, 0))
+        mg.trace(Ray(2, 0))
+        mg.trace(Ray(1, 0))
+        mg.trace(Ray(3, 0))
+        self.assertEqual(mg.traceCacheInfo().size, 2)
+        mg.trace(Ray(1, 0))
+        self.assertEqual(mg.traceCacheInfo().hits, 2)
+        mg.trace(Ray(2, 0))
+        self.assertEqual(mg.traceCacheInfo().hits, 2)
+
+    def testTraceCacheNotUsedAfterChanges(self):
+        group = MatrixGroup([Space(2), Lens(6)])
+        mg = MatrixGroup([group, Space(10)])
+        self.assertEqual(mg.trace(Ray(1, 0))[-1].z, 12)
+        mg.append(Space(5))
+        self.assertEqual(mg.trace(Ray(1, 0))[-1].z, 17)
+        group.append(Space(3))
+        self.assertEqual(mg.trace(Ray(1, 0))[-1].z, 20)
+        mg.elements.pop()
+        self.assertEqual(mg.trace(Ray(1, 0))[-1].z, 15)
+        self.assertEqual(mg.traceCacheInfo().hits, 0)
+
+    def testTraceCacheReturnsACopy(self):
+        mg = MatrixGroup([Space(2), Lens(6)])
+        trace = mg.trace(Ray(1, 0))
+        trace.append(Ray())
+        self.assertEqual(len(mg.trace(Ray(1, 0))), len(trace) - 1)
+
+    def testTraceCacheRaysAreCopies(self):
+        mg = MatrixGroup([Space(2), Lens(6)])
+        inputRay = Ray(1, 0)
+        trace = mg.trace(inputRay)
+        self.assertIs(trace[0], inputRay)
+        inputRay.y = 10
+        trace[-1].theta = 1
+
+        cachedTrace = mg.trace(Ray(1, 0))
+        self.assertEqual(mg.traceCacheInfo().hits, 1)
+        self.assertEqual(cachedTrace[0].y, 1)
+        self.assertAlmostEqual(cachedTrace[-1].theta, -1 / 6)
+        cachedTrace[-1].theta = 1
+        self.assertAlmostEqual(mg.trace(Ray(1, 0))[-1].theta, -1 / 6)
+
+    def testTraceCacheKeyedOnValuesOfTheRay(self):
+        mg = MatrixGroup([Space(2), Lens(6)])
+        rays = Rays([Ray(1, 0), Ray(1, 0)])
+        mg.trace(rays[0])
+        trace = mg.trace(rays[1])
+        self.assertEqual(mg.traceCacheInfo().hits, 1)
+        self.assertNotIsInstance(trace[0], type(rays[1]))
+
+    def testTraceCacheNotUsedAfterElementChanged(self):
+        lens = Lens(6, diameter=5)
+        mg = MatrixGroup([Space(2), MatrixGroup([lens])])
+        self.assertFalse(mg.trace(Ray(2, 0))[-1].isBlocked)
+        lens.apertureDiameter = 2
+        self.assertTrue(mg.trace(Ray(2, 0))[-1].isBlocked)
+        self.assertEqual(mg.traceCacheInfo().hits, 0)
+
+    def testNestedGroupChangesUpdateTransferMatrix(self):
+        group = MatrixGroup([Space(2), Lens(6)])
+        mg = MatrixGroup([group, Space(10)])
+        group.append(Space(3))
+        self.assertEqual(mg.transferMatrix().L, 15)
+        self.assertEqual(mg.L, 15)
+
+    def testVersionAfterPickle(self):
+        mg = MatrixGroup([MatrixGroup([Space(2), Lens(6)]), Space(10)])
+        copy = pickle.loads(pickle.dumps(mg))
+        self.assertEqual(copy.trace(Ray(1, 0))[-1].z, 12)
+        copy.elements[0].append(Space(3))
+        self.assertEqual(copy.trace(Ray(1, 0))[-1].z, 15)
+
     def testTraceIncorrectType(self):
         s = Space(2, diameter=5)
         l = Lens(6, diameter=5)
@@ -266,6 +354,14 @@ class TestMatrixGroup(envtest.RaytracingTestCase):
         intermediateConj = mg.intermediateConjugates()
         self.assertListEqual(intermediateConj, [[30.0, -0.5]])
 
+    def testIntermediateConjugatesRelays(self):
+        mg = MatrixGroup([System4f(f1=10, f2=10)] * 3)
+        self.assertListEqual(mg.intermediateConjugates(), [[40, -1], [80, 1], [120, -1]])
+
+    def testIntermediateConjugatesDuplicatesWithinTolerance(self):
+        mg = MatrixGroup([Space(10), Lens(10), Space(15), Lens(5), Space(5)] + [Space(0.0005)] * 3)
+        self.assertListEqual(mg.intermediateConjugates(), [[30.0, -0.5]])
+
     def testHasFiniteApertutreDiameter(self):
         space = Space(10, 1.2541255)
         mg = MatrixGroup([space])
@@ -506,6 +602,79 @@ class TestMatrixGroup(envtest.RaytracingTestCase):
         mg[0] = space
         self.assertListEqual(mg.elements, [space, lens, space])
 
+    def assertTransferMatrixIsUpToDate(self, mg):
+        transferMatrix = Matrix()
+        for element in mg.elements:
+            transferMatrix = element * transferMatrix
+        self.assertEqual((mg.A, mg.B, mg.C, mg.D, mg.L), (transferMatrix.A, transferMatrix.B, transferMatrix.C,
+                                                         transferMatrix.D, transferMatrix.L))
+        self.assertEqual((mg.frontVertex, mg.backVertex), (transferMatrix.frontVertex, transferMatrix.backVertex))
+
+    def testTransferMatrixUpdatedAfterEdits(self):
+        mg = MatrixGroup([Space(10), Lens(10), Space(20), Lens(20), Space(5)])
+        mg.insert(2, [Lens(5), Space(3)])
+        self.assertTransferMatrixIsUpToDate(mg)
+        mg.pop(-2)
+        self.assertTransferMatrixIsUpToDate(mg)
+        mg.insert(-1, Lens(30))
+        self.assertTransferMatrixIsUpToDate(mg)
+        mg[1] = Lens(40)
+        self.assertTransferMatrixIsUpToDate(mg)
+        mg[2:4] = MatrixGroup([Space(7), Lens(7)])
+        self.assertTransferMatrixIsUpToDate(mg)
+        mg.pop(0)
+        self.assertTransferMatrixIsUpToDate(mg)
+
+    def testTransferMatrixUpdatedAfterFlip(self):
+        mg = MatrixGroup([Space(10), DielectricInterface(1, 1.5, R=20), Space(10),
+                          DielectricInterface(1.5, 1, R=-20), Space(5)])
+        mg.flipOrientation()
+        self.assertTransferMatrixIsUpToDate(mg)
+
+    def testTransferMatrixAfterElementsChangedDirectly(self):
+        mg = MatrixGroup([Space(10), Lens(10)])
+        mg.elements[0] = Space(20)
+        self.assertEqual(mg.transferMatrix().B, 20)
+        mg.elements.append(Space(10))
+        mg.append(Lens(20))
+        self.assertTransferMatrixIsUpToDate(mg)
+
+    def testTransferMatrixUpToMatchesElementByElementProduct(self):
+        mg = MatrixGroup([Space(10), Lens(10), Space(5), System4f(f1=5, f2=10), Aperture(10), Space(20)])
+        for upTo in [-1, 0, 5, 10, 12.5, 15, 20, 35, 49.5, 60, 75, inf]:
+            transferMatrix = Matrix()
+            distance = upTo
+            for element in mg.elements:
+                if element.L <= distance:
+                    transferMatrix = element * transferMatrix
+                    distance -= element.L
+                else:
+                    transferMatrix = element.transferMatrix(upTo=distance) * transferMatrix
+                    break
+
+            self.assertEqual(mg.transferMatrix(upTo=upTo).L, transferMatrix.L)
+            self.assertAlmostEqual(mg.transferMatrix(upTo=upTo).A, transferMatrix.A)
+            self.assertAlmostEqual(mg.transferMatrix(upTo=upTo).B, transferMatrix.B)
+            self.assertAlmostEqual(mg.transferMatrix(upTo=upTo).C, transferMatrix.C)
+            self.assertAlmostEqual(mg.transferMatrix(upTo=upTo).D, transferMatrix.D)
+
+    def testTransferMatrixUpToAfterPop(self):
+        mg = MatrixGroup([Space(10), Lens(10), Space(10)])
+        mg.transferMatrix(upTo=15)
+        mg.pop(0)
+        self.assertEqual(mg.transferMatrix(upTo=5).B, 5)
+
+    def testTransferMatrixIsACopy(self):
+        mg = MatrixGroup([Space(10), Lens(10)])
+        mg.transferMatrix().A = 5
+        self.assertEqual(mg.transferMatrix().A, 1)
+
+    def testAppendMultipliesOnlyTheNewElement(self):
+        mg = MatrixGroup([Space(10), Lens(10)])
+        products = mg._prefixTransferMatrices[:]
+        mg.append(Space(10))
+        self.assertListEqual(mg._prefixTransferMatrices[:3], products)
+
     def testEqualityDifferentClassInstance(self):
         mg = MatrixGroup()
         self.assertNotEqual(mg, Matrix())
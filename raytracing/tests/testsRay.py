@@ -135,6 +135,38 @@ class TestRay(envtest.RaytracingTestCase):
         self.assertEqual(Ray.along(rayTrace, z=1.5), Ray(0.2,0.2))
         self.assertEqual(Ray.along(rayTrace, z=2.0), Ray(0.3,0))
 
+    def testRayHasNoDict(self):
+        ray = Ray()
+        self.assertFalse(hasattr(ray, "__dict__"))
+        with self.assertRaises(AttributeError):
+            ray.color = "red"
+
+    def testFromValues(self):
+        ray = Ray._fromValues(1, 2, 3, True, 4, 0.5)
+        self.assertEqual(ray, Ray(1, 2))
+        self.assertEqual(ray.z, 3)
+        self.assertTrue(ray.isBlocked)
+        self.assertEqual(ray.apertureDiameter, 4)
+        self.assertEqual(ray.wavelength, 0.5)
+
+    def testPickle(self):
+        import pickle
+        ray = pickle.loads(pickle.dumps(Ray(1, 2, z=3, isBlocked=True)))
+        self.assertEqual(ray, Ray(1, 2))
+        self.assertEqual(ray.z, 3)
+        self.assertTrue(ray.isBlocked)
+
+    def testSetStateFromDictionary(self):
+        ray = Ray.__new__(Ray)
+        ray.__setstate__({"y": 1, "theta": 2, "z": 3, "isBlocked": False, "apertureDiameter": inf, "wavelength": None})
+        self.assertEqual(ray, Ray(1, 2))
+        self.assertEqual(ray.z, 3)
+
+    def testAtBlocked(self):
+        ray = Ray(1, 0.1, isBlocked=True).at(z=1)
+        self.assertTrue(ray.isBlocked)
+        self.assertEqual(ray.apertureDiameter, inf)
+
 
 if __name__ == '__main__':
     envtest.main()
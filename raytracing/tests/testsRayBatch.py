@@ -0,0 +1,133 @@
+import envtest  # modifies path
+
+from raytracing import *
+
+inf = float("+inf")
+
+
+class TestRayBatch(envtest.RaytracingTestCase):
+
+    def assertBatchMatchesRays(self, batch, rays):
+        self.assertEqual(len(batch), len(rays))
+        for i, ray in enumerate(rays):
+            self.assertEqual(batch.y[i], ray.y)
+            self.assertEqual(batch.theta[i], ray.theta)
+            self.assertEqual(batch.z[i], ray.z)
+            self.assertEqual(batch.isBlocked[i], ray.isBlocked)
+            self.assertEqual(batch.apertureDiameter[i], ray.apertureDiameter)
+
+    def testRayBatch(self):
+        batch = RayBatch(y=[1, 2, 3], theta=[0.1, 0.2, 0.3])
+        self.assertEqual(len(batch), 3)
+        self.assertListEqual(list(batch.z), [0, 0, 0])
+        self.assertListEqual(list(batch.isBlocked), [False, False, False])
+        self.assertListEqual(list(batch.apertureDiameter), [inf, inf, inf])
+
+    def testRayBatchDifferentLengths(self):
+        with self.assertRaises(ValueError):
+            RayBatch(y=[1, 2, 3], theta=[0.1, 0.2])
+
+    def testFromRays(self):
+        rays = [Ray(1, 0.1, z=2), Ray(2, 0.2, isBlocked=True, wavelength=0.5)]
+        batch = RayBatch.fromRays(rays)
+        self.assertBatchMatchesRays(batch, rays)
+        self.assertIsNone(batch[0].wavelength)
+        self.assertEqual(batch[1].wavelength, 0.5)
+
+    def testFromRaysNotRays(self):
+        with self.assertRaises(TypeError):
+            RayBatch.fromRays([Ray(), "Ray"])
+
+    def testGetItem(self):
+        batch = RayBatch(y=[1, 2, 3], theta=[0.1, 0.2, 0.3])
+        self.assertEqual(batch[1], Ray(2, 0.2))
+        self.assertIsInstance(batch[1:], RayBatch)
+        self.assertListEqual(list(batch[1:].y), [2, 3])
+
+    def testToRaysOnlyNotBlocked(self):
+        batch = RayBatch(y=[1, 2, 3], theta=[0.1, 0.2, 0.3], isBlocked=[False, True, False])
+        rays = batch.toRays()
+        self.assertIsInstance(rays, Rays)
+        self.assertListEqual(rays.rays, [Ray(1, 0.1), Ray(3, 0.3)])
+        self.assertEqual(len(batch.toRays(includeBlocked=True)), 3)
+
+    def testMulRayBatch(self):
+        m = Matrix(A=1, B=2, C=0.5, D=3, physicalLength=1, apertureDiameter=4, apertureNA=0.5, frontIndex=1, backIndex=0.5)
+        rays = [Ray(1, 0.1), Ray(3, 0.1), Ray(1, 0.6), Ray(1, 0.1, isBlocked=True)]
+        batch = m * RayBatch.fromRays(rays)
+        self.assertBatchMatchesRays(batch, [m * ray for ray in rays])
+
+    def testTraceBatchThroughMatchesTraceThrough(self):
+        path = ImagingPath()
+        path.append(Space(d=10, diameter=30))
+        path.append(Lens(f=5, diameter=10))
+        path.append(Space(d=3))
+        path.append(Aperture(diameter=6, NA=0.5))
+        path.append(thorlabs.AC254_050_A())
+        path.append(Space(d=20))
+        inputRays = [Ray(y, theta) for y in range(-20, 21) for theta in [-1, -0.5, -0.1, 0, 0.1, 0.5, 1]]
+
+        batch = path.traceBatchThrough(RayBatch.fromRays(inputRays))
+        self.assertBatchMatchesRays(batch, [path.traceThrough(Ray(ray.y, ray.theta)) for ray in inputRays])
+
+    def testTraceBatchThroughBlockedAtEntrance(self):
+        space = Space(d=10, diameter=2)
+        batch = space.traceBatchThrough(RayBatch(y=[0.5, 2], theta=[0, 0]))
+        self.assertListEqual(list(batch.isBlocked), [False, True])
+        self.assertListEqual(list(batch.z), [10, 0])
+
+    def testTraceBatchThroughAxicon(self):
+        path = MatrixGroup([Space(d=5), Axicon(alpha=0.1, n=1.5, diameter=10), Space(d=5)])
+        inputRays = [Ray(y, 0.1) for y in range(-6, 7)]
+
+        batch = path.traceBatchThrough(RayBatch.fromRays(inputRays))
+        self.assertBatchMatchesRays(batch, [path.traceThrough(Ray(ray.y, ray.theta)) for ray in inputRays])
+
+    def testTraceBatchThroughEmptyGroup(self):
+        inputBatch = RayBatch(y=[1], theta=[0])
+        batch = MatrixGroup().traceBatchThrough(inputBatch)
+        self.assertIsNot(batch, inputBatch)
+        self.assertListEqual(list(batch.y), [1])
+
+    def testTraceBatchThroughNotABatch(self):
+        with self.assertRaises(TypeError):
+            Matrix().traceBatchThrough(Ray())
+        with self.assertRaises(TypeError):
+            MatrixGroup().traceBatchThrough([Ray()])
+
+    def testTraceManyThroughRayBatch(self):
+        path = MatrixGroup([Space(d=10), Lens(f=5, diameter=4)])
+        outputRays = path.traceManyThrough(RayBatch(y=[0, 1, 3], theta=[0, 0.1, 0]))
+        self.assertEqual(len(outputRays), 2)
+
+    def testChunksOfRayBatch(self):
+        batch = RayBatch(y=range(10), theta=[0] * 10)
+        chunks = list(RayBatch.chunksOf(batch, 4))
+        self.assertListEqual([len(chunk) for chunk in chunks], [4, 4, 2])
+        self.assertListEqual(list(chunks[1].y), [4, 5, 6, 7])
+
+    def testChunksOfRays(self):
+        rays = (Ray(y, 0) for y in range(10))
+        chunks = list(RayBatch.chunksOf(rays, 5))
+        self.assertListEqual([len(chunk) for chunk in chunks], [5, 5])
+
+    def testChunksOfRaysAndBatches(self):
+        source = [Ray(), Ray(), RayBatch(y=range(5), theta=[0] * 5), Ray()]
+        chunks = list(RayBatch.chunksOf(source, 3))
+        self.assertListEqual([len(chunk) for chunk in chunks], [2, 3, 2, 1])
+
+    def testChunksOfRandomRaysAreNotKept(self):
+        rays = RandomUniformRays(maxCount=25)
+        rays[2]
+        chunks = list(RayBatch.chunksOf(rays, 10))
+        self.assertListEqual([len(chunk) for chunk in chunks], [3, 10, 10, 2])
+        self.assertEqual(len(rays.rays), 3)
+        self.assertEqual(chunks[0][2], rays[2])
+
+    def testChunksOfInvalidChunkSize(self):
+        with self.assertRaises(ValueError):
+            list(RayBatch.chunksOf([Ray()], 0))
+
+
+if __name__ == '__main__':
+    envtest.main()
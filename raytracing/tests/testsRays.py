@@ -16,8 +16,6 @@ class TestRays(envtest.RaytracingTestCase):
         self.assertListEqual(r.rays, [])
         self.assertEqual(r.iteration, 0)
         self.assertEqual(r.progressLog, 10000)
-        self.assertIsNone(r._yValues)
-        self.assertIsNone(r._thetaValues)
         self.assertIsNone(r._yHistogram)
         self.assertIsNone(r._thetaHistogram)
         self.assertIsNone(r._directionBinEdges)
@@ -92,45 +90,46 @@ class TestRays(envtest.RaytracingTestCase):
 
     def testYValuesDefaultArgs(self):
         r = Rays()
-        self.assertListEqual(r.yValues, [])
+        self.assertListEqual(list(r.yValues), [])
 
     def testYValuesEmptyList(self):
         r = Rays([])
-        self.assertListEqual(r.yValues, [])
+        self.assertListEqual(list(r.yValues), [])
 
     def testYValues(self):
         yvalues = list(range(10))
         listOfRays = [Ray(y) for y in yvalues]
         r = Rays(listOfRays)
-        self.assertListEqual(r.yValues, yvalues)
+        self.assertListEqual(list(r.yValues), yvalues)
 
-    def testYValuesNotNone(self):
-        r = Rays([Ray()])
-        # Don't do this, only for test purpose
-        yvalues = [0]
-        r._yValues = yvalues
-        self.assertListEqual(r.yValues, yvalues)
+    def testYValuesAreReadOnlyViews(self):
+        r = Rays([Ray(1), Ray(2)])
+        yValues = r.yValues
+        self.assertIsInstance(yValues, np.ndarray)
+        self.assertTrue(np.shares_memory(yValues, r.yValues))
+        with self.assertRaises(ValueError):
+            yValues[0] = 3
 
     def testThetaValuesDefaultArgs(self):
         r = Rays()
-        self.assertListEqual(r.thetaValues, [])
+        self.assertListEqual(list(r.thetaValues), [])
 
     def testThetaValuesEmptyList(self):
         r = Rays([])
-        self.assertListEqual(r.thetaValues, [])
+        self.assertListEqual(list(r.thetaValues), [])
 
     def testThetaValues(self):
         thetaValues = list(np.linspace(-pi / 2, pi / 2, 10))
         listOfRays = [Ray(theta=theta) for theta in thetaValues]
         r = Rays(listOfRays)
-        self.assertListEqual(r.thetaValues, thetaValues)
+        self.assertListEqual(list(r.thetaValues), thetaValues)
 
-    def testRayCountHist(self):
-        r = Rays([Ray()])
-        # Don't do this, only for test purpose
-        thetaValues = [0]
-        r._thetaValues = thetaValues
-        self.assertListEqual(r.thetaValues, thetaValues)
+    def testValuesAfterAppend(self):
+        r = Rays()
+        for y in range(100):
+            r.append(Ray(y, -y))
+        self.assertListEqual(list(r.yValues), list(range(100)))
+        self.assertListEqual(list(r.thetaValues), list(range(0, -100, -1)))
 
     def testDisplayProgress(self):
         rays = [Ray(0, 0)]
@@ -232,8 +231,6 @@ class TestRays(envtest.RaytracingTestCase):
         r.rayAnglesHistogram()
         r.rayCountHistogram()
         r.append(Ray(2, 0))
-        self.assertIsNone(r._yValues)
-        self.assertIsNone(r._thetaValues)
         self.assertIsNone(r._yHistogram)
         self.assertIsNone(r._thetaHistogram)
         self.assertIsNone(r._directionBinEdges)
@@ -242,6 +239,57 @@ class TestRays(envtest.RaytracingTestCase):
         self.assertIsNone(r._anglesHistogramParameters)
         self.assertIsNone(r._xValuesAnglesHistogram)
 
+    def testChangeRayChangesStoredRay(self):
+        r = Rays([Ray(1, 1), Ray(2, 2)])
+        r[1].y = 3
+        r.rays[0].isBlocked = True
+        self.assertListEqual(list(r.yValues), [1, 3])
+        self.assertTrue(r[0].isBlocked)
+
+    def testChangeRayInvalidateCachedValues(self):
+        r = Rays([Ray(1, 1), Ray(2, 2)])
+        for change in [lambda ray: setattr(ray, 'isBlocked', True), lambda ray: setattr(ray, 'wavelength', 0.5)]:
+            r.rayCountHistogram()
+            r.rayAnglesHistogram()
+            change(r[0])
+            self.assertIsNone(r._countHistogramParameters)
+            self.assertIsNone(r._anglesHistogramParameters)
+
+    def testChangeListOfRaysChangesStoredRays(self):
+        r = Rays([Ray(1, 1), Ray(2, 2)])
+        r._rays.append(Ray(3, 3))
+        self.assertListEqual(list(r.yValues), [1, 2, 3])
+
+        rays = r._rays
+        rays[0] = Ray(4, 4)
+        self.assertListEqual(list(r.yValues), [4, 2, 3])
+        self.assertEqual(rays.pop(1), Ray(2, 2))
+        self.assertListEqual(list(r.yValues), [4, 3])
+        rays.insert(0, Ray(5, 5))
+        del rays[-1]
+        self.assertListEqual(list(r.yValues), [5, 4])
+        self.assertListEqual(rays, r.rays)
+
+    def testStoredRayCopyIsIndependent(self):
+        r = Rays([Ray(1, 1, wavelength=0.5)])
+        ray = pickle.loads(pickle.dumps(r[0]))
+        self.assertIs(type(ray), Ray)
+        self.assertEqual(ray.wavelength, 0.5)
+        ray.y = 3
+        self.assertEqual(r[0].y, 1)
+
+    def testSlice(self):
+        r = Rays([Ray(y) for y in range(5)])
+        self.assertIsInstance(r[1:3], Rays)
+        self.assertListEqual(list(r[1:3].yValues), [1, 2])
+        self.assertListEqual(list(r[::-2].yValues), [4, 2, 0])
+
+    def testIndexOutOfRange(self):
+        r = Rays([Ray(), Ray(1)])
+        self.assertEqual(r[-1], Ray(1))
+        with self.assertRaises(IndexError):
+            r[2]
+
     def testAppendInvalidInput(self):
         rays = Rays()
         with self.assertRaises(TypeError):
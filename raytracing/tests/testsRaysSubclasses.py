@@ -141,6 +141,11 @@ class TestRandomRays(envtest.RaytracingTestCase):
         with self.assertRaises(IndexError):
             rays[-6]
 
+    def testRandomRaysRandomBatchNotImplemented(self):
+        rays = RandomRays(maxCount=5)
+        with self.assertRaises(NotImplementedError):
+            rays.randomBatch(5)
+
 
 class TestRandomUniformRays(envtest.RaytracingTestCase):
 
@@ -206,7 +211,57 @@ class TestRandomUniformRays(envtest.RaytracingTestCase):
         rays = RandomUniformRays(1, -1, pi / 2, -pi / 2)
         nextRay = next(rays)
         nextRay2 = next(rays)
-        self.assertListEqual(rays.rays, [nextRay, nextRay2])
+        self.assertListEqual(rays.rays[:2], [nextRay, nextRay2])
+
+    def testRandomUniformRaysNextGeneratesABlock(self):
+        rays = RandomUniformRays(maxCount=25000)
+        next(rays)
+        self.assertEqual(len(rays.rays), 10000)
+
+    def testRandomUniformRaysValuesGenerateAll(self):
+        rays = RandomUniformRays(maxCount=1000)
+        rays[10]
+        self.assertEqual(len(rays.yValues), 1000)
+        self.assertEqual(len(rays.thetaValues), 1000)
+
+    def testRandomUniformRaysSeed(self):
+        rays1 = RandomUniformRays(maxCount=25000, seed=3)
+        rays2 = RandomUniformRays(maxCount=25000, seed=3)
+        rays2[12345]
+        rays2[20]
+        self.assertTrue(np.array_equal(rays1.yValues, rays2.yValues))
+        self.assertTrue(np.array_equal(rays1.thetaValues, rays2.thetaValues))
+        self.assertFalse(np.array_equal(rays1.yValues, RandomUniformRays(maxCount=25000, seed=4).yValues))
+
+    def testRandomUniformRaysSeedSameRaysInAnyChunkSize(self):
+        rays = RandomUniformRays(maxCount=25000, seed=3)
+        for chunkSize in [1000, 7000, 30000]:
+            y = np.concatenate([chunk.y for chunk in RayBatch.chunksOf(RandomUniformRays(maxCount=25000, seed=3),
+                                                                       chunkSize)])
+            self.assertTrue(np.array_equal(y, rays.yValues))
+
+    def testRandomUniformRaysSeedRaysBetween(self):
+        rays = RandomUniformRays(maxCount=25000, seed=3)
+        batch = rays.raysBetween(9990, 10010)
+        self.assertEqual(len(rays.rays), 0)
+        self.assertListEqual(list(batch.y), list(rays.yValues[9990:10010]))
+
+    def testRandomUniformRaysSeedGenerator(self):
+        rays = RandomUniformRays(maxCount=100, seed=np.random.default_rng(3))
+        self.assertTrue(np.array_equal(rays.yValues,
+                                       RandomUniformRays(maxCount=100, seed=np.random.default_rng(3)).yValues))
+        self.assertTrue(np.array_equal(RandomUniformRays(maxCount=100, seed=3).yValues,
+                                       RandomUniformRays(maxCount=100, seed=np.random.SeedSequence(3)).yValues))
+
+    def testRandomUniformRaysSeedGeneratorIsAdvanced(self):
+        generator = np.random.default_rng(3)
+        rays = RandomUniformRays(maxCount=100, seed=generator)
+        otherRays = RandomUniformRays(maxCount=100, seed=generator)
+        self.assertFalse(np.array_equal(rays.yValues, otherRays.yValues))
+
+    def testRandomUniformRaysInvalidSeed(self):
+        with self.assertRaises(TypeError):
+            RandomUniformRays(seed="3")
 
     def testRandomUniformRaysGenerateWithIterations(self):
         rays = RandomUniformRays(10, -10, -1, 1)
@@ -231,6 +286,14 @@ class TestRandomUniformRays(envtest.RaytracingTestCase):
         with self.assertRaises(IndexError):
             rays[-item]
 
+    def testRandomUniformRaysRandomBatch(self):
+        rays = RandomUniformRays(1, 0, pi / 2, 0, maxCount=2)
+        batch = rays.randomBatch(1000)
+        self.assertEqual(len(batch), 1000)
+        self.assertTrue(all(0 <= batch.y) and all(batch.y <= 1))
+        self.assertTrue(all(0 <= batch.theta) and all(batch.theta <= pi / 2))
+        self.assertListEqual(rays.rays, [])
+
 
 class TestRandomLambertianRays(envtest.RaytracingTestCase):
 
@@ -295,7 +358,7 @@ class TestRandomLambertianRays(envtest.RaytracingTestCase):
         rays = RandomLambertianRays(1)
         nextRay = next(rays)
         nextRay2 = next(rays)
-        self.assertListEqual(rays.rays, [nextRay, nextRay2])
+        self.assertListEqual(rays.rays[:2], [nextRay, nextRay2])
 
     def testRandomLambertianRaysGenerateWithIterations(self):
         rays = RandomLambertianRays(10, -10)
@@ -319,6 +382,51 @@ class TestRandomLambertianRays(envtest.RaytracingTestCase):
         with self.assertRaises(IndexError):
             rays[-item]
 
+    def testRandomLambertianRaysRandomBatch(self):
+        rays = RandomLambertianRays(1, 0, maxCount=2)
+        batch = rays.randomBatch(1000)
+        self.assertEqual(len(batch), 1000)
+        self.assertTrue(all(0 <= batch.y) and all(batch.y <= 1))
+        self.assertTrue(all(abs(batch.theta) <= pi / 2))
+        self.assertListEqual(rays.rays, [])
+
+    def testRandomLambertianRaysSeed(self):
+        rays = RandomLambertianRays(maxCount=100, seed=3)
+        rays.randomRay()
+        self.assertTrue(np.array_equal(rays.thetaValues, RandomLambertianRays(maxCount=100, seed=3).thetaValues))
+
+    def testRandomLambertianRaysDistribution(self):
+        rays = RandomLambertianRays(maxCount=100000)
+        # For a Lambertian source, the fraction of rays within +/-theta is sin(theta)
+        self.assertAlmostEqual(np.mean(abs(rays.thetaValues) < pi / 6), 0.5, delta=0.01)
+
+
+class TestGaussianProfileUniformRays(envtest.RaytracingTestCase):
+
+    def testGaussianProfileUniformRaysRandomBatch(self):
+        rays = GaussianProfileUniformRays(intensityWidth=2, maxCount=2)
+        batch = rays.randomBatch(1000)
+        self.assertEqual(len(batch), 1000)
+        self.assertTrue(all(abs(batch.y) <= 8))
+        self.assertTrue(all(abs(batch.theta) <= pi / 2))
+        self.assertListEqual(rays.rays, [])
+
+    def testGaussianProfileUniformRaysDistribution(self):
+        rays = GaussianProfileUniformRays(intensityWidth=2, maxCount=100000)
+        self.assertAlmostEqual(np.std(rays.yValues), 2 / np.sqrt(2), delta=0.02)
+        self.assertTrue(all(abs(rays.yValues) <= 8))
+
+    def testGaussianProfileUniformRaysSeed(self):
+        rays = GaussianProfileUniformRays(intensityWidth=2, maxCount=100, seed=3)
+        self.assertTrue(np.array_equal(rays.yValues, GaussianProfileUniformRays(2, maxCount=100, seed=3).yValues))
+
+    def testGaussianProfileUniformRaysRandomRay(self):
+        rays = GaussianProfileUniformRays(intensityWidth=2, maxCount=1)
+        ray = rays.randomRay()
+        self.assertListEqual(rays.rays, [ray])
+        with self.assertRaises(AttributeError):
+            rays.randomRay()
+
 
 if __name__ == '__main__':
     envtest.main()
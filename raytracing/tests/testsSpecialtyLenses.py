@@ -2,6 +2,7 @@ import envtest  # modifies path
 import matplotlib.pyplot as plt
 
 from raytracing import *
+import numpy as np
 
 
 class TestAchromatDoubletLens(envtest.RaytracingTestCase):
@@ -34,6 +35,26 @@ class TestAchromatDoubletLens(envtest.RaytracingTestCase):
 
         self.assertAlmostEqual(diff, diffFocal, places=3)
 
+    def testFocalShifts(self):
+        wavelengths, focalShifts = thorlabs.AC254_100_A().focalShifts(wavelengths=[0.45, 0.6, 0.75])
+        self.assertListEqual(list(wavelengths), [450, 600, 750])
+        for wavelength, focalShift in zip([0.45, 0.6, 0.75], focalShifts):
+            f1, f2 = thorlabs.AC254_100_A(wavelength=wavelength).effectiveFocalLengths()
+            self.assertAlmostEqual(focalShift, f2 - 100.1, places=10)
+
+    def testFocalShiftsFlipped(self):
+        lens = thorlabs.AC254_100_A()
+        wavelengths, focalShifts = lens.focalShifts()
+        lens.flipOrientation()
+        wavelengths, flippedFocalShifts = lens.focalShifts()
+        self.assertTrue(np.allclose(focalShifts, flippedFocalShifts))
+
+    def testFocalShiftsSinglet(self):
+        wavelengths, focalShifts = thorlabs.LA1608_A().focalShifts(wavelengths=[0.5, 0.7])
+        for wavelength, focalShift in zip([0.5, 0.7], focalShifts):
+            f1, f2 = thorlabs.LA1608_A(wavelength=wavelength).effectiveFocalLengths()
+            self.assertAlmostEqual(focalShift, f2 - 75.0, places=10)
+
     def testAchromatDiameter(self):
         self.assertAlmostEqual(thorlabs.AC254_100_A().displayHalfHeight(), 25.4/2)
 